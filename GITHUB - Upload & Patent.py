@@ -1,13 +1,21 @@
 import sys
 import os
+import threading
+import importlib
 from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtCore import Qt
-from github import Github, GithubException
 from datetime import datetime
-import json
-from pathlib import Path
-import webbrowser
-from urllib.parse import urlencode
+
+# Only light modules here: gitswift loads PyGithub and requests on first use,
+# so the window can paint before they are imported
+import gitswift
+from gitswift.client import DEFAULT_WORKERS, MAX_WORKERS
+from gitswift.errors import Cancelled
+from gitswift.progress import describe as describe_progress
+from gitswift.statuslog import StatusLog
+from gitswift.tokens import TOKENS_FILE, load_tokens, save_tokens
+# GITSWIFT_TRACE=FILE saves a Chrome trace on exit, GITSWIFT_PROFILE=FILE each job's cProfile stats
+from gitswift.tracing import profiling, span
 
 # Enable High DPI scaling
 if hasattr(Qt, 'AA_EnableHighDpiScaling'):
@@ -15,6 +23,9 @@ if hasattr(Qt, 'AA_EnableHighDpiScaling'):
 if hasattr(Qt, 'AA_UseHighDpiPixmaps'):
     QtWidgets.QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
 
+# How often queued status messages are shown
+STATUS_FLUSH_MS = 100
+
 # Supported licenses mapping
 LICENSES = {
     "MIT License": "mit",
@@ -23,13 +34,63 @@ LICENSES = {
     "BSD 3-Clause License": "bsd-3-clause",
 }
 
+class JobSignals(QtCore.QObject):
+    """Signals a background job uses to report back to the GUI thread"""
+    progress = QtCore.pyqtSignal(str)
+    status = QtCore.pyqtSignal(object)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(object)
+    cancelled = QtCore.pyqtSignal()
+
+class Job(QtCore.QRunnable):
+    """Run a blocking GitHub operation on a worker thread.
+
+    fn is called as fn(job, *args) and may use job.log() to stream status
+    messages, job.report() as the listener of a gitswift.Progress and
+    job.is_cancelled() to stop early.
+    """
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.signals = JobSignals()
+        self._cancel = threading.Event()
+
+    def log(self, message):
+        self.signals.progress.emit(message)
+
+    def report(self, event):
+        self.signals.status.emit(event)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        try:
+            with profiling():
+                result = self.fn(self, *self.args)
+        except Cancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
 class GitHubUploader(QtWidgets.QWidget):
     def __init__(self):
         try:
             super().__init__()
+            self.account = None
             self.github = None
             self.user = None
-            self.tokens_file = Path.home() / '.github_tokens.json'
+            self.thread_pool = QtCore.QThreadPool()
+            self.current_job = None
+            self.workers = DEFAULT_WORKERS
+            self.tokens_file = TOKENS_FILE
             
             self.load_tokens()
             self.initUI()
@@ -40,19 +101,16 @@ class GitHubUploader(QtWidgets.QWidget):
     def load_tokens(self):
         """Load saved tokens from file"""
         self.tokens = {}
-        if self.tokens_file.exists():
-            try:
-                with open(self.tokens_file, 'r') as f:
-                    self.tokens = json.load(f)
-            except Exception as e:
-                print(f"Error loading tokens: {e}")
-                self.save_tokens()
+        try:
+            self.tokens = load_tokens(self.tokens_file)
+        except Exception as e:
+            print(f"Error loading tokens: {e}")
+            self.save_tokens()
 
     def save_tokens(self):
         """Save tokens to file"""
         try:
-            with open(self.tokens_file, 'w') as f:
-                json.dump(self.tokens, f)
+            save_tokens(self.tokens, self.tokens_file)
         except Exception as e:
             print(f"Error saving tokens: {e}")
 
@@ -66,7 +124,7 @@ class GitHubUploader(QtWidgets.QWidget):
                 font-family: Arial;
                 font-size: 14px;
             }
-            QLineEdit, QTextEdit, QComboBox {
+            QLineEdit, QTextEdit, QPlainTextEdit, QComboBox {
                 background-color: #3e3e3e;
                 color: #ffffff;
                 border: 1px solid #555555;
@@ -179,6 +237,17 @@ class GitHubUploader(QtWidgets.QWidget):
         author_layout.addWidget(self.author_input)
         layout.addLayout(author_layout)
 
+        # Parallel Uploads
+        workers_layout = QtWidgets.QHBoxLayout()
+        workers_label = QtWidgets.QLabel("Parallel Uploads:")
+        self.workers_spin = QtWidgets.QSpinBox()
+        self.workers_spin.setRange(1, MAX_WORKERS)
+        self.workers_spin.setValue(self.workers)
+        self.workers_spin.valueChanged.connect(self.workers_changed)
+        workers_layout.addWidget(workers_label)
+        workers_layout.addWidget(self.workers_spin)
+        layout.addLayout(workers_layout)
+
         # Upload Button
         self.upload_button = QtWidgets.QPushButton("Upload to GitHub")
         self.upload_button.clicked.connect(self.upload_to_github)
@@ -191,15 +260,134 @@ class GitHubUploader(QtWidgets.QWidget):
         self.update_button.setEnabled(False)
         layout.addWidget(self.update_button)
 
-        # Status Display
-        self.status_display = QtWidgets.QTextEdit()
+        # Watch Button: keeps pushing changes until Cancel is pressed
+        self.watch_button = QtWidgets.QPushButton("Watch for Changes")
+        self.watch_button.clicked.connect(self.watch_existing_repository)
+        self.watch_button.setEnabled(False)
+        layout.addWidget(self.watch_button)
+
+        # Cancel Button, enabled while a background job runs
+        self.cancel_button = QtWidgets.QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_job)
+        self.cancel_button.setEnabled(False)
+        layout.addWidget(self.cancel_button)
+
+        # Upload progress, filled in from the job's Progress events
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setTextVisible(True)
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        # Status Display: messages are queued in status_log and shown in batches,
+        # keeping only the last lines so big pushes don't slow the window down
+        self.status_log = StatusLog()
+        self.status_display = QtWidgets.QPlainTextEdit()
         self.status_display.setReadOnly(True)
+        self.status_display.setMaximumBlockCount(self.status_log.lines.maxlen)
         layout.addWidget(self.status_display)
+        self.status_timer = QtCore.QTimer(self)
+        self.status_timer.setInterval(STATUS_FLUSH_MS)
+        self.status_timer.timeout.connect(self.flush_status)
+        self.status_timer.start()
 
         self.setLayout(layout)
 
+    def preload_engine(self):
+        """Import the upload engine in the background once the window is up,
+        so the first sign-in doesn't wait for PyGithub to load"""
+        threading.Thread(target=importlib.import_module, args=('gitswift.sync',), daemon=True).start()
+
     def log_status(self, message):
-        self.status_display.append(f"{datetime.now().strftime('%H:%M:%S')}: {message}")
+        self.status_log.add(message)
+
+    def flush_status(self):
+        lines = self.status_log.take()
+        if lines:
+            with span('show status', 'gui', lines=len(lines)):
+                self.status_display.appendPlainText('\n'.join(lines))
+
+    def show_progress(self, event):
+        if event['event'] == 'file':
+            return
+        with span('show progress', 'gui'):
+            self.update_progress(event)
+
+    def update_progress(self, event):
+        self.progress_bar.setVisible(True)
+        if event['bytes_total']:
+            done = event['bytes_sent'] / event['bytes_total']
+        else:
+            done = event['files_done'] / event['files_total'] if event['files_total'] else 1.0
+        # Permille, as QProgressBar values are 32-bit and byte counts may not be
+        self.progress_bar.setValue(int(done * 1000))
+        self.progress_bar.setFormat(describe_progress(event))
+
+    def workers_changed(self, value):
+        # Jobs read the plain attribute, never the widget, from their thread
+        self.workers = value
+
+    def run_job(self, fn, *args, on_finished=None, on_failed=None):
+        """Run fn(job, *args) in the background and call back on the GUI thread"""
+        job = Job(fn, *args)
+        job.signals.progress.connect(self.log_status)
+        job.signals.status.connect(self.show_progress)
+        # job_ended runs first so callbacks are free to start the next job
+        job.signals.finished.connect(self.job_ended)
+        job.signals.failed.connect(self.job_ended)
+        job.signals.cancelled.connect(self.job_ended)
+        job.signals.cancelled.connect(self.job_cancelled)
+        if on_finished:
+            job.signals.finished.connect(on_finished)
+        job.signals.failed.connect(on_failed or self.job_failed)
+
+        self.current_job = job
+        self.set_busy(True)
+        self.thread_pool.start(job)
+
+    def job_ended(self, *args):
+        self.current_job = None
+        self.set_busy(False)
+
+    def job_cancelled(self):
+        self.log_status("Operation cancelled")
+
+    def job_failed(self, error):
+        """Report an error raised by a background job"""
+        # Already loaded by the job that failed
+        from github import GithubException
+
+        if isinstance(error, GithubException):
+            error_message = error.data.get('message', str(error)) if isinstance(error.data, dict) else str(error)
+            self.log_status(f"Error: {error_message}")
+            QtWidgets.QMessageBox.critical(self, "Error", f"An error occurred:\n\n{error_message}")
+        else:
+            self.log_status(f"Error: {str(error)}")
+            QtWidgets.QMessageBox.critical(self, "Error", f"An unexpected error occurred:\n\n{str(error)}")
+
+    def cancel_job(self):
+        if self.current_job:
+            self.log_status("Cancelling...")
+            self.current_job.cancel()
+            self.cancel_button.setEnabled(False)
+
+    def set_busy(self, busy):
+        """Lock the action buttons while a job is running"""
+        authenticated = self.user is not None
+        self.auth_button.setEnabled(not busy)
+        self.dir_button.setEnabled(not busy)
+        self.upload_button.setEnabled(not busy and authenticated)
+        self.update_button.setEnabled(not busy and authenticated)
+        self.watch_button.setEnabled(not busy and authenticated)
+        self.cancel_button.setEnabled(busy)
+
+    def closeEvent(self, event):
+        # Give a running job the chance to stop before the window goes away
+        if self.current_job:
+            self.current_job.cancel()
+            self.thread_pool.waitForDone(5000)
+        self.status_log.flush()
+        super().closeEvent(event)
 
     def authenticate(self):
         token = self.token_combo.currentText().strip()
@@ -217,49 +405,63 @@ class GitHubUploader(QtWidgets.QWidget):
                 "3. Select these scopes: repo, workflow, write:packages, delete:packages")
             return
             
-        try:
-            self.github = Github(token)
-            self.user = self.github.get_user()
-            
+        self.log_status("Authenticating...")
+        self.run_job(self.fetch_user, token, on_finished=self.authenticated, on_failed=self.authentication_failed)
+
+    def fetch_user(self, job, token):
+        """Log in and load the user profile (runs in the background)"""
+        with span('authenticate'):
+            # Size the connection pool for the largest upload parallelism
+            account = gitswift.Account(token, pool_size=MAX_WORKERS)
+
             # Test token permissions by trying to list repos
-            self.user.get_repos()
+            account.user.get_repos()
+        return token, account
+
+    def authenticated(self, result):
+        token, self.account = result
+        self.github, self.user = self.account.github, self.account.user
+
+        # Save token if checkbox is checked
+        if self.save_token_checkbox.isChecked():
+            username = self.user.login
             
-            # Save token if checkbox is checked
-            if self.save_token_checkbox.isChecked():
-                username = self.user.login
-                
-                # Check if this token already exists
-                existing_token_name = None
-                for name, saved_token in self.tokens.items():
-                    if saved_token == token:
-                        existing_token_name = name
-                        break
-                
-                # Update existing token with new timestamp or create new entry
-                token_name = f"{username} - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-                if existing_token_name:
-                    # Remove old entry
-                    del self.tokens[existing_token_name]
-                    # Remove from combo box
-                    index = self.token_combo.findText(existing_token_name)
-                    if index >= 0:
-                        self.token_combo.removeItem(index)
-                
-                # Add/Update token
-                self.tokens[token_name] = token
-                self.save_tokens()
-                
-                # Update combo box
-                self.token_combo.clear()
-                self.token_combo.addItems(self.tokens.keys())
-                self.token_combo.setCurrentText(token_name)
+            # Check if this token already exists
+            existing_token_name = None
+            for name, saved_token in self.tokens.items():
+                if saved_token == token:
+                    existing_token_name = name
+                    break
             
-            self.log_status(f"Authenticated as {self.user.login}")
-            self.upload_button.setEnabled(True)
-            self.update_button.setEnabled(True)  # Enable update button
-            QtWidgets.QMessageBox.information(self, "Success", f"Authenticated as {self.user.login}")
+            # Update existing token with new timestamp or create new entry
+            token_name = f"{username} - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+            if existing_token_name:
+                # Remove old entry
+                del self.tokens[existing_token_name]
+                # Remove from combo box
+                index = self.token_combo.findText(existing_token_name)
+                if index >= 0:
+                    self.token_combo.removeItem(index)
             
-        except GithubException as e:
+            # Add/Update token
+            self.tokens[token_name] = token
+            self.save_tokens()
+            
+            # Update combo box
+            self.token_combo.clear()
+            self.token_combo.addItems(self.tokens.keys())
+            self.token_combo.setCurrentText(token_name)
+        
+        self.log_status(f"Authenticated as {self.user.login}")
+        self.upload_button.setEnabled(True)
+        self.update_button.setEnabled(True)  # Enable update button
+        self.watch_button.setEnabled(True)
+        QtWidgets.QMessageBox.information(self, "Success", f"Authenticated as {self.user.login}")
+
+    def authentication_failed(self, e):
+        from github import GithubException
+
+        if isinstance(e, GithubException):
             error_message = e.data.get('message', str(e)) if hasattr(e, 'data') else str(e)
             if "401" in str(e):
                 error_message = "Invalid token. Please check your token and try again."
@@ -273,7 +475,7 @@ class GitHubUploader(QtWidgets.QWidget):
             self.log_status(f"Authentication failed: {error_message}")
             QtWidgets.QMessageBox.critical(self, "Authentication Failed", 
                 f"Failed to authenticate:\n\n{error_message}")
-        except Exception as e:
+        else:
             self.log_status(f"Authentication failed: {str(e)}")
             QtWidgets.QMessageBox.critical(self, "Authentication Failed", 
                 f"An unexpected error occurred:\n\n{str(e)}")
@@ -342,39 +544,29 @@ class GitHubUploader(QtWidgets.QWidget):
                 self.repo_input.setText(cleaned_name)
                 
                 # Check if repository exists
-                existing_repo = self.check_existing_repository(cleaned_name)
-                if existing_repo:
-                    reply = QtWidgets.QMessageBox.question(
-                        self,
-                        'Repository Exists',
-                        f'A repository named "{cleaned_name}" already exists. Would you like to update it?',
-                        QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
-                        QtWidgets.QMessageBox.Yes
-                    )
-                    
-                    if reply == QtWidgets.QMessageBox.Yes:
-                        self.log_status(f"Selected existing repository: {cleaned_name}")
-                    else:
-                        # Clear the name if user doesn't want to update
-                        self.repo_input.clear()
+                if self.user:
+                    self.run_job(self.check_existing_repository, cleaned_name,
+                                 on_finished=self.confirm_selected_repository)
+
+    def confirm_selected_repository(self, result):
+        cleaned_name, existing_repo = result
+        if existing_repo:
+            reply = QtWidgets.QMessageBox.question(
+                self,
+                'Repository Exists',
+                f'A repository named "{cleaned_name}" already exists. Would you like to update it?',
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+                QtWidgets.QMessageBox.Yes
+            )
+            
+            if reply == QtWidgets.QMessageBox.Yes:
+                self.log_status(f"Selected existing repository: {cleaned_name}")
+            else:
+                # Clear the name if user doesn't want to update
+                self.repo_input.clear()
 
     def validate_repo_name(self, name):
-        # Remove any whitespace
-        name = name.strip()
-        
-        # Check if name is empty
-        if not name:
-            return False, "Repository name cannot be empty"
-        
-        # Check for valid characters (letters, numbers, hyphens, underscores)
-        if not all(c.isalnum() or c in '-_' for c in name):
-            return False, "Repository name can only contain letters, numbers, hyphens, and underscores"
-        
-        # Check length
-        if len(name) > 100:
-            return False, "Repository name cannot be longer than 100 characters"
-        
-        return True, name
+        return gitswift.validate_repo_name(name)
 
     def upload_to_github(self):
         if not self.github or not self.user:
@@ -396,82 +588,60 @@ class GitHubUploader(QtWidgets.QWidget):
             return
         repo_name = result
 
-        try:
-            # Check if repository exists
-            existing_repo = self.check_existing_repository(repo_name)
+        # Read the form now, the network work happens in the background
+        description = self.desc_input.text().strip()
+        private = self.private_checkbox.isChecked()
+        self.run_job(self.check_existing_repository, repo_name,
+                     on_finished=lambda result: self.start_upload(result, project_path, description, private))
+
+    def start_upload(self, result, project_path, description, private):
+        repo_name, existing_repo = result
+        if existing_repo:
+            # Confirm update
+            reply = QtWidgets.QMessageBox.question(
+                self,
+                'Update Repository',
+                f'Repository "{repo_name}" already exists. Do you want to update it?',
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+                QtWidgets.QMessageBox.No
+            )
             
-            if existing_repo:
-                # Confirm update
-                reply = QtWidgets.QMessageBox.question(
-                    self,
-                    'Update Repository',
-                    f'Repository "{repo_name}" already exists. Do you want to update it?',
-                    QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
-                    QtWidgets.QMessageBox.No
-                )
-                
-                if reply == QtWidgets.QMessageBox.Yes:
-                    self.log_status(f"Updating repository: {repo_name}")
-                    updates = self.update_repository(existing_repo, project_path)
-                    
-                    if updates:
-                        update_list = "\n".join([f"- {file}" for file in updates])
-                        QtWidgets.QMessageBox.information(
-                            self,
-                            "Update Complete",
-                            f"The following files were updated:\n\n{update_list}"
-                        )
-                    self.log_status("Repository update completed!")
-                    
-                return
-            else:
-                # Create new repository as before
-                self.log_status(f"Creating {'private' if self.private_checkbox.isChecked() else 'public'} repository...")
-                repo = self.user.create_repo(
-                    name=repo_name,
-                    description=self.desc_input.text().strip(),
-                    private=self.private_checkbox.isChecked(),
-                    auto_init=True
-                )
-                self.log_status(f"Repository created: {repo.html_url}")
-                self.upload_directory(repo, project_path)
-                
-                self.log_status("Project uploaded successfully!")
-                QtWidgets.QMessageBox.information(
-                    self,
-                    "Success", 
-                    f"Project uploaded successfully!\nRepository URL: {repo.html_url}"
-                )
-                self.clear_fields()
-
-        except GithubException as e:
-            error_message = e.data.get('message', str(e)) if hasattr(e, 'data') else str(e)
-            self.log_status(f"Error: {error_message}")
-            QtWidgets.QMessageBox.critical(self, "Error", f"An error occurred:\n\n{error_message}")
-        except Exception as e:
-            self.log_status(f"Error: {str(e)}")
-            QtWidgets.QMessageBox.critical(self, "Error", f"An unexpected error occurred:\n\n{str(e)}")
-
-    def upload_directory(self, repo, directory_path):
-        for root, dirs, files in os.walk(directory_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                relative_path = os.path.relpath(file_path, directory_path)
-                
-                with open(file_path, 'rb') as f:
-                    content = f.read()
-                
-                try:
-                    repo.create_file(
-                        relative_path,
-                        f"Add {relative_path}",
-                        content
-                    )
-                    self.log_status(f"Uploaded: {relative_path}")
-                except Exception as e:
-                    self.log_status(f"Failed to upload {relative_path}: {str(e)}")
+            if reply == QtWidgets.QMessageBox.Yes:
+                self.log_status(f"Updating repository: {repo_name}")
+                self.run_job(self.update_repository, existing_repo, project_path,
+                             on_finished=self.update_finished)
+        else:
+            # Create new repository as before
+            self.log_status(f"Creating {'private' if private else 'public'} repository...")
+            self.run_job(self.create_and_upload, repo_name, description, private, project_path,
+                         on_finished=self.upload_finished)
+
+    def create_and_upload(self, job, repo_name, description, private, project_path):
+        """Create the repository and push the project into it (runs in the background)"""
+        repo = self.account.create_repository(repo_name, description=description, private=private)
+        job.log(f"Repository created: {repo.html_url}")
+        self.upload_directory(job, repo, project_path)
+        return repo
+
+    def upload_finished(self, repo):
+        self.log_status("Project uploaded successfully!")
+        QtWidgets.QMessageBox.information(
+            self,
+            "Success", 
+            f"Project uploaded successfully!\nRepository URL: {repo.html_url}"
+        )
+        self.clear_fields()
+
+    def upload_directory(self, job, repo, directory_path):
+        # All files go up as blobs and land in a single commit
+        with span('upload_directory'):
+            gitswift.RepoSync(repo, directory_path, log=job.log, cancelled=job.is_cancelled, workers=self.workers,
+                              progress=gitswift.Progress(job.report)).upload_all()
 
     def create_new_token(self):
+        import webbrowser
+        from urllib.parse import urlencode
+
         # GitHub token creation URL with pre-selected scopes
         params = {
             'description': 'GitSwift Upload Token',
@@ -496,51 +666,16 @@ class GitHubUploader(QtWidgets.QWidget):
         # Open default browser to token creation page
         webbrowser.open(url)
 
-    def check_existing_repository(self, repo_name):
-        try:
-            return self.user.get_repo(repo_name)
-        except GithubException:
-            return None
-
-    def update_repository(self, repo, directory_path):
-        updates = []
-        for root, dirs, files in os.walk(directory_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                relative_path = os.path.relpath(file_path, directory_path)
-                
-                try:
-                    # Try to get existing file content
-                    existing_file = repo.get_contents(relative_path)
-                    with open(file_path, 'rb') as f:
-                        new_content = f.read()
-                    
-                    # Compare contents
-                    if existing_file.decoded_content != new_content:
-                        repo.update_file(
-                            relative_path,
-                            f"Updated {relative_path}",
-                            new_content,
-                            existing_file.sha
-                        )
-                        updates.append(relative_path)
-                        self.log_status(f"Updated: {relative_path}")
-                
-                except GithubException as e:
-                    if e.status == 404:  # File doesn't exist
-                        # Add new file
-                        with open(file_path, 'rb') as f:
-                            content = f.read()
-                        repo.create_file(
-                            relative_path,
-                            f"Added {relative_path}",
-                            content
-                        )
-                        self.log_status(f"Added new file: {relative_path}")
-                    else:
-                        raise e
-        
-        return updates
+    def check_existing_repository(self, job, repo_name):
+        """Look up repo_name on the account (runs in the background)"""
+        return repo_name, self.account.find_repository(repo_name)
+
+    def update_repository(self, job, repo, directory_path):
+        with span('update_repository'):
+            changes, commit = gitswift.RepoSync(repo, directory_path, log=job.log, cancelled=job.is_cancelled,
+                                                workers=self.workers, progress=gitswift.Progress(job.report)).push()
+        return ([relative_path for relative_path, file_path in changes.modified]
+                + [f"{relative_path} (deleted)" for relative_path in changes.deleted])
 
     def update_existing_repository(self):
         if not self.github or not self.user:
@@ -554,39 +689,73 @@ class GitHubUploader(QtWidgets.QWidget):
             QtWidgets.QMessageBox.warning(self, "Input Error", "Please select a directory and provide a repository name.")
             return
 
-        try:
-            # Check if repository exists
-            existing_repo = self.check_existing_repository(repo_name)
-            
-            if existing_repo:
-                self.log_status(f"Updating repository: {repo_name}")
-                updates = self.update_repository(existing_repo, project_path)
-                
-                if updates:
-                    update_list = "\n".join([f"- {file}" for file in updates])
-                    QtWidgets.QMessageBox.information(
-                        self,
-                        "Update Complete",
-                        f"The following files were updated:\n\n{update_list}"
-                    )
-                else:
-                    QtWidgets.QMessageBox.information(
-                        self,
-                        "No Changes",
-                        "No files needed updating. Repository is already up to date."
-                    )
-                self.log_status("Repository update completed!")
-                self.clear_fields()
-            else:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Repository Not Found",
-                    f"No repository named '{repo_name}' was found. Please check the name or use 'Upload to GitHub' to create a new repository."
-                )
+        self.run_job(self.check_existing_repository, repo_name,
+                     on_finished=lambda result: self.start_update(result, project_path))
 
-        except Exception as e:
-            self.log_status(f"Error: {str(e)}")
-            QtWidgets.QMessageBox.critical(self, "Error", f"An unexpected error occurred:\n\n{str(e)}")
+    def start_update(self, result, project_path):
+        repo_name, existing_repo = result
+        if existing_repo:
+            self.log_status(f"Updating repository: {repo_name}")
+            self.run_job(self.update_repository, existing_repo, project_path,
+                         on_finished=self.update_finished)
+        else:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Repository Not Found",
+                f"No repository named '{repo_name}' was found. Please check the name or use 'Upload to GitHub' to create a new repository."
+            )
+
+    def watch_existing_repository(self):
+        if not self.github or not self.user:
+            QtWidgets.QMessageBox.warning(self, "Authentication Error", "Please authenticate first.")
+            return
+
+        project_path = self.dir_input.text().strip()
+        repo_name = self.repo_input.text().strip()
+
+        if not all([project_path, repo_name]):
+            QtWidgets.QMessageBox.warning(self, "Input Error", "Please select a directory and provide a repository name.")
+            return
+
+        self.run_job(self.check_existing_repository, repo_name,
+                     on_finished=lambda result: self.start_watch(result, project_path))
+
+    def start_watch(self, result, project_path):
+        repo_name, existing_repo = result
+        if existing_repo:
+            self.log_status(f"Watching repository: {repo_name} (press Cancel to stop)")
+            self.run_job(self.watch_repository, existing_repo, project_path)
+        else:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Repository Not Found",
+                f"No repository named '{repo_name}' was found. Please check the name or use 'Upload to GitHub' to create a new repository."
+            )
+
+    def watch_repository(self, job, repo, directory_path):
+        """Push every burst of changes until the job is cancelled (runs in the background)"""
+        from gitswift.watch import watch
+
+        sync = gitswift.RepoSync(repo, directory_path, log=job.log, cancelled=job.is_cancelled, workers=self.workers,
+                                 progress=gitswift.Progress(job.report))
+        watch(sync, cancelled=job.is_cancelled)
+
+    def update_finished(self, updates):
+        if updates:
+            update_list = "\n".join([f"- {file}" for file in updates])
+            QtWidgets.QMessageBox.information(
+                self,
+                "Update Complete",
+                f"The following files were updated:\n\n{update_list}"
+            )
+        else:
+            QtWidgets.QMessageBox.information(
+                self,
+                "No Changes",
+                "No files needed updating. Repository is already up to date."
+            )
+        self.log_status("Repository update completed!")
+        self.clear_fields()
 
     def clear_fields(self):
         """Clear specific input fields after operations"""
@@ -596,18 +765,22 @@ class GitHubUploader(QtWidgets.QWidget):
 
 def main():
     try:
-        # Import Windows-specific modules
-        import win32gui
-        import win32con
-        
-        # Hide console window
-        console_window = win32gui.GetForegroundWindow()
-        win32gui.ShowWindow(console_window, win32con.SW_HIDE)
+        # Hide the console window on Windows; pywin32 is optional elsewhere
+        try:
+            import win32gui
+            import win32con
+        except ImportError:
+            pass
+        else:
+            console_window = win32gui.GetForegroundWindow()
+            win32gui.ShowWindow(console_window, win32con.SW_HIDE)
         
         app = QtWidgets.QApplication(sys.argv)
         uploader = GitHubUploader()
         uploader.show()
         app.uploader = uploader
+        # Runs once the event loop has painted the window
+        QtCore.QTimer.singleShot(0, uploader.preload_engine)
         return app.exec_()
     except Exception as e:
         print(f"Error in main: {str(e)}")
@@ -0,0 +1,66 @@
+"""Local hashing throughput at different numbers of threads
+
+Writes a synthetic project, reads it once so it is in the page cache,
+then computes every file's git blob SHA with each thread count and prints
+MB per second and the speedup over one thread. The SHAs are checked to
+come back identical and in the same order every time:
+
+    python benchmarks/bench_hashing.py --files 400 --size 4 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gitswift import collect_files, hashing
+
+
+def make_project(directory, files, size_mb):
+    block = os.urandom(1024 * 1024)
+    for i in range(files):
+        folder = os.path.join(directory, f"pkg{i % 10}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"asset{i}.bin"), 'wb') as f:
+            # Vary the content so no two files hash alike
+            f.write(i.to_bytes(8, 'big'))
+            for _ in range(size_mb):
+                f.write(block)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=200, help="number of files to hash")
+    parser.add_argument('--size', type=int, default=4, help="MB per file")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--no-mmap', action='store_true', help="read every file in chunks instead of mapping it")
+    args = parser.parse_args()
+
+    if args.no_mmap:
+        hashing.MMAP_THRESHOLD = float('inf')
+    mapped = args.size * 2 ** 20 >= hashing.MMAP_THRESHOLD
+    print(f"{os.cpu_count()} CPUs, {args.files} files of {args.size} MB, {'mapped' if mapped else 'read in chunks'}")
+    with tempfile.TemporaryDirectory() as directory:
+        make_project(directory, args.files, args.size)
+        file_paths = [file_path for relative_path, file_path in collect_files(directory)]
+        total_mb = sum(os.path.getsize(file_path) for file_path in file_paths) / 2 ** 20
+        # Warm the page cache, so the runs measure hashing rather than the disk
+        expected = hashing.hash_files(file_paths, workers=1)
+
+        print(f"{'workers':>8} {'seconds':>8} {'MB/s':>8} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            shas = hashing.hash_files(file_paths, workers=workers)
+            elapsed = time.perf_counter() - start
+            if shas != expected:
+                raise SystemExit(f"{workers} workers returned different SHAs")
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>8.2f} {total_mb / elapsed:>8.0f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Memory and diff time of a large tree held as a dict and as a FileIndex
+
+Builds a synthetic tree of --files paths spread over nested directories,
+then measures what {path: [size, mtime_ns, sha]} (the manifest as it was
+held before) and a FileIndex of the same entries allocate, and how long
+matching every path of one against another tree takes: a dict lookup per
+path, or one sorted merge with FileIndex.positions():
+
+    python benchmarks/bench_index.py --files 1000000
+"""
+
+import argparse
+import gc
+import hashlib
+import os
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from gitswift.index import FileIndex
+
+
+def make_entries(files, per_directory=50, depth=4):
+    """(path, size, mtime_ns, sha) of files paths, in no particular order"""
+    entries = []
+    for i in range(files):
+        folder = i // per_directory
+        parts = [f"dir{(folder >> (4 * level)) % 16}" for level in range(depth)]
+        path = '/'.join(parts + [f"file{i}.txt"])
+        entries.append((path, i, 1_700_000_000_000_000_000 + i, hashlib.sha1(str(i).encode()).hexdigest()))
+    return entries
+
+
+def allocated_mb(build):
+    """(result, MB allocated by build() that is still held)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, size / 2 ** 20
+
+
+def timed(run):
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=200000)
+    args = parser.parse_args()
+
+    entries = make_entries(args.files)
+    # The other tree: every tenth file changed
+    other = [(path, size, mtime_ns, hashlib.sha1(path.encode()).hexdigest() if i % 10 == 0 else sha)
+             for i, (path, size, mtime_ns, sha) in enumerate(entries)]
+
+    # JSON decoding makes new strings, so neither side shares the benchmark's
+    as_dict, dict_mb = allocated_mb(lambda: {(path + '.')[:-1]: [size, mtime_ns, (sha + '.')[:-1]]
+                                             for path, size, mtime_ns, sha in entries})
+    index, index_mb = allocated_mb(lambda: FileIndex.build(entries))
+    other_dict = {path: sha for path, size, mtime_ns, sha in other}
+    other_index = FileIndex.build(other)
+
+    def dict_diff():
+        return sum(1 for path, entry in as_dict.items() if other_dict.get(path) != entry[2])
+
+    def index_diff():
+        changed = 0
+        shas, other_shas = index.shas, other_index.shas
+        for i, position in enumerate(other_index.positions(index)):
+            if position is None or other_shas[position * 20:position * 20 + 20] != shas[i * 20:i * 20 + 20]:
+                changed += 1
+        return changed
+
+    dict_changed, dict_seconds = timed(dict_diff)
+    index_changed, index_seconds = timed(index_diff)
+    assert dict_changed == index_changed
+
+    print(f"{args.files} files, {dict_changed} changed")
+    print(f"{'structure':>10} {'MB':>8} {'bytes/file':>11} {'diff s':>8}")
+    for name, mb, seconds in (('dict', dict_mb, dict_seconds), ('FileIndex', index_mb, index_seconds)):
+        print(f"{name:>10} {mb:>8.1f} {mb * 2 ** 20 / args.files:>11.0f} {seconds:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Peak memory while uploading large files
+
+Writes synthetic files of the given sizes, then uploads each one to a fake
+GitHub server running in its own process and records the peak RSS of the
+uploading process, once through the streaming path and once through
+PyGithub's in-memory path:
+
+    python benchmarks/bench_memory.py --sizes 16 64 256
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def upload(base_url, file_path, stream):
+    """Child process: upload one file and print the peak RSS as JSON"""
+    from gitswift import BulkUploader, connect
+
+    repo = connect('benchmark-token', base_url=base_url).get_user().create_repo(
+        name=f"mem-{os.getpid()}", auto_init=True)
+    baseline = peak_rss_mb()
+    uploader = BulkUploader(repo, stream_threshold=0 if stream else float('inf'))
+    uploader.upload([(os.path.basename(file_path), file_path)], "Memory benchmark")
+    print(json.dumps({'baseline_mb': baseline, 'peak_mb': peak_rss_mb()}))
+
+
+def make_file(path, size_mb):
+    block = os.urandom(1024 * 1024)
+    with open(path, 'wb') as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[16, 64, 256], help="file sizes in MB")
+    parser.add_argument('--child', nargs=3, metavar=('URL', 'FILE', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        base_url, file_path, mode = args.child
+        upload(base_url, file_path, mode == 'stream')
+        return
+
+    server = subprocess.Popen([sys.executable, os.path.join(HERE, 'fake_github.py')],
+                              stdout=subprocess.PIPE, text=True)
+    base_url = server.stdout.readline().strip()
+    try:
+        print(f"{'size MB':>8} {'mode':>8} {'baseline MB':>12} {'peak MB':>9} {'growth MB':>10}")
+        with tempfile.TemporaryDirectory() as directory:
+            for size in args.sizes:
+                file_path = os.path.join(directory, f"asset-{size}.bin")
+                make_file(file_path, size)
+                for mode in ('stream', 'memory'):
+                    output = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), '--child', base_url, file_path, mode],
+                        check=True, capture_output=True, text=True).stdout
+                    result = json.loads(output.strip().splitlines()[-1])
+                    print(f"{size:>8} {mode:>8} {result['baseline_mb']:>12.1f} {result['peak_mb']:>9.1f} "
+                          f"{result['peak_mb'] - result['baseline_mb']:>10.1f}")
+                os.remove(file_path)
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""Upload and update scenarios against the local fake GitHub server
+
+Builds three synthetic projects (many small files, a few huge files and a
+deeply nested tree) and, for each, times uploading the whole project to a
+new repository and pushing an update after a few files changed. The fake
+server runs in its own process so its memory isn't counted. Every
+scenario reports its wall time, the requests it sent (from
+gitswift.http.STATS) and the peak memory it allocated (from tracemalloc,
+in one extra round so tracing doesn't slow down the timed ones).
+
+With pytest-benchmark installed it is a benchmark suite, the requests and
+peak memory going into each result's extra_info:
+
+    pytest benchmarks/bench_scenarios.py
+    pytest benchmarks/bench_scenarios.py -k many_small --benchmark-json scenarios.json
+
+BENCH_LATENCY and BENCH_RATE_LIMIT set the server's per-request latency
+and requests per minute. Run directly, it prints a table instead:
+
+    python benchmarks/bench_scenarios.py --latency 0.02 --rounds 3
+"""
+
+import argparse
+import atexit
+import itertools
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+# Manifests, journals and the HTTP cache of benchmark repositories stay out of the real home directory
+STATE_DIR = tempfile.mkdtemp(prefix='gitswift-bench-')
+os.environ['HOME'] = os.environ['USERPROFILE'] = STATE_DIR
+atexit.register(shutil.rmtree, STATE_DIR, True)
+
+from gitswift import DEFAULT_WORKERS, RepoSync, connect
+from gitswift.http import STATS
+
+LATENCY = float(os.environ.get('BENCH_LATENCY', 0.01))
+RATE_LIMIT = os.environ.get('BENCH_RATE_LIMIT')
+
+# Files changed before an update, as a fraction of the project (at least one)
+CHANGED_FRACTION = 0.01
+
+_repo_numbers = itertools.count()
+_edits = itertools.count()
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def many_small(directory, files=1000, size=1024):
+    for i in range(files):
+        write_file(os.path.join(directory, f"pkg{i % 40}", f"module{i}.py"), os.urandom(size // 2).hex().encode())
+
+
+def few_huge(directory, files=3, size_mb=16):
+    block = os.urandom(1024 * 1024)
+    for i in range(files):
+        path = os.path.join(directory, 'assets', f"data{i}.bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(i.to_bytes(8, 'big'))
+            for _ in range(size_mb):
+                f.write(block)
+
+
+def deep_nesting(directory, chains=6, depth=24, per_level=3):
+    for chain in range(chains):
+        folder = os.path.join(directory, f"root{chain}")
+        for level in range(depth):
+            folder = os.path.join(folder, f"level{level}")
+            for i in range(per_level):
+                write_file(os.path.join(folder, f"file{i}.txt"), f"{chain} {level} {i}\n".encode() * 20)
+
+
+SCENARIOS = {
+    'many_small': many_small,
+    'few_huge': few_huge,
+    'deep_nesting': deep_nesting,
+}
+
+
+def project_files(directory):
+    return sorted(os.path.join(root, name) for root, dirs, names in os.walk(directory) for name in names)
+
+
+def change_files(directory, fraction=CHANGED_FRACTION):
+    """Append a line to an evenly spread fraction of the project's files"""
+    paths = project_files(directory)
+    step = max(1, round(1 / fraction))
+    edit = next(_edits)
+    for path in paths[::step]:
+        with open(path, 'ab') as f:
+            f.write(f"edit {edit}\n".encode())
+
+
+def start_server(latency=LATENCY, rate_limit=RATE_LIMIT):
+    """Run fake_github.py in its own process, returning (process, base_url)"""
+    command = [sys.executable, os.path.join(HERE, 'fake_github.py'), '--latency', str(latency)]
+    if rate_limit:
+        command += ['--rate-limit', str(rate_limit)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    return server, server.stdout.readline().strip()
+
+
+def new_sync(base_url, directory, workers):
+    github = connect('benchmark-token', pool_size=workers, base_url=base_url)
+    repo = github.get_user().create_repo(name=f"bench-{next(_repo_numbers)}", auto_init=True)
+    return RepoSync(repo, directory, workers=workers)
+
+
+def prepare_upload(base_url, directory, workers=DEFAULT_WORKERS):
+    """Round that uploads the whole project to a new repository"""
+    return new_sync(base_url, directory, workers).upload_all
+
+
+def prepare_update(base_url, directory, workers=DEFAULT_WORKERS):
+    """Round that pushes a few changed files to a repository holding the project"""
+    sync = new_sync(base_url, directory, workers)
+    sync.upload_all()
+    change_files(directory)
+    return sync.push
+
+
+OPERATIONS = {
+    'upload': prepare_upload,
+    'update': prepare_update,
+}
+
+
+def traced_round(run):
+    """(requests, MB sent, peak MB allocated) of one call of run()"""
+    before = STATS.totals()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    totals = STATS.since(before)
+    return totals['requests'], totals['bytes_sent'] / 2 ** 20, peak / 2 ** 20
+
+
+def project_size_mb(directory):
+    return sum(os.path.getsize(path) for path in project_files(directory)) / 2 ** 20
+
+
+if 'pytest' in sys.modules:
+    # Collected by pytest: pytest-benchmark times the rounds
+    import pytest
+
+    pytest.importorskip('pytest_benchmark')
+
+    @pytest.fixture(scope='module')
+    def base_url():
+        server, url = start_server()
+        yield url
+        server.terminate()
+        server.wait()
+
+    @pytest.fixture(scope='module', params=list(SCENARIOS))
+    def project(request, tmp_path_factory):
+        directory = str(tmp_path_factory.mktemp(request.param))
+        SCENARIOS[request.param](directory)
+        return directory
+
+    @pytest.mark.parametrize('operation', list(OPERATIONS))
+    def test_scenario(benchmark, base_url, project, operation):
+        prepare = OPERATIONS[operation]
+        benchmark.pedantic(lambda run: run(), setup=lambda: ((prepare(base_url, project),), {}),
+                           rounds=3, iterations=1)
+        requests, sent_mb, peak_mb = traced_round(prepare(base_url, project))
+        benchmark.extra_info.update({
+            'files': len(project_files(project)),
+            'size_mb': round(project_size_mb(project), 2),
+            'requests': requests,
+            'sent_mb': round(sent_mb, 2),
+            'peak_mb': round(peak_mb, 2),
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--latency', type=float, default=LATENCY, help="seconds the fake server waits per request")
+    parser.add_argument('--rate-limit', type=int, default=RATE_LIMIT, help="requests the server allows per minute")
+    parser.add_argument('--rounds', type=int, default=3, help="timed rounds per scenario")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.latency, args.rate_limit)
+    try:
+        print(f"{args.latency * 1000:.0f} ms latency, {args.workers} workers, median of {args.rounds} round(s)")
+        print(f"{'scenario':>14} {'operation':>10} {'files':>6} {'size MB':>8} {'seconds':>9} {'requests':>9}"
+              f" {'sent MB':>8} {'peak MB':>8}")
+        for name in args.scenarios:
+            with tempfile.TemporaryDirectory() as directory:
+                SCENARIOS[name](directory)
+                files, size_mb = len(project_files(directory)), project_size_mb(directory)
+                for operation, prepare in OPERATIONS.items():
+                    times = []
+                    for _ in range(args.rounds):
+                        run = prepare(base_url, directory, args.workers)
+                        start = time.perf_counter()
+                        run()
+                        times.append(time.perf_counter() - start)
+                    requests, sent_mb, peak_mb = traced_round(prepare(base_url, directory, args.workers))
+                    print(f"{name:>14} {operation:>10} {files:>6} {size_mb:>8.1f} {statistics.median(times):>9.2f}"
+                          f" {requests:>9} {sent_mb:>8.1f} {peak_mb:>8.1f}")
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Cold start of the GUI: imports and time to first paint
+
+Starts a fresh interpreter with -X importtime for every run, loads the GUI
+script, shows GitHubUploader and stops at its first paint event:
+
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --json >> startup-history.jsonl
+
+Reports the median of each phase, the slowest imports of the last run and
+whether PyGithub or requests were already loaded at first paint (they
+shouldn't be). Set QT_QPA_PLATFORM=offscreen to run without a display.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+GUI_SCRIPT = os.path.join(ROOT, 'GITHUB - Upload & Patent.py')
+
+# Modules that must stay out of the import path before the window is shown
+HEAVY_MODULES = ('github', 'requests', 'gitswift.sync', 'webbrowser')
+
+
+# Runs in a fresh interpreter with as few imports of its own as possible.
+# Everything imported after the marker line is the GUI's cold start.
+CHILD = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+sys.stderr.write('-- start --\\n')
+start = time.perf_counter()
+import importlib.util
+from PyQt5 import QtCore, QtWidgets
+
+spec = importlib.util.spec_from_file_location('gitswift_gui', sys.argv[2])
+gui = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(gui)
+imported = time.perf_counter()
+
+app = QtWidgets.QApplication(sys.argv[:1])
+uploader = gui.GitHubUploader()
+built = time.perf_counter()
+state = {}
+
+class PaintWatcher(QtCore.QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Paint and 'painted' not in state:
+            state['painted'] = time.perf_counter()
+            state['loaded'] = [name for name in sys.argv[3:] if name in sys.modules]
+            QtCore.QTimer.singleShot(0, app.quit)
+        return False
+
+watcher = PaintWatcher()
+uploader.installEventFilter(watcher)
+uploader.show()
+# Don't hang if the platform never paints
+QtCore.QTimer.singleShot(10000, app.quit)
+app.exec_()
+
+painted = state.get('painted')
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'build_ms': (built - imported) * 1000,
+    'paint_ms': (painted - built) * 1000 if painted else None,
+    'first_paint_ms': (painted - start) * 1000 if painted else None,
+    'heavy_loaded': state.get('loaded'),
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """[(cumulative_us, self_us, module)] from -X importtime output after the start marker"""
+    imports = []
+    lines = stderr.splitlines()
+    for line in lines[lines.index('-- start --') + 1:]:
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # One space follows the separator, nesting adds two more per level
+        imports.append((int(cumulative_us), int(self_us), name.rstrip()[1:]))
+    return imports
+
+
+def run_once():
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD, ROOT, GUI_SCRIPT, *HEAVY_MODULES],
+                             capture_output=True, text=True, env=env, cwd=ROOT)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if process.returncode:
+        sys.exit(process.stderr)
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result['process_ms'] = wall_ms
+    imports = parse_importtime(process.stderr)
+    # Top-level lines (no leading spaces) add up to the whole import time
+    result['importtime_ms'] = sum(cumulative for cumulative, _, name in imports if not name.startswith(' ')) / 1000
+    return result, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help="fresh processes to start")
+    parser.add_argument('--top', type=int, default=10, help="slowest imports to list")
+    parser.add_argument('--json', action='store_true', help="print one JSON summary line")
+    args = parser.parse_args()
+
+    results = []
+    for _ in range(args.runs):
+        result, imports = run_once()
+        results.append(result)
+
+    keys = ('importtime_ms', 'import_ms', 'build_ms', 'paint_ms', 'first_paint_ms', 'process_ms')
+    summary = {key: statistics.median(r[key] for r in results if r[key] is not None) for key in keys}
+    summary['runs'] = args.runs
+    summary['heavy_loaded'] = sorted({name for r in results for name in r['heavy_loaded'] or ()})
+
+    if args.json:
+        print(json.dumps(summary))
+        return
+
+    print(f"median of {args.runs} runs")
+    print(f"  imports (-X importtime) {summary['importtime_ms']:8.1f} ms")
+    print(f"  load GUI script         {summary['import_ms']:8.1f} ms")
+    print(f"  build GitHubUploader    {summary['build_ms']:8.1f} ms")
+    print(f"  show to first paint     {summary['paint_ms']:8.1f} ms")
+    print(f"  time to first paint     {summary['first_paint_ms']:8.1f} ms")
+    print(f"  whole process           {summary['process_ms']:8.1f} ms")
+    print(f"heavy modules loaded at first paint: {', '.join(summary['heavy_loaded']) or 'none'}")
+    print("\nslowest imports (cumulative, last run):")
+    for cumulative, self_us, name in sorted(imports, reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name.strip()}")
+
+
+if __name__ == '__main__':
+    main()
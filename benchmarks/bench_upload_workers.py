@@ -0,0 +1,73 @@
+"""Blob upload throughput at different levels of parallelism
+
+Uploads a synthetic project to the local fake GitHub server once per
+worker count and prints files per second for each run, along with the
+TCP connections the shared pool had to open. --error-rate and
+--max-concurrent make the server fail requests, to see the retries and
+the concurrency the uploader settles at:
+
+    python benchmarks/bench_upload_workers.py --files 300 --latency 0.05 --workers 1 4 16
+    python benchmarks/bench_upload_workers.py --workers 16 --max-concurrent 6 --error-rate 0.02
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_github import serve
+from gitswift import BulkUploader, collect_files, connect
+from gitswift.http import STATS
+
+
+def make_project(directory, files, size):
+    for i in range(files):
+        folder = os.path.join(directory, f"pkg{i % 10}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"module{i}.py"), 'wb') as f:
+            f.write(os.urandom(size // 2).hex().encode())
+
+
+def run(base_url, files, workers):
+    github = connect('benchmark-token', pool_size=workers, base_url=base_url)
+    repo = github.get_user().create_repo(name=f"bench-{workers}", auto_init=True)
+    before = STATS.totals()
+    start = time.perf_counter()
+    uploader = BulkUploader(repo, workers=workers)
+    uploader.upload(files, f"Benchmark with {workers} workers")
+    return time.perf_counter() - start, STATS.since(before), uploader.limiter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=200, help="number of files to upload")
+    parser.add_argument('--size', type=int, default=2048, help="bytes per file")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds the fake server waits per request")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests failing with a 502")
+    parser.add_argument('--max-concurrent', type=int, default=None,
+                        help="requests in flight the server allows before its secondary rate limit")
+    args = parser.parse_args()
+
+    server, github, base_url = serve(latency=args.latency, error_rate=args.error_rate,
+                                     max_concurrent=args.max_concurrent)
+    with tempfile.TemporaryDirectory() as directory:
+        make_project(directory, args.files, args.size)
+        files = collect_files(directory)
+        print(f"{len(files)} files of {args.size} bytes, {args.latency * 1000:.0f} ms latency")
+        print(f"{'workers':>8} {'seconds':>9} {'files/s':>9} {'speedup':>8} {'requests':>9} {'new conns':>10}"
+              f" {'retries':>8} {'limit':>6}")
+        baseline = None
+        for workers in args.workers:
+            elapsed, totals, limiter = run(base_url, files, workers)
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {len(files) / elapsed:>9.1f} {baseline / elapsed:>7.1f}x"
+                  f" {totals['requests']:>9} {totals['connections']:>10} {limiter.retries:>8} {limiter.limit:>6}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
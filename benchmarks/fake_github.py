@@ -0,0 +1,441 @@
+"""In-process stand-in for the parts of the GitHub REST API GitSwift uses
+
+Serves the user, repository, contents (reading files) and Git Data endpoints
+(blobs, trees, commits, refs) from memory with real git object SHAs, an artificial per-request
+latency, optional rate limiting and optional trouble (random 502s, and
+secondary rate limits for too many requests at once), so uploads can be
+measured without touching github.com. GET responses carry an ETag and, like GitHub's,
+answer a matching If-None-Match with a 304 that the rate limit doesn't
+count. A Git LFS server (batch API, basic transfers and
+verify) answers next to each repository's clone URL; it checks the sha256
+of uploaded objects but only keeps their size.
+"""
+
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote
+
+
+def object_sha(kind, data):
+    return hashlib.sha1(f"{kind} {len(data)}\0".encode('ascii') + data).hexdigest()
+
+
+class FakeRepo:
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.refs = {}
+
+    def flatten(self, tree_sha, prefix=''):
+        """Return {path: entry} for every blob below a tree"""
+        files = {}
+        for entry in self.trees.get(tree_sha, []):
+            path = prefix + entry['path']
+            if entry['type'] == 'tree':
+                files.update(self.flatten(entry['sha'], path + '/'))
+            else:
+                files[path] = entry
+        return files
+
+    def build_tree(self, files):
+        """Store nested trees for {path: entry} and return the root tree SHA"""
+        children = {}
+        blobs = {}
+        for path, entry in files.items():
+            if '/' in path:
+                head, rest = path.split('/', 1)
+                children.setdefault(head, {})[rest] = entry
+            else:
+                blobs[path] = entry
+
+        entries = [{'path': name, 'mode': entry['mode'], 'type': 'blob', 'sha': entry['sha']}
+                   for name, entry in blobs.items()]
+        entries += [{'path': name, 'mode': '040000', 'type': 'tree', 'sha': self.build_tree(sub)}
+                    for name, sub in children.items()]
+        entries.sort(key=lambda entry: entry['path'])
+        sha = object_sha('tree', json.dumps(entries, sort_keys=True).encode())
+        self.trees[sha] = entries
+        return sha
+
+    def add_blob(self, data):
+        sha = object_sha('blob', data)
+        self.blobs[sha] = data
+        return sha
+
+    def add_commit(self, tree, parents, message):
+        commit = {'tree': tree, 'parents': parents, 'message': message}
+        sha = object_sha('commit', json.dumps(commit, sort_keys=True).encode())
+        self.commits[sha] = commit
+        return sha
+
+    def head_files(self, branch='main'):
+        return self.flatten(self.commits[self.refs[f"heads/{branch}"]]['tree'])
+
+
+class FakeGitHub:
+    """Shared state behind the fake server.
+
+    latency: seconds each request sleeps before answering
+    rate_limit: requests allowed per rate_window seconds, None for unlimited
+    max_blob_size: bytes above which blobs are refused, like GitHub's 100 MiB
+    error_rate: fraction of API requests answered with a 502
+    max_concurrent: API requests in flight above which GitHub's secondary
+        rate limit (403 with Retry-After) is answered, None for no limit
+    """
+
+    def __init__(self, login='octocat', latency=0.0, rate_limit=None, rate_window=60.0, max_blob_size=None,
+                 error_rate=0.0, max_concurrent=None, seed=None):
+        self.login = login
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.max_concurrent = max_concurrent
+        self.random = random.Random(seed)
+        self.in_flight = 0
+        # Requests answered with a 502 and with a secondary rate limit
+        self.errors = 0
+        self.secondary_limited = 0
+        self.rate_window = rate_window
+        self.max_blob_size = max_blob_size
+        self.lock = threading.Lock()
+        self.repos = {}
+        # {oid: size} of objects in LFS storage
+        self.lfs_objects = {}
+        self.requests = []
+        # GETs answered 304 Not Modified
+        self.not_modified = 0
+        self.window_start = time.time()
+        self.window_count = 0
+
+    def create_repo(self, name, auto_init=True):
+        repo = FakeRepo(self.login, name)
+        self.repos[name] = repo
+        if auto_init:
+            readme = repo.add_blob(f"# {name}\n".encode())
+            tree = repo.build_tree({'README.md': {'mode': '100644', 'sha': readme}})
+            repo.refs['heads/main'] = repo.add_commit(tree, [], 'Initial commit')
+        return repo
+
+    def take_request(self):
+        """Count one request against the rate limit, returning (remaining, reset, allowed)"""
+        with self.lock:
+            now = time.time()
+            if now - self.window_start >= self.rate_window:
+                self.window_start = now
+                self.window_count = 0
+            reset = int(self.window_start + self.rate_window)
+            if self.rate_limit is None:
+                return 5000, reset, True
+            if self.window_count >= self.rate_limit:
+                return 0, reset, False
+            self.window_count += 1
+            return self.rate_limit - self.window_count, reset, True
+
+    def refund_request(self):
+        """Take back the request counted last, returning the new remaining count"""
+        with self.lock:
+            if self.rate_limit is None:
+                return 5000
+            self.window_count = max(0, self.window_count - 1)
+            return self.rate_limit - self.window_count
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle on, every
+    # response to a POST would wait ~40 ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+    github = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_PATCH(self):
+        self.dispatch('PATCH')
+
+    def do_PUT(self):
+        self.dispatch('PUT')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            data = b''.join(chunks)
+        else:
+            data = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        return json.loads(data) if data else {}
+
+    def reply(self, status, body=None, headers=None, content_type='application/json'):
+        data = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def dispatch(self, method):
+        github = self.github
+        path, _, query = self.path.partition('?')
+        if path.startswith('/lfs/') or '.git/info/lfs/' in path:
+            # LFS isn't part of the REST API and its rate limit
+            github.requests.append((method, path))
+            time.sleep(github.latency)
+            return self.lfs(method, path)
+
+        body = self.read_body() if method in ('POST', 'PATCH', 'PUT') else None
+        github.requests.append((method, path))
+        with github.lock:
+            github.in_flight += 1
+            crowded = github.max_concurrent is not None and github.in_flight > github.max_concurrent
+            failed = github.random.random() < github.error_rate
+        try:
+            time.sleep(github.latency)
+            if crowded:
+                github.secondary_limited += 1
+                return self.reply(403, {'message': 'You have exceeded a secondary rate limit.'}, {'Retry-After': '1'})
+            if failed:
+                github.errors += 1
+                return self.reply(502, {'message': 'Server Error'})
+            self.answer(method, path, query, body)
+        finally:
+            with github.lock:
+                github.in_flight -= 1
+
+    def answer(self, method, path, query, body):
+        github = self.github
+        remaining, reset, allowed = github.take_request()
+        headers = {'X-RateLimit-Limit': str(github.rate_limit or 5000),
+                   'X-RateLimit-Remaining': str(remaining),
+                   'X-RateLimit-Reset': str(reset)}
+        if not allowed:
+            headers['Retry-After'] = str(max(1, int(reset - time.time())))
+            return self.reply(403, {'message': 'API rate limit exceeded'}, headers)
+
+        try:
+            status, result = self.route(method, path, query, body)
+        except KeyError:
+            status, result = 404, {'message': 'Not Found'}
+        if method == 'GET' and status == 200:
+            headers['ETag'] = etag = f'"{hashlib.sha1(json.dumps(result).encode()).hexdigest()}"'
+            if self.headers.get('If-None-Match') == etag:
+                github.not_modified += 1
+                headers['X-RateLimit-Remaining'] = str(github.refund_request())
+                return self.reply(304, None, headers)
+        self.reply(status, result, headers)
+
+    def url(self, path):
+        return f"http://{self.headers['Host']}{path}"
+
+    def route(self, method, path, query, body):
+        github = self.github
+        if path == '/user':
+            return 200, {'login': github.login, 'url': self.url(f"/users/{github.login}")}
+        if path == '/user/repos':
+            if method == 'POST':
+                return 201, self.repo_json(github.create_repo(body['name'], body.get('auto_init', False)))
+            return 200, [self.repo_json(repo) for repo in github.repos.values()]
+
+        match = re.match(r'^/repos/([^/]+)/([^/]+)(/.*)?$', path)
+        if not match or match.group(1) != github.login:
+            raise KeyError(path)
+        repo = github.repos[match.group(2)]
+        rest = match.group(3) or ''
+        base = f"/repos/{repo.owner}/{repo.name}"
+
+        with github.lock:
+            if rest == '':
+                return 200, self.repo_json(repo)
+            if rest == '/git/blobs' and method == 'POST':
+                if body.get('encoding') == 'base64':
+                    data = base64.b64decode(body['content'])
+                else:
+                    data = body['content'].encode()
+                if github.max_blob_size is not None and len(data) > github.max_blob_size:
+                    return 422, {'message': f"Blob is larger than {github.max_blob_size} bytes, use Git LFS"}
+                sha = repo.add_blob(data)
+                return 201, {'sha': sha, 'url': self.url(f"{base}/git/blobs/{sha}")}
+            if rest == '/git/trees' and method == 'POST':
+                files = repo.flatten(body['base_tree']) if body.get('base_tree') else {}
+                for entry in body['tree']:
+                    if 'content' in entry:
+                        files[entry['path']] = {'mode': entry['mode'], 'sha': repo.add_blob(entry['content'].encode())}
+                    elif entry.get('sha') is None:
+                        files.pop(entry['path'], None)
+                    elif entry['sha'] not in repo.blobs:
+                        return 422, {'message': f"Invalid tree info: {entry['sha']}"}
+                    else:
+                        files[entry['path']] = {'mode': entry['mode'], 'sha': entry['sha']}
+                return 201, self.tree_json(repo, repo.build_tree(files), recursive=False)
+            if rest == '/git/commits' and method == 'POST':
+                sha = repo.add_commit(body['tree'], body.get('parents', []), body['message'])
+                return 201, self.commit_json(repo, sha)
+
+            match = re.match(r'^/contents/(.+)$', rest)
+            if match and method == 'GET':
+                return 200, self.contents_json(repo, unquote(match.group(1)), parse_qs(query).get('ref', ['main'])[0])
+            match = re.match(r'^/git/trees/(\w+)$', rest)
+            if match:
+                if match.group(1) not in repo.trees:
+                    raise KeyError(match.group(1))
+                return 200, self.tree_json(repo, match.group(1), recursive='recursive' in query)
+            match = re.match(r'^/git/commits/(\w+)$', rest)
+            if match:
+                return 200, self.commit_json(repo, match.group(1))
+            match = re.match(r'^/git/refs?/(.+)$', rest)
+            if match:
+                ref = match.group(1)
+                if method == 'PATCH':
+                    repo.refs[ref] = body['sha']
+                sha = repo.refs[ref]
+                return 200, {'ref': f"refs/{ref}", 'url': self.url(f"{base}/git/refs/{ref}"),
+                             'object': {'sha': sha, 'type': 'commit', 'url': self.url(f"{base}/git/commits/{sha}")}}
+        raise KeyError(path)
+
+    def lfs(self, method, path):
+        github = self.github
+        media_type = 'application/vnd.git-lfs+json'
+        match = re.match(r'^/lfs/objects/([0-9a-f]{64})$', path)
+        if match and method == 'PUT':
+            # Hash the upload as it arrives instead of holding it
+            oid, size, sha = match.group(1), 0, hashlib.sha256()
+            remaining = int(self.headers.get('Content-Length') or 0)
+            while remaining:
+                chunk = self.rfile.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    break
+                sha.update(chunk)
+                size += len(chunk)
+                remaining -= len(chunk)
+            if sha.hexdigest() != oid:
+                return self.reply(422, {'message': 'sha256 does not match the oid'}, content_type=media_type)
+            with github.lock:
+                github.lfs_objects[oid] = size
+            return self.reply(200)
+
+        body = self.read_body()
+        if path == '/lfs/verify' and method == 'POST':
+            if github.lfs_objects.get(body['oid']) != body['size']:
+                return self.reply(404, {'message': 'Object not found'}, content_type=media_type)
+            return self.reply(200, {}, content_type=media_type)
+
+        match = re.match(r'^/([^/]+)/([^/]+)\.git/info/lfs/objects/batch$', path)
+        if not match or match.group(1) != github.login or match.group(2) not in github.repos or method != 'POST':
+            return self.reply(404, {'message': 'Not Found'}, content_type=media_type)
+        objects = []
+        for obj in body['objects']:
+            result = {'oid': obj['oid'], 'size': obj['size']}
+            if github.lfs_objects.get(obj['oid']) != obj['size']:
+                auth = {'Authorization': 'RemoteAuth fake-lfs-token'}
+                result['actions'] = {
+                    'upload': {'href': self.url(f"/lfs/objects/{obj['oid']}"), 'header': auth},
+                    'verify': {'href': self.url('/lfs/verify'), 'header': auth},
+                }
+            objects.append(result)
+        return self.reply(200, {'transfer': 'basic', 'objects': objects}, content_type=media_type)
+
+    def repo_json(self, repo):
+        return {'name': repo.name, 'full_name': f"{repo.owner}/{repo.name}", 'owner': {'login': repo.owner},
+                'url': self.url(f"/repos/{repo.owner}/{repo.name}"), 'private': False,
+                'clone_url': self.url(f"/{repo.owner}/{repo.name}.git"),
+                'html_url': f"https://github.invalid/{repo.owner}/{repo.name}", 'default_branch': 'main'}
+
+    def commit_json(self, repo, sha):
+        commit = repo.commits[sha]
+        base = f"/repos/{repo.owner}/{repo.name}"
+        return {'sha': sha, 'url': self.url(f"{base}/git/commits/{sha}"), 'message': commit['message'],
+                'tree': {'sha': commit['tree'], 'url': self.url(f"{base}/git/trees/{commit['tree']}")},
+                'parents': [{'sha': parent, 'url': self.url(f"{base}/git/commits/{parent}")}
+                            for parent in commit['parents']]}
+
+    def contents_json(self, repo, path, ref):
+        commit = repo.refs.get(f"heads/{ref}", ref)
+        entry = repo.flatten(repo.commits[commit]['tree'])[path]
+        data = repo.blobs[entry['sha']]
+        return {'type': 'file', 'encoding': 'base64', 'size': len(data), 'name': path.rsplit('/', 1)[-1],
+                'path': path, 'sha': entry['sha'], 'content': base64.b64encode(data).decode('ascii'),
+                'url': self.url(f"/repos/{repo.owner}/{repo.name}/contents/{path}?ref={ref}")}
+
+    def tree_json(self, repo, sha, recursive):
+        entries = []
+
+        def add(tree_sha, prefix):
+            for entry in repo.trees[tree_sha]:
+                entry = dict(entry, path=prefix + entry['path'])
+                if entry['type'] == 'blob':
+                    entry['size'] = len(repo.blobs[entry['sha']])
+                entries.append(entry)
+                if recursive and entry['type'] == 'tree':
+                    add(entry['sha'], entry['path'] + '/')
+
+        add(sha, '')
+        return {'sha': sha, 'url': self.url(f"/repos/{repo.owner}/{repo.name}/git/trees/{sha}"),
+                'tree': entries, 'truncated': False}
+
+
+def make_server(github, port=0):
+    handler = type('FakeGitHubHandler', (Handler,), {'github': github})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(**options):
+    """Start a fake server on a free local port, returning (server, github, base_url)"""
+    github = FakeGitHub(**options)
+    server = make_server(github)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, github, f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the fake GitHub API server")
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds to wait per request")
+    parser.add_argument('--rate-limit', type=int, default=None, help="requests allowed per window")
+    parser.add_argument('--rate-window', type=float, default=60.0, help="rate-limit window in seconds")
+    parser.add_argument('--max-blob-size', type=int, default=None, help="largest blob accepted, in bytes")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with a 502")
+    parser.add_argument('--max-concurrent', type=int, default=None,
+                        help="requests in flight before the secondary rate limit kicks in")
+    args = parser.parse_args()
+
+    github = FakeGitHub(latency=args.latency, rate_limit=args.rate_limit, rate_window=args.rate_window,
+                        max_blob_size=args.max_blob_size, error_rate=args.error_rate,
+                        max_concurrent=args.max_concurrent)
+    server = make_server(github, args.port)
+    print(f"http://127.0.0.1:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""GitSwift upload engine
+
+Pure-Python helpers that push local project directories to GitHub. The
+GUI in "GITHUB - Upload & Patent.py" builds on these, but nothing in this
+package imports Qt.
+
+Names are imported from their modules on first use, so importing the
+package (or a light module such as gitswift.tokens) doesn't pay for
+PyGithub and requests until they are needed.
+"""
+
+import importlib
+
+# Public name -> module that defines it
+_EXPORTS = {
+    'Account': 'sync',
+    'BatchSync': 'batch',
+    'BulkUploader': 'bulk',
+    'Cancelled': 'errors',
+    'ChangeSet': 'sync',
+    'DEFAULT_WORKERS': 'client',
+    'FileIndex': 'index',
+    'FileList': 'index',
+    'IgnoreRules': 'scan',
+    'MAX_WORKERS': 'client',
+    'Manifest': 'manifest',
+    'Plan': 'plan',
+    'Progress': 'progress',
+    'RateLimiter': 'ratelimit',
+    'RepoSync': 'sync',
+    'StalePlan': 'plan',
+    'collect_files': 'scan',
+    'connect': 'client',
+    'diff_files': 'diff',
+    'fetch_remote_tree': 'diff',
+    'git_blob_sha': 'hashing',
+    'hash_file': 'hashing',
+    'hash_files': 'hashing',
+    'load_batch': 'batch',
+    'remote_head': 'diff',
+    'validate_repo_name': 'sync',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    # Cache it so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,179 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .client import DEFAULT_WORKERS
+from .errors import Cancelled, check_cancelled
+from .progress import Progress
+from .ratelimit import RateLimiter
+from .sync import RepoSync, _ignore, validate_repo_name
+
+# Repositories synced at the same time
+DEFAULT_REPOS_AT_ONCE = 4
+
+VISIBILITIES = ('public', 'private')
+
+
+class BatchEntry:
+    """One project directory and the repository it is pushed to"""
+
+    def __init__(self, directory, repo, branch=None, private=False, description=''):
+        self.directory = directory
+        self.repo = repo
+        self.branch = branch
+        self.private = private
+        self.description = description
+
+
+class BatchResult:
+    """What syncing one BatchEntry did, error being None when it worked"""
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.full_name = None
+        self.created = False
+        self.files = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.commit = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            'directory': self.entry.directory,
+            'repository': self.full_name or self.entry.repo,
+            'created': self.created,
+            'files': self.files,
+            'bytes': self.bytes,
+            'seconds': round(self.seconds, 3),
+            'commit': self.commit,
+            'error': self.error,
+        }
+
+
+def load_batch(path):
+    """Read a batch file, a JSON list of entries, returning BatchEntry objects.
+
+        [
+          {"directory": "projects/site", "repo": "site", "branch": "main", "visibility": "private"},
+          {"directory": "projects/tools"}
+        ]
+
+    Only "directory" is required. It is relative to the batch file, repo
+    defaults to the directory name, branch to the repository's default
+    branch and visibility (of repositories that get created) to public.
+    A repository may only be listed again for another, named branch, so no
+    two entries push to the same ref at once. Raises ValueError for
+    anything malformed.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError("A batch file must hold a JSON list of entries")
+
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    # {repo name: branches of its entries so far, None for the default branch}
+    branches = {}
+    for number, item in enumerate(data, 1):
+        if not isinstance(item, dict) or not item.get('directory'):
+            raise ValueError(f"Entry {number} has no directory")
+        directory = os.path.join(base, os.path.expanduser(item['directory']))
+        is_valid, repo = validate_repo_name(item.get('repo') or os.path.basename(os.path.normpath(directory)))
+        if not is_valid:
+            raise ValueError(f"Entry {number}: {repo}")
+        visibility = item.get('visibility', 'public')
+        if visibility not in VISIBILITIES:
+            raise ValueError(f"Entry {number}: visibility must be one of {', '.join(VISIBILITIES)}")
+        # Which branch is the default isn't known offline, so it clashes with any other entry
+        branch = item.get('branch')
+        listed = branches.setdefault(repo.lower(), set())
+        if listed and (branch is None or None in listed or branch in listed):
+            raise ValueError(f"Entry {number}: {repo} is already listed for what may be the same branch; "
+                             f"name a different branch in each entry")
+        listed.add(branch)
+        entries.append(BatchEntry(directory, repo, branch=item.get('branch'), private=visibility == 'private',
+                                  description=item.get('description', '')))
+    return entries
+
+
+class BatchSync:
+    """Push many project directories to their repositories at once.
+
+    Up to repos_at_once repositories are synced concurrently, but all of
+    them share one pool of workers blob upload threads and one
+    RateLimiter, so the batch as a whole stays within the same request
+    budget as a single sync. Repositories that don't exist yet are
+    created. A failing repository is reported in its BatchResult and
+    doesn't stop the others.
+
+    listener, if given, receives every Progress event with a "repo" key
+    added.
+    """
+
+    def __init__(self, account, entries, workers=DEFAULT_WORKERS, repos_at_once=DEFAULT_REPOS_AT_ONCE, log=_ignore,
+                 cancelled=None, listener=None, **sync_options):
+        self.account = account
+        self.entries = entries
+        self.workers = workers
+        self.repos_at_once = max(1, repos_at_once)
+        self.log = log
+        self.cancelled = cancelled
+        self.listener = listener
+        self.sync_options = sync_options
+        self.limiter = RateLimiter(concurrency=workers)
+
+    def sync_one(self, entry, executor):
+        result = BatchResult(entry)
+        start = time.perf_counter()
+
+        def log(message):
+            self.log(f"[{entry.repo}] {message}")
+
+        def report(event):
+            if event['event'] == 'done':
+                result.files += event['files_done']
+                result.bytes += event['bytes_sent']
+            if self.listener is not None:
+                self.listener({**event, 'repo': entry.repo})
+
+        try:
+            check_cancelled(self.cancelled)
+            if not os.path.isdir(entry.directory):
+                raise ValueError(f"Not a directory: {entry.directory}")
+            repo = self.account.find_repository(entry.repo)
+            if repo is None:
+                log(f"Creating {'private' if entry.private else 'public'} repository...")
+                repo = self.account.create_repository(entry.repo, description=entry.description,
+                                                      private=entry.private)
+                result.created = True
+            result.full_name = repo.full_name
+            sync = RepoSync(repo, entry.directory, branch=entry.branch, log=log, cancelled=self.cancelled,
+                            workers=self.workers, progress=Progress(report), limiter=self.limiter,
+                            executor=executor, **self.sync_options)
+            changes, commit = sync.push()
+            result.commit = commit.sha if commit else None
+        except Cancelled:
+            raise
+        except Exception as e:
+            data = getattr(e, 'data', None)
+            result.error = data.get('message', str(e)) if isinstance(data, dict) else str(e)
+            log(f"Error: {result.error}")
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def run(self):
+        """Sync every entry, returning BatchResults in the order of the entries"""
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='gitswift-upload') as uploads, \
+                ThreadPoolExecutor(max_workers=self.repos_at_once, thread_name_prefix='gitswift-repo') as repos:
+            futures = {repos.submit(self.sync_one, entry, uploads): index for index, entry in enumerate(self.entries)}
+            try:
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        return [results[index] for index in range(len(self.entries))]
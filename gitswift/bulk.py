@@ -0,0 +1,208 @@
+import base64
+import contextlib
+import functools
+import operator
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from github import InputGitTreeElement
+
+from .client import DEFAULT_WORKERS
+from .errors import check_cancelled
+from .journal import file_stamp
+from .ratelimit import RateLimiter
+from .tracing import span, traced
+from .transport import BlobStreamer
+
+# Git tree entry modes
+FILE_MODE = '100644'
+EXECUTABLE_MODE = '100755'
+
+# Files from this size up are streamed instead of being encoded in memory
+STREAM_THRESHOLD = 1024 * 1024
+
+
+def file_mode(file_path):
+    """Git mode for a local file, keeping the executable bit where the OS has one"""
+    if os.name != 'nt' and os.access(file_path, os.X_OK):
+        return EXECUTABLE_MODE
+    return FILE_MODE
+
+
+class BulkUploader:
+    """Push a batch of files to a repository as one commit.
+
+    Instead of one Contents API commit per file, every file becomes a blob,
+    the blobs are stitched into a single tree on top of the branch head and
+    the branch ref is moved to one new commit. Blobs are sent by up to
+    workers threads at once, paced by a RateLimiter, which also retries
+    failed requests and sends fewer at once while GitHub pushes back. Files of
+    stream_threshold bytes and more are streamed from disk in chunks.
+    With a Journal, blobs are recorded as they land and blobs an earlier,
+    interrupted run uploaded are reused. With an LfsStore, the files it
+    wants are sent to Git LFS and committed as pointer files. A Progress
+    is kept up to date with the files and bytes sent. Given an executor,
+    blobs are sent on its threads instead of a pool of our own, so several
+    uploaders can share one budget of requests in flight.
+    """
+
+    def __init__(self, repo, branch=None, log=None, cancelled=None, workers=DEFAULT_WORKERS, limiter=None,
+                 stream_threshold=STREAM_THRESHOLD, journal=None, lfs=None, progress=None, executor=None):
+        self.repo = repo
+        self.branch = branch or repo.default_branch
+        self.log = log or (lambda message: None)
+        self.cancelled = cancelled
+        self.workers = max(1, workers)
+        self.limiter = limiter or RateLimiter(concurrency=self.workers)
+        self.stream_threshold = stream_threshold
+        self.journal = journal
+        self.lfs = lfs
+        self.progress = progress
+        self.executor = executor
+        # Paths whose blob the last create_blobs() took from the journal
+        self.reused = []
+        self._streamer = None
+        self._streamer_lock = threading.Lock()
+
+    @property
+    def streamer(self):
+        with self._streamer_lock:
+            if self._streamer is None:
+                self._streamer = BlobStreamer(self.repo, pool_size=self.workers)
+            return self._streamer
+
+    def create_blob(self, file_path, on_read=None):
+        """Upload one file as a git blob and return its SHA.
+
+        on_read, if given, is called with the size of every chunk of a
+        streamed or LFS file as it is sent.
+        """
+        check_cancelled(self.cancelled)
+        if self.lfs is not None and self.lfs.wants(file_path):
+            # The content goes to LFS storage, the tree gets a small pointer blob
+            pointer = self.limiter.call(lambda: self.lfs.upload(file_path, on_read), self.cancelled)
+            content = base64.b64encode(pointer).decode('ascii')
+        elif os.path.getsize(file_path) >= self.stream_threshold:
+            content = None
+        else:
+            with span('read', 'upload'), open(file_path, 'rb') as f:
+                content = base64.b64encode(f.read()).decode('ascii')
+
+        def send():
+            if content is None:
+                return self.streamer.create_blob(file_path, on_read)
+            blob = self.repo.create_git_blob(content, 'base64')
+            return blob.sha, blob.raw_headers
+
+        # The limiter reads the rate-limit headers out of send()'s result itself
+        sha, _ = self.limiter.call(send, self.cancelled, headers=operator.itemgetter(1))
+        return sha
+
+    def send_file(self, relative_path, file_path):
+        """create_blob() for one file, reporting it to the Progress"""
+        with span('blob', 'upload', path=relative_path):
+            if self.progress is None:
+                return self.create_blob(file_path)
+            self.progress.file_started(relative_path, file_path)
+            try:
+                sha = self.create_blob(file_path, functools.partial(self.progress.advance, relative_path))
+            except BaseException:
+                self.progress.file_failed(relative_path)
+                raise
+            self.progress.file_done(relative_path)
+            return sha
+
+    @traced('upload')
+    def create_blobs(self, files):
+        """Upload (relative_path, file_path) pairs as blobs in parallel, returning {relative_path: sha}"""
+        shas = {}
+        self.reused = []
+        if self.journal is not None:
+            # Stat before uploading, so a file changed mid-upload is sent again next time
+            stamps = {relative_path: file_stamp(file_path) for relative_path, file_path in files}
+            if self.lfs is not None:
+                for relative_path, file_path in files:
+                    if self.lfs.wants(file_path, stamps[relative_path][0]):
+                        stamps[relative_path].append('lfs')
+            pending = []
+            for relative_path, file_path in files:
+                sha = self.journal.lookup(relative_path, stamps[relative_path])
+                if sha:
+                    shas[relative_path] = sha
+                    self.reused.append(relative_path)
+                else:
+                    pending.append((relative_path, file_path))
+            if self.reused:
+                self.log(f"Resuming: {len(self.reused)} file(s) were already uploaded")
+            files = pending
+            if files:
+                self.journal.begin(len(files))
+
+        if self.progress is not None:
+            self.progress.start(files)
+        with contextlib.ExitStack() as stack:
+            pool = self.executor or stack.enter_context(
+                ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='gitswift-upload'))
+            futures = {pool.submit(self.send_file, relative_path, file_path): relative_path
+                       for relative_path, file_path in files}
+            try:
+                for future in as_completed(futures):
+                    relative_path = futures[future]
+                    shas[relative_path] = future.result()
+                    if self.journal is not None:
+                        self.journal.record_blob(relative_path, stamps[relative_path], shas[relative_path])
+                    self.log(f"Uploaded: {relative_path}")
+            except BaseException:
+                # Don't start any more uploads once one has failed or the run was cancelled
+                for future in futures:
+                    future.cancel()
+                raise
+        if self.progress is not None:
+            self.progress.finish()
+        return shas
+
+    def upload(self, files, message):
+        """Upload (relative_path, file_path) pairs and commit them in one go.
+
+        Returns the new commit, or None when there was nothing to commit.
+        Cancelling stops before the commit, so the branch is left untouched.
+        """
+        if not files:
+            return None
+
+        shas = self.create_blobs(files)
+        check_cancelled(self.cancelled)
+        return self.commit_files(files, shas, message)
+
+    @traced('commit')
+    def commit_files(self, files, shas, message, deleted=()):
+        """Commit uploaded blobs, {relative_path: sha}, on top of the branch head.
+
+        The paths in deleted are removed in the same commit.
+        """
+        missing = [relative_path for relative_path, file_path in files if relative_path not in shas]
+        if missing:
+            raise ValueError(f"{len(missing)} file(s) have no uploaded blob, first: {missing[0]}")
+
+        ref = self.limiter.call(lambda: self.repo.get_git_ref(f"heads/{self.branch}"), self.cancelled)
+        parent = self.limiter.call(lambda: self.repo.get_git_commit(ref.object.sha), self.cancelled)
+        elements = [InputGitTreeElement(relative_path, file_mode(file_path), 'blob', sha=shas[relative_path])
+                    for relative_path, file_path in files]
+        # A null SHA removes the path from the base tree
+        elements += [InputGitTreeElement(relative_path, FILE_MODE, 'blob', sha=None) for relative_path in deleted]
+        commit = self.commit(ref, parent, elements, message)
+        if self.journal is not None:
+            self.journal.record_commit(commit.sha)
+            self.journal.discard()
+        return commit
+
+    def commit(self, ref, parent, elements, message):
+        """Create a tree on top of parent, commit it and move ref to the new commit"""
+        # Each step is safe to repeat: trees and commits are addressed by content and
+        # moving the ref to the same commit twice changes nothing
+        tree = self.limiter.call(lambda: self.repo.create_git_tree(elements, base_tree=parent.tree))
+        commit = self.limiter.call(lambda: self.repo.create_git_commit(message, tree, [parent]))
+        self.limiter.call(lambda: ref.edit(commit.sha))
+        self.log(f"Committed {len(elements)} file(s) to {self.branch}: {commit.sha[:7]}")
+        return commit
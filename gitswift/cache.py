@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Kept next to the saved tokens in ~/.github_tokens.json
+HTTP_CACHE_DIR = Path.home() / '.github_http_cache'
+
+# Bigger responses (huge trees) are fetched in full every time
+MAX_CACHED_BODY = 8 * 1024 * 1024
+
+# Entries not used for this long are deleted by prune()
+MAX_AGE = 30 * 24 * 3600
+
+# Describe the body as sent, not the decoded body the cache keeps
+BODY_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+class ResponseCache:
+    """On-disk cache of GET responses, revalidated with conditional requests.
+
+    Every cached response is still checked with the server, sending its
+    ETag as If-None-Match (or its Last-Modified as If-Modified-Since), so
+    nothing stale is ever returned. When the server answers 304 Not
+    Modified the cached body is replayed as a 200 carrying the fresh
+    headers. GitHub doesn't count those 304s against the rate limit.
+
+    Entries are keyed on URL, Authorization and Accept, so tokens never
+    see each other's responses. The token itself is only stored hashed.
+    """
+
+    def __init__(self, directory=HTTP_CACHE_DIR, max_body=MAX_CACHED_BODY):
+        self.directory = Path(directory)
+        self.max_body = max_body
+
+    def path(self, request):
+        key = '\0'.join((request.url, request.headers.get('Authorization', ''), request.headers.get('Accept', '')))
+        return self.directory / hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def prepare(self, request):
+        """Make a GET conditional if it has a cached response, returning (path, entry) or None"""
+        # Callers making their own conditional requests handle the 304 themselves
+        if request.method != 'GET' or 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers:
+            return None
+        path = self.path(request)
+        entry = self._read(path)
+        if entry is not None:
+            meta, _ = entry
+            if meta.get('etag'):
+                request.headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                request.headers['If-Modified-Since'] = meta['last_modified']
+        return path, entry
+
+    def complete(self, prepared, response, stream=False):
+        """Response to hand back for a request prepare() returned prepared for"""
+        if prepared is None:
+            return response
+        path, entry = prepared
+        if response.status_code == 304 and entry is not None:
+            return self._replay(path, entry, response)
+        if response.status_code == 200 and not stream:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if (etag or last_modified) and len(response.content) <= self.max_body:
+                self._write(path, {
+                    'url': response.url,
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'headers': {name: value for name, value in response.headers.items()
+                                if name.lower() not in BODY_HEADERS},
+                }, response.content)
+        return response
+
+    def _replay(self, path, entry, not_modified):
+        meta, body = entry
+        # Reading the (empty) body hands the connection back to the pool
+        not_modified.content
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        # Rate-limit headers and the like come from the 304
+        response.headers.update({name: value for name, value in not_modified.headers.items()
+                                 if name.lower() not in BODY_HEADERS})
+        response._content = body
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = not_modified.url
+        response.request = not_modified.request
+        response.connection = not_modified.connection
+        response.elapsed = not_modified.elapsed
+        try:
+            # Keeps recently used entries out of prune()
+            os.utime(path)
+        except OSError:
+            pass
+        return response
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path, meta, body):
+        """One JSON line of metadata followed by the body, replaced atomically"""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(json.dumps(meta).encode('utf-8') + b'\n')
+                    f.write(body)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        except OSError as e:
+            print(f"Error caching {meta['url']}: {e}")
+
+    def prune(self, max_age=MAX_AGE):
+        """Delete entries that haven't been used for max_age seconds"""
+        cutoff = time.time() - max_age
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,399 @@
+"""Headless GitSwift for scripts, cron jobs and CI
+
+    python -m gitswift upload PROJECT_DIR [--repo NAME] [--private] [--description TEXT]
+    python -m gitswift update PROJECT_DIR [--repo NAME] [--plan PLAN_FILE]
+    python -m gitswift diff PROJECT_DIR [--repo NAME]
+    python -m gitswift plan PROJECT_DIR [--repo NAME] [--out PLAN_FILE]
+    python -m gitswift watch PROJECT_DIR [--repo NAME] [--debounce SECONDS] [--poll]
+    python -m gitswift batch BATCH_FILE [--repos N]
+
+The token comes from --token (a saved token name or a raw token), then
+$GITHUB_TOKEN, then the most recently saved token in ~/.github_tokens.json.
+Progress goes to stderr; stdout carries only the result, as JSON with
+--json. --timing adds a summary of the HTTP requests made and of the time
+each phase took to stderr, and --events FILE appends upload progress to
+FILE as JSON lines. --trace FILE saves a Chrome trace of every phase and
+request, and --profile FILE the command's cProfile stats.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from github import GithubException
+
+from .batch import DEFAULT_REPOS_AT_ONCE, BatchSync, load_batch
+from .client import DEFAULT_BASE_URL, DEFAULT_WORKERS, MAX_WORKERS
+from .errors import Cancelled
+from .http import STATS, describe
+from .lfs import LFS_THRESHOLD
+from .plan import Plan, StalePlan
+from .progress import EventLog, Progress, describe as describe_progress, format_bytes, format_duration
+from .sync import Account, RepoSync, validate_repo_name
+from .tokens import load_tokens, resolve_token
+from .tracing import TRACER, describe as describe_phases, profiling, span
+from .watch import DEBOUNCE, watch
+
+# Exit codes
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_AUTH = 3
+EXIT_NOT_FOUND = 4
+EXIT_EXISTS = 5
+EXIT_PARTIAL = 6
+EXIT_STALE = 7
+EXIT_INTERRUPTED = 130
+
+# Seconds between progress lines on stderr
+STATUS_INTERVAL = 2.0
+
+
+class CommandError(Exception):
+    """A failure reported to the user with a specific exit code"""
+
+    def __init__(self, message, exit_code=EXIT_ERROR):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+def authenticate(args, log):
+    try:
+        tokens = load_tokens()
+    except Exception as e:
+        raise CommandError(f"Error loading tokens: {e}", EXIT_AUTH)
+    token = resolve_token(args.token or os.environ.get('GITHUB_TOKEN'), tokens)
+    if not token:
+        raise CommandError("No GitHub token. Pass --token, set GITHUB_TOKEN or save a token in the GUI.", EXIT_AUTH)
+
+    with span('authenticate'):
+        account = Account(token, pool_size=args.workers, base_url=args.base_url, http2=args.http2,
+                          cache=not args.no_cache)
+    log(f"Authenticated as {account.login}")
+    return account
+
+
+def find_repository(account, args):
+    """Return (repo_name, repo or None) for the repository the command targets"""
+    if not os.path.isdir(args.directory):
+        raise CommandError(f"Not a directory: {args.directory}", EXIT_USAGE)
+    is_valid, result = validate_repo_name(args.repo or os.path.basename(os.path.normpath(args.directory)))
+    if not is_valid:
+        raise CommandError(result, EXIT_USAGE)
+    return result, account.find_repository(result)
+
+
+def require_repository(account, args):
+    repo_name, repo = find_repository(account, args)
+    if repo is None:
+        raise CommandError(f"No repository named '{repo_name}' was found.", EXIT_NOT_FOUND)
+    return repo
+
+
+def progress_listener(args, log):
+    """Progress listener logging a status line every few seconds and writing --events"""
+    events = EventLog(args.events) if args.events else None
+    # {repo: elapsed seconds of the last status line}, repo being None outside batches
+    last_status = {}
+
+    def listener(event):
+        if events is not None:
+            events(event)
+        repo = event.get('repo')
+        if event['event'] == 'done' or (
+                event['event'] == 'progress' and event['elapsed'] - last_status.get(repo, 0.0) >= STATUS_INTERVAL):
+            last_status[repo] = event['elapsed']
+            log(f"[{repo}] {describe_progress(event)}" if repo else describe_progress(event))
+
+    return listener
+
+
+def sync_options(args):
+    """RepoSync keyword arguments shared by every command"""
+    mb = 1024 * 1024
+    return {
+        'workers': args.workers,
+        'lfs_threshold': None if args.no_lfs else int(args.lfs_threshold * mb),
+        'lfs_binary_threshold': None if args.no_lfs or args.lfs_binary is None else int(args.lfs_binary * mb),
+    }
+
+
+def cmd_upload(args, log):
+    account = authenticate(args, log)
+    repo_name, repo = find_repository(account, args)
+    if repo is not None:
+        raise CommandError(f"Repository '{repo_name}' already exists. Use 'update' to push changes to it.",
+                           EXIT_EXISTS)
+
+    log(f"Creating {'private' if args.private else 'public'} repository...")
+    repo = account.create_repository(repo_name, description=args.description, private=args.private)
+    log(f"Repository created: {repo.html_url}")
+    files, commit = RepoSync(repo, args.directory, log=log, progress=Progress(progress_listener(args, log)),
+                           **sync_options(args)).upload_all()
+    return {
+        'repository': repo.full_name,
+        'url': repo.html_url,
+        'files': len(files),
+        'commit': commit.sha if commit else None,
+    }
+
+
+def cmd_update(args, log):
+    plan = None
+    if args.plan:
+        try:
+            plan = Plan.load(args.plan)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Can't read plan {args.plan}: {e}", EXIT_USAGE)
+        if plan.directory != os.path.abspath(args.directory):
+            raise CommandError(f"The plan is for {plan.directory}, not {os.path.abspath(args.directory)}", EXIT_USAGE)
+    repo = require_repository(authenticate(args, log), args)
+    log(f"Updating repository: {repo.full_name}")
+    sync = RepoSync(repo, args.directory, log=log, progress=Progress(progress_listener(args, log)),
+                    **sync_options(args))
+    if plan is None:
+        changes, commit = sync.push()
+    else:
+        try:
+            changes, commit = sync.apply(plan)
+        except StalePlan as e:
+            raise CommandError(str(e), EXIT_STALE)
+        except ValueError as e:
+            raise CommandError(str(e), EXIT_USAGE)
+    return {
+        'repository': repo.full_name,
+        'url': repo.html_url,
+        'added': [relative_path for relative_path, file_path in changes.added],
+        'modified': [relative_path for relative_path, file_path in changes.modified],
+        'deleted': changes.deleted,
+        'renamed': changes.renamed,
+        'commit': commit.sha if commit else None,
+    }
+
+
+def cmd_diff(args, log):
+    repo = require_repository(authenticate(args, log), args)
+    # The manifest skips hashing unchanged files; only push() ever writes it
+    sync = RepoSync(repo, args.directory, log=log, **sync_options(args))
+    changes = sync.diff(sync.scan())
+    return {
+        'repository': repo.full_name,
+        'head': changes.head,
+        'added': [relative_path for relative_path, file_path in changes.added],
+        'modified': [relative_path for relative_path, file_path in changes.modified],
+        'deleted': changes.deleted,
+        'renamed': changes.renamed,
+    }
+
+
+def cmd_plan(args, log):
+    repo = require_repository(authenticate(args, log), args)
+    # Nothing is written, not even the manifest
+    plan = RepoSync(repo, args.directory, log=log, **sync_options(args)).plan()
+    if args.out:
+        plan.save(args.out)
+    return {**plan.to_dict(), 'out': args.out}
+
+
+def cmd_watch(args, log):
+    repo = require_repository(authenticate(args, log), args)
+    log(f"Updating repository: {repo.full_name}")
+    sync = RepoSync(repo, args.directory, log=log, progress=Progress(progress_listener(args, log)),
+                    **sync_options(args))
+    commits = []
+    files = set()
+
+    def pushed(changes, commit):
+        commits.append(commit.sha)
+        files.update(relative_path for relative_path, file_path in changes.files)
+        files.update(changes.deleted)
+
+    try:
+        watch(sync, debounce=args.debounce, polling=args.poll, on_push=pushed)
+    except KeyboardInterrupt:
+        # Ctrl-C is how watching ends
+        log("Stopped watching")
+    return {
+        'repository': repo.full_name,
+        'url': repo.html_url,
+        'commits': commits,
+        'files': sorted(files),
+    }
+
+
+def cmd_batch(args, log):
+    try:
+        entries = load_batch(args.file)
+    except (OSError, ValueError) as e:
+        raise CommandError(f"Can't read batch file {args.file}: {e}", EXIT_USAGE)
+    if args.repos < 1:
+        raise CommandError("--repos must be at least 1", EXIT_USAGE)
+    account = authenticate(args, log)
+    results = BatchSync(account, entries, repos_at_once=args.repos, log=log,
+                        listener=progress_listener(args, log), **sync_options(args)).run()
+    return {
+        'repositories': [result.to_dict() for result in results],
+        'failed': sum(1 for result in results if result.error),
+    }
+
+
+def print_batch(result):
+    """Table of what a batch did to every repository"""
+    rows = [('REPOSITORY', 'RESULT', 'FILES', 'SENT', 'TIME')]
+    for r in result['repositories']:
+        if r['error']:
+            status = 'failed'
+        elif r['created']:
+            status = 'created'
+        else:
+            status = 'updated' if r['commit'] else 'up to date'
+        rows.append((r['repository'], status, str(r['files']), format_bytes(r['bytes']) if r['bytes'] else '-',
+                     f"{r['seconds']:.1f}s"))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print(f"{row[0]:<{widths[0]}}  {row[1]:<{widths[1]}}  {row[2]:>{widths[2]}}  "
+              f"{row[3]:>{widths[3]}}  {row[4]:>{widths[4]}}")
+    for r in result['repositories']:
+        if r['error']:
+            print(f"{r['repository']}: {r['error']}")
+    total = len(result['repositories'])
+    print(f"{total - result['failed']} of {total} repositories synced")
+
+
+def print_result(command, result):
+    """Human-readable summary of a successful command"""
+    if command == 'batch':
+        print_batch(result)
+    elif command == 'watch':
+        print(f"{len(result['commits'])} commit(s) pushing {len(result['files'])} file(s) to {result['url']}")
+    elif command == 'upload':
+        print(f"Uploaded {result['files']} files to {result['url']}")
+    elif command == 'plan':
+        estimate = result['estimate']
+        renamed = f" ({len(result['renamed'])} renamed)" if result['renamed'] else ''
+        print(f"{sum(1 for entry in result['files'] if entry['status'] == 'added')} added, "
+              f"{sum(1 for entry in result['files'] if entry['status'] == 'modified')} modified, "
+              f"{len(result['deleted'])} deleted{renamed}")
+        print(f"{estimate['files']} file(s) to upload, {format_bytes(estimate['bytes'])}, "
+              f"about {estimate['requests']} request(s) and {format_duration(estimate['seconds'])}")
+        if result['out']:
+            print(f"Plan saved to {result['out']}; push it with: update {result['directory']} --plan {result['out']}")
+    elif command == 'diff':
+        for path in result['added']:
+            print(f"A  {path}")
+        for path in result['modified']:
+            print(f"M  {path}")
+        for path in result['deleted']:
+            print(f"D  {path}")
+        for old_path, new_path in result['renamed']:
+            print(f"R  {old_path} -> {new_path}")
+        print(f"{len(result['added'])} added, {len(result['modified'])} modified, {len(result['deleted'])} deleted")
+    elif result['commit']:
+        print(f"{len(result['added'])} added, {len(result['modified'])} modified, {len(result['deleted'])} deleted, "
+              f"commit {result['commit'][:7]}")
+    else:
+        print("Repository is already up to date.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='gitswift', description="Upload local projects to GitHub.")
+    parser.add_argument('--token', help="saved token name or personal access token")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"parallel blob uploads, 1-{MAX_WORKERS} (default {DEFAULT_WORKERS})")
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help="GitHub API URL")
+    parser.add_argument('--lfs-threshold', type=float, default=LFS_THRESHOLD / 1024 / 1024, metavar='MB',
+                        help="store files this big or bigger with Git LFS (default %(default)g)")
+    parser.add_argument('--lfs-binary', type=float, metavar='MB',
+                        help="also store binary files this big or bigger with Git LFS")
+    parser.add_argument('--no-lfs', action='store_true', help="never use Git LFS")
+    parser.add_argument('--http2', action='store_true', help="use HTTP/2 where possible (needs the h2 package)")
+    parser.add_argument('--no-cache', action='store_true', help="don't cache API responses in ~/.github_http_cache")
+    parser.add_argument('--timing', action='store_true', help="print HTTP request and connection timings")
+    parser.add_argument('--events', metavar='FILE', help="append upload progress events to FILE as JSON lines")
+    parser.add_argument('--trace', metavar='FILE', help="save a Chrome trace of every phase and request to FILE")
+    parser.add_argument('--profile', metavar='FILE', help="save cProfile stats of the command to FILE")
+    parser.add_argument('--json', action='store_true', help="print the result as JSON")
+    parser.add_argument('--quiet', action='store_true', help="don't print progress to stderr")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    upload = commands.add_parser('upload', help="create a repository and upload a project to it")
+    upload.add_argument('--private', action='store_true', help="create a private repository")
+    upload.add_argument('--description', default='', help="repository description")
+    upload.set_defaults(handler=cmd_upload)
+
+    update = commands.add_parser('update', help="push local changes to an existing repository")
+    update.add_argument('--plan', metavar='FILE', help="push exactly what a saved plan lists, without comparing again")
+    update.set_defaults(handler=cmd_update)
+
+    diff = commands.add_parser('diff', help="list files that differ from the repository, without writing")
+    diff.set_defaults(handler=cmd_diff)
+
+    plan = commands.add_parser('plan', help="work out what update would push and cost, without writing")
+    plan.add_argument('--out', metavar='FILE', help="save the plan, for update --plan")
+    plan.set_defaults(handler=cmd_plan)
+
+    watch_command = commands.add_parser('watch', help="push changes as they happen, until Ctrl-C")
+    watch_command.add_argument('--debounce', type=float, default=DEBOUNCE, metavar='SECONDS',
+                               help=f"push once files stopped changing for this long (default {DEBOUNCE:g})")
+    watch_command.add_argument('--poll', action='store_true',
+                               help="poll for changes instead of using OS notifications (watchdog)")
+    watch_command.set_defaults(handler=cmd_watch)
+
+    for command in (upload, update, diff, plan, watch_command):
+        command.add_argument('directory', help="project directory")
+        command.add_argument('--repo', help="repository name (default: the directory name)")
+
+    batch = commands.add_parser('batch', help="push many directories, listed in a JSON batch file, at once")
+    batch.add_argument('file', help="JSON list of {directory, repo, branch, visibility} entries")
+    batch.add_argument('--repos', type=int, default=DEFAULT_REPOS_AT_ONCE,
+                       help=f"repositories synced at the same time (default {DEFAULT_REPOS_AT_ONCE}); "
+                            "--workers uploads are shared between them")
+    batch.set_defaults(handler=cmd_batch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not 1 <= args.workers <= MAX_WORKERS:
+        print(f"gitswift: --workers must be between 1 and {MAX_WORKERS}", file=sys.stderr)
+        return EXIT_USAGE
+
+    def log(message):
+        if not args.quiet:
+            print(message, file=sys.stderr, flush=True)
+
+    if args.trace or args.timing:
+        TRACER.enable()
+    result = None
+    try:
+        with profiling(args.profile):
+            result = args.handler(args, log)
+        exit_code = EXIT_PARTIAL if result.get('failed') else EXIT_OK
+    except CommandError as e:
+        error, exit_code = str(e), e.exit_code
+    except GithubException as e:
+        error = e.data.get('message', str(e)) if isinstance(e.data, dict) else str(e)
+        exit_code = EXIT_AUTH if e.status == 401 else EXIT_ERROR
+    except (Cancelled, KeyboardInterrupt):
+        error, exit_code = "Interrupted", EXIT_INTERRUPTED
+    except Exception as e:
+        error, exit_code = f"An unexpected error occurred: {e}", EXIT_ERROR
+
+    if args.json:
+        output = {'command': args.command, 'ok': exit_code == EXIT_OK, 'exit_code': exit_code}
+        output.update(result if result is not None else {'error': error})
+        print(json.dumps(output, indent=2))
+    elif result is not None:
+        print_result(args.command, result)
+    else:
+        print(f"gitswift: {error}", file=sys.stderr)
+    if args.timing:
+        print(f"HTTP: {describe(STATS.totals())}", file=sys.stderr)
+        print(f"Phases: {describe_phases(TRACER.totals())}", file=sys.stderr)
+    if args.trace:
+        try:
+            TRACER.save(args.trace)
+        except OSError as e:
+            print(f"gitswift: can't save the trace: {e}", file=sys.stderr)
+    return exit_code
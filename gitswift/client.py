@@ -0,0 +1,32 @@
+# Same as github.Consts.DEFAULT_BASE_URL, repeated so that reading the
+# constants here doesn't import PyGithub
+DEFAULT_BASE_URL = 'https://api.github.com'
+
+# Upload parallelism
+DEFAULT_WORKERS = 4
+MAX_WORKERS = 32
+
+
+def connect(token, pool_size=DEFAULT_WORKERS, base_url=DEFAULT_BASE_URL, http2=False, cache=True):
+    """Create a Github client able to keep pool_size requests in flight.
+
+    PyGithub's own fixed delay between writes is switched off, pacing is
+    left to the RateLimiter, which follows the headers GitHub sends back.
+    Requests go through the process-wide keep-alive pool of gitswift.http,
+    over HTTP/2 when http2 is set and the h2 package is installed. With
+    cache, GET responses are kept on disk and revalidated with ETags.
+    """
+    from github import Auth, Github
+
+    from . import http
+
+    if http2:
+        http.enable_http2()
+    with http.installed(http.response_cache() if cache else None):
+        return Github(
+            auth=Auth.Token(token),
+            base_url=base_url,
+            pool_size=pool_size,
+            seconds_between_requests=None,
+            seconds_between_writes=None,
+        )
@@ -0,0 +1,126 @@
+import os
+from array import array
+
+from .errors import check_cancelled
+from .hashing import HASH_WORKERS, hash_file, hash_files
+from .index import FileIndex
+from .tracing import traced
+
+
+def remote_head(repo, branch=None):
+    """SHA of the commit at the head of branch"""
+    branch = branch or repo.default_branch
+    return repo.get_git_ref(f"heads/{branch}").object.sha
+
+
+def _get_tree(repo, tree_sha, recursive=False):
+    """The JSON of a tree, without making a PyGithub object of every entry"""
+    headers, data = repo.requester.requestJsonAndCheck(
+        'GET', f"{repo.url}/git/trees/{tree_sha}", parameters={'recursive': 1} if recursive else None)
+    return data
+
+
+def fetch_remote_tree(repo, branch=None, head=None):
+    """Return a FileIndex, {path: blob_sha}, of every file at the head of branch.
+
+    The whole tree comes back from one recursive request. GitHub truncates
+    very large trees, in which case the subtrees are listed one by one.
+    Pass head to skip looking up the branch again.
+    """
+    head = repo.get_git_commit(head or remote_head(repo, branch))
+    data = _get_tree(repo, head.tree.sha, recursive=True)
+    if not data['truncated']:
+        entries = [(entry['path'], -1, -1, entry['sha']) for entry in data['tree'] if entry['type'] == 'blob']
+    else:
+        entries = []
+        _walk_tree(repo, head.tree.sha, entries)
+    del data
+    return FileIndex.build(entries)
+
+
+def _walk_tree(repo, tree_sha, entries, prefix=''):
+    """List a tree without the recursive flag, one request per directory"""
+    for entry in _get_tree(repo, tree_sha)['tree']:
+        path = f"{prefix}{entry['path']}"
+        if entry['type'] == 'tree':
+            _walk_tree(repo, entry['sha'], entries, f"{path}/")
+        elif entry['type'] == 'blob':
+            entries.append((path, -1, -1, entry['sha']))
+
+
+@traced('hash')
+def diff_files(files, remote, cancelled=None, manifest=None, hasher=hash_file, workers=HASH_WORKERS):
+    """Split local (relative_path, file_path) pairs into added and modified lists.
+
+    Each local file is hashed the way git hashes blobs, so only files whose
+    SHA differs from the remote tree need to be transferred. Files are
+    hashed by workers threads at once, and the lists keep the order of
+    files. With a manifest every file goes through it, so unchanged files
+    aren't read and the hashes are ready to be recorded after the push.
+    hasher gives the blob SHA a file will have in the tree. remote is a
+    FileIndex or any {path: blob_sha} mapping; files in path order (as
+    collect_files() lists them) are matched with it in a single merge.
+    """
+    check_cancelled(cancelled)
+    remote = FileIndex.from_tree(remote)
+    # -1 for files the remote tree doesn't have
+    positions = array('q', (-1 if position is None else position
+                            for position in remote.positions(relative_path for relative_path, file_path in files)))
+    if manifest is not None:
+        # Unless the branch moved, the remote tree is the manifest's index and the positions are the same
+        local_shas = manifest.hash_files(
+            files, hasher, workers, cancelled,
+            positions=(None if position < 0 else position for position in positions) if remote is manifest.entries
+            else None)
+    else:
+        # New files are added whatever their content, so only the others are read
+        local_shas = [None] * len(files)
+        known = [index for index, position in enumerate(positions) if position >= 0]
+        for index, sha in zip(known, hash_files([files[index][1] for index in known], hasher, workers, cancelled)):
+            local_shas[index] = sha
+
+    added = []
+    modified = []
+    for (relative_path, file_path), position, local_sha in zip(files, positions, local_shas):
+        if position < 0:
+            added.append((relative_path, file_path))
+        elif remote.sha(position) != local_sha:
+            modified.append((relative_path, file_path))
+    return added, modified
+
+
+def deleted_files(base, remote, directory_path, paths=None):
+    """Paths of base that are gone from the project and should be removed from the branch.
+
+    base is what the last push recorded: a FileIndex whose entries with a
+    size are the files it took from the project (as Manifest.entries
+    holds them), or a {path: blob_sha} mapping of just those files. remote
+    is the tree at the branch head. This is a three-way comparison: a path
+    only counts as deleted while the branch still has the blob the last
+    push left there, so files changed or added on GitHub since are never
+    removed. Files that still exist but are ignored now are kept as well,
+    as git would. paths limits the check to those paths and the files
+    below them.
+    """
+    if not isinstance(base, FileIndex):
+        base = FileIndex.build((path, 0, 0, sha) for path, sha in base.items())
+    remote = FileIndex.from_tree(remote)
+    root = os.path.join(directory_path, '')
+    # When the branch hasn't moved the manifest is the remote tree, and every blob matches
+    unmoved = remote is base
+    if paths is None:
+        candidates = enumerate(base)
+        positions = range(len(base)) if unmoved else remote.positions(base)
+    else:
+        # Only the entries at or below paths are looked up, not every one
+        indexes = base.under(paths)
+        candidates = [(index, base.path(index)) for index in indexes]
+        positions = indexes if unmoved else [remote.find(path) for index, path in candidates]
+    deleted = []
+    for (index, path), position in zip(candidates, positions):
+        if position is None or base.sizes[index] < 0:
+            continue
+        if ((unmoved or remote.sha(position) == base.sha(index)) and
+                not os.path.lexists(root + path.replace('/', os.sep))):
+            deleted.append(path)
+    return deleted
@@ -0,0 +1,8 @@
+class Cancelled(Exception):
+    """Raised inside a sync when the caller asked it to stop"""
+
+
+def check_cancelled(cancelled):
+    """Raise Cancelled if the cancelled callback says so"""
+    if cancelled is not None and cancelled():
+        raise Cancelled()
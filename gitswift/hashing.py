@@ -0,0 +1,57 @@
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .errors import check_cancelled
+
+# Files are read in pieces of this size, so memory use doesn't grow with file size
+CHUNK_SIZE = 1024 * 1024
+
+# Files from this size up are mapped into memory and hashed without copying them into Python
+MMAP_THRESHOLD = 8 * 1024 * 1024
+
+# Threads hashing files at once. hashlib lets go of the GIL while it works, so threads use every core
+HASH_WORKERS = min(32, os.cpu_count() or 1)
+
+
+def git_blob_sha(content):
+    """SHA-1 git assigns to a blob holding content"""
+    header = f"blob {len(content)}\0".encode('ascii')
+    return hashlib.sha1(header + content).hexdigest()
+
+
+def feed(sha, f, size, chunk_size=CHUNK_SIZE):
+    """Hash the size bytes of the open binary file f into sha"""
+    if size >= MMAP_THRESHOLD:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                sha.update(view)
+            return
+        except (OSError, ValueError):
+            # Not every file can be mapped (some network and special files); read it instead
+            f.seek(0)
+    for chunk in iter(lambda: f.read(chunk_size), b''):
+        sha.update(chunk)
+
+
+def hash_file(file_path, chunk_size=CHUNK_SIZE):
+    """Git blob SHA of a local file, read chunk by chunk"""
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        sha = hashlib.sha1(f"blob {size}\0".encode('ascii'))
+        feed(sha, f, size, chunk_size)
+    return sha.hexdigest()
+
+
+def hash_files(file_paths, hasher=hash_file, workers=HASH_WORKERS, cancelled=None):
+    """Hash many files on a pool of threads, returning their SHAs in the order of file_paths"""
+    def work(file_path):
+        check_cancelled(cancelled)
+        return hasher(file_path)
+
+    if workers <= 1 or len(file_paths) < 2:
+        return [work(file_path) for file_path in file_paths]
+    with ThreadPoolExecutor(max_workers=min(workers, len(file_paths)), thread_name_prefix='gitswift-hash') as pool:
+        # map() hands results back in order and cancels the rest if one fails
+        return list(pool.map(work, file_paths))
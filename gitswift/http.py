@@ -0,0 +1,318 @@
+"""One pool of keep-alive HTTP connections for the whole process
+
+PyGithub, the blob streamer and the LFS client all send their requests
+through the same PooledAdapter, so a connection opened (and TLS handshake
+paid) by one of them is reused by the others. Every request is timed,
+separating connection setup from the request itself, into STATS (and
+into the trace as a span, when gitswift.tracing is on). Each PyGithub
+client keeps its own retry policy and, if connect() made it with
+cache=True, a disk cache of GET responses revalidated with ETags; both
+sit on a light adapter borrowing the shared pool.
+"""
+
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester
+from requests.adapters import DEFAULT_RETRIES, HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .cache import HTTP_CACHE_DIR, ResponseCache
+from .client import DEFAULT_WORKERS
+from .tracing import TRACER
+
+# Hosts kept in the pool at once: API, uploads, LFS and its storage
+POOL_HOSTS = 10
+
+# Probe idle pooled connections so NATs and proxies don't silently drop them between bursts
+KEEPALIVE_IDLE = 60
+KEEPALIVE_INTERVAL = 15
+
+RequestTiming = namedtuple('RequestTiming', 'method url status connections connect_seconds seconds bytes_sent')
+
+# Connection setup counted for the request running on this thread, and
+# whether its caller retries it
+_current = threading.local()
+
+
+@contextmanager
+def caller_retries():
+    """PyGithub requests made in the block aren't retried by the client's retry policy; the caller does it"""
+    previous = getattr(_current, 'caller_retries', False)
+    _current.caller_retries = True
+    try:
+        yield
+    finally:
+        _current.caller_retries = previous
+
+
+def socket_options():
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    for name, value in (('TCP_KEEPIDLE', KEEPALIVE_IDLE), ('TCP_KEEPINTVL', KEEPALIVE_INTERVAL)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+def _timed_pool(pool_class):
+    """Subclass of a urllib3 pool whose connections time their connect()"""
+    class TimedConnection(pool_class.ConnectionCls):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                super().connect()
+            finally:
+                timing = getattr(_current, 'timing', None)
+                if timing is not None:
+                    timing[0] += 1
+                    timing[1] += time.perf_counter() - start
+
+    return type(f"Timed{pool_class.__name__}", (pool_class,), {'ConnectionCls': TimedConnection})
+
+
+class RequestStats:
+    """Running totals of the requests sent through the shared pool"""
+
+    def __init__(self, keep=1000):
+        self.lock = threading.Lock()
+        # The most recent RequestTiming records
+        self.recent = deque(maxlen=keep)
+        self.requests = 0
+        self.connections = 0
+        self.connect_seconds = 0.0
+        self.seconds = 0.0
+        self.bytes_sent = 0
+        # Answered 304 Not Modified from the response cache
+        self.not_modified = 0
+
+    def record(self, timing):
+        with self.lock:
+            self.recent.append(timing)
+            self.requests += 1
+            self.connections += timing.connections
+            self.connect_seconds += timing.connect_seconds
+            self.seconds += timing.seconds
+            self.bytes_sent += timing.bytes_sent
+            if timing.status == 304:
+                self.not_modified += 1
+
+    def totals(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'connections': self.connections,
+                'connect_seconds': self.connect_seconds,
+                'seconds': self.seconds,
+                'bytes_sent': self.bytes_sent,
+                'not_modified': self.not_modified,
+            }
+
+    def since(self, before):
+        """Totals accumulated after an earlier totals() call"""
+        return {name: value - before[name] for name, value in self.totals().items()}
+
+
+def describe(totals):
+    """One line summary of a totals() dict"""
+    return (f"{totals['requests']} request(s) over {totals['connections']} new connection(s): "
+            f"{totals['connect_seconds']:.2f} s connecting, {totals['seconds']:.2f} s in requests, "
+            f"{totals['bytes_sent'] / 1024 / 1024:.1f} MB sent, {totals['not_modified']} not modified")
+
+
+STATS = RequestStats()
+
+
+class PooledAdapter(HTTPAdapter):
+    """Transport adapter that keeps up to pool_size connections per host alive and times every request.
+
+    Given pool, another PooledAdapter, it sends through that adapter's
+    connections instead of opening its own, with its own max_retries and
+    cache.
+    """
+
+    def __init__(self, pool_size=DEFAULT_WORKERS, stats=STATS, cache=None, max_retries=DEFAULT_RETRIES, pool=None):
+        self.pool_size = pool_size
+        self.stats = stats
+        self.cache = cache
+        self.pool = pool
+        super().__init__(pool_connections=POOL_HOSTS, pool_maxsize=pool_size, max_retries=max_retries)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self.pool is not None:
+            self.poolmanager = self.pool.poolmanager
+            return
+        super().init_poolmanager(connections, maxsize, block, socket_options=socket_options(), **pool_kwargs)
+        # Built now so they extend whatever connection classes urllib3 uses (HTTP/2 included)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _timed_pool(HTTPConnectionPool),
+            'https': _timed_pool(HTTPSConnectionPool),
+        }
+
+    def send(self, request, stream=False, **kwargs):
+        cache = self.cache
+        cached = cache.prepare(request) if cache is not None else None
+        timing = _current.timing = [0, 0.0]
+        start = time.perf_counter()
+        status = None
+        try:
+            response = super().send(request, stream=stream, **kwargs)
+            status = response.status_code
+            if cache is not None:
+                response = cache.complete(cached, response, stream)
+            return response
+        finally:
+            _current.timing = None
+            # Time to the response headers: upload, server time and any connection setup
+            seconds = time.perf_counter() - start
+            bytes_sent = int(request.headers.get('Content-Length') or 0)
+            self.stats.record(RequestTiming(request.method, request.url, status, timing[0], timing[1], seconds,
+                                            bytes_sent))
+            TRACER.record(f"{request.method} {urlsplit(request.url).path}", start, seconds, 'http',
+                          status=status, connections=timing[0], bytes_sent=bytes_sent)
+
+    def close(self):
+        # Shared by every session, so one session closing must not drop the pool
+        pass
+
+
+_adapter = None
+_adapter_lock = threading.Lock()
+# {directory: ResponseCache} opened so far
+_caches = {}
+
+
+def shared_adapter(pool_size=DEFAULT_WORKERS):
+    """The process-wide PooledAdapter, replaced by a bigger one when more connections are wanted"""
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None or _adapter.pool_size < pool_size:
+            _adapter = PooledAdapter(pool_size)
+        return _adapter
+
+
+def new_session(pool_size=DEFAULT_WORKERS, retry=None, cache=None):
+    """requests session sending through the shared pool.
+
+    retry is a urllib3 Retry (or a count) for failed requests, none by
+    default, and cache a ResponseCache for GET responses.
+    """
+    session = requests.Session()
+    adapter = shared_adapter(pool_size)
+    if retry is not None or cache is not None:
+        adapter = PooledAdapter(adapter.pool_size, cache=cache,
+                                max_retries=DEFAULT_RETRIES if retry is None else retry, pool=adapter)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def response_cache(directory=HTTP_CACHE_DIR):
+    """The ResponseCache in directory, opened (and pruned) once per process"""
+    directory = Path(directory)
+    with _adapter_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = ResponseCache(directory)
+            cache.prune()
+        return cache
+
+
+def enable_http2():
+    """Negotiate HTTP/2 on HTTPS connections opened from now on.
+
+    Uses urllib3's experimental HTTP/2 support, which needs urllib3 2.3 or
+    later and the h2 package, and then offers only h2 to servers. Returns
+    False, leaving HTTP/1.1 keep-alive in place, when those aren't there.
+    """
+    global _adapter
+    try:
+        import urllib3.http2
+        urllib3.http2.inject_into_urllib3()
+    except ImportError:
+        return False
+    with _adapter_lock:
+        # Pools built earlier still hold HTTP/1.1 connection classes
+        _adapter = None
+    return True
+
+
+class _PooledConnection:
+    """PyGithub connection object borrowing the shared pool.
+
+    PyGithub normally keeps one connection object, with its own session
+    and pool, per Requester, and fills in the request on that shared object
+    before sending it, which parallel uploads would race on. Injected, it
+    makes a fresh, cheap object for every request instead, all of them
+    sending through the same pool, with the client's retry policy and the
+    class's cache.
+    """
+
+    # ResponseCache of the clients whose Requester was built with this class
+    cache = None
+
+    def __init__(self, host, port=None, strict=False, timeout=None, retry=None, pool_size=None, **kwargs):
+        # The parent __init__ would build a session and pool of its own
+        self.port = port if port else self.default_port
+        self.host = host
+        self.timeout = timeout
+        self.verify = kwargs.get('verify', True)
+        if getattr(_current, 'caller_retries', False):
+            retry = None
+        self.session = new_session(pool_size or DEFAULT_WORKERS, retry, self.cache)
+        # Same as PyGithub: keeps requests from falling back to ~/.netrc
+        self.session.auth = Requester.noopAuth
+
+    def close(self):
+        pass
+
+
+class PooledHTTPSConnection(_PooledConnection, HTTPSRequestsConnectionClass):
+    protocol = 'https'
+    default_port = 443
+
+
+class PooledHTTPConnection(_PooledConnection, HTTPRequestsConnectionClass):
+    protocol = 'http'
+    default_port = 80
+
+
+# {cache: (http, https) connection classes}
+_connection_classes = {None: (PooledHTTPConnection, PooledHTTPSConnection)}
+_install_lock = threading.Lock()
+
+
+def connection_classes(cache=None):
+    """PyGithub (http, https) connection classes using the shared pool and caching GETs in cache"""
+    with _adapter_lock:
+        if cache not in _connection_classes:
+            _connection_classes[cache] = tuple(type(base.__name__, (base,), {'cache': cache})
+                                               for base in (PooledHTTPConnection, PooledHTTPSConnection))
+        return _connection_classes[cache]
+
+
+def install():
+    """Make every PyGithub client in this process use the shared pool"""
+    Requester.injectConnectionClasses(*connection_classes())
+
+
+@contextmanager
+def installed(cache=None):
+    """Clients created in the block use the shared pool and cache; any created later don't cache.
+
+    PyGithub picks the connection class when a client is created, so the
+    cache sticks to the clients made here.
+    """
+    with _install_lock:
+        Requester.injectConnectionClasses(*connection_classes(cache))
+        try:
+            yield
+        finally:
+            install()
@@ -0,0 +1,348 @@
+"""Compact file lists and path -> blob SHA indexes for very large trees
+
+A dict of path strings to [size, mtime_ns, sha] lists costs a few hundred
+bytes per file, which adds up to gigabytes for a tree of a million files.
+Here directories are interned once in a table, each entry keeps the
+number of its directory and its name in one shared UTF-8 bytearray, sizes
+and mtimes live in arrays and SHAs take 20 raw bytes each in one more
+bytearray, so a million files fit in tens of MB. Entries are kept in path
+order, so two of them are compared with one sorted merge rather than a
+lookup per path.
+"""
+
+import heapq
+import os
+from array import array
+from collections.abc import Mapping, Sequence
+
+# SHA of entries whose blob isn't known; no git object hashes to it
+NO_SHA = bytes(20)
+
+# Up to this many SHAs, blobs() searches for each rather than reading them all
+BLOB_SEARCHES = 32
+
+
+class _Paths:
+    """Paths stored as interned directory prefixes plus names in one bytearray"""
+
+    def __init__(self):
+        # Directory prefixes, ending in '/' ('' for the top)
+        self.dirs = ['']
+        self._dir_numbers = {'': 0}
+        self.dir_ids = array('I')
+        self.names = bytearray()
+        self.name_ends = array('Q')
+
+    def _add_path(self, path):
+        head, slash, name = path.rpartition('/')
+        prefix = head + slash
+        number = self._dir_numbers.get(prefix)
+        if number is None:
+            number = self._dir_numbers[prefix] = len(self.dirs)
+            self._add_dir(prefix)
+        self.dir_ids.append(number)
+        self.names += name.encode('utf-8')
+        self.name_ends.append(len(self.names))
+
+    def _add_dir(self, prefix):
+        self.dirs.append(prefix)
+
+    def _name(self, index):
+        start = self.name_ends[index - 1] if index else 0
+        return self.names[start:self.name_ends[index]].decode('utf-8')
+
+    def path(self, index):
+        return self.dirs[self.dir_ids[index]] + self._name(index)
+
+    def __len__(self):
+        return len(self.dir_ids)
+
+    def paths(self):
+        """Every path in order, decoded one after the other"""
+        dirs, dir_ids, names = self.dirs, self.dir_ids, self.names
+        start = 0
+        for index, end in enumerate(self.name_ends):
+            yield dirs[dir_ids[index]] + names[start:end].decode('utf-8')
+            start = end
+
+    @property
+    def nbytes(self):
+        """Bytes taken by the arrays (the directory table aside)"""
+        return len(self.names) + sum(data.itemsize * len(data) for data in (self.dir_ids, self.name_ends))
+
+
+class FileList(_Paths, Sequence):
+    """(relative_path, file_path) pairs of the files below one directory, stored compactly.
+
+    What collect_files() returns. It reads like a list of pairs, but only
+    the relative paths are stored; file paths are joined to the root
+    directory on the way out, the same way os.scandir() builds them.
+    Adding pairs with + merges them in path order, giving another FileList
+    when they are files of the same root, a plain list otherwise.
+    """
+
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+        # File system path of each directory in dirs, ending in a separator, so
+        # a file path is one concatenation rather than an os.path.join()
+        self._dir_paths = [os.path.join(root, '')]
+
+    def _add_dir(self, prefix):
+        super()._add_dir(prefix)
+        self._dir_paths.append(os.path.join(self.root, *prefix.split('/')))
+
+    def append(self, relative_path):
+        self._add_path(relative_path)
+
+    def file_path(self, relative_path):
+        """Where a relative path of this list is on disk"""
+        return os.path.join(self.root, *relative_path.split('/'))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('FileList index out of range')
+        name = self._name(index)
+        number = self.dir_ids[index]
+        return self.dirs[number] + name, self._dir_paths[number] + name
+
+    def __iter__(self):
+        dirs, dir_paths, dir_ids, names = self.dirs, self._dir_paths, self.dir_ids, self.names
+        start = 0
+        for index, end in enumerate(self.name_ends):
+            name = names[start:end].decode('utf-8')
+            number = dir_ids[index]
+            yield dirs[number] + name, dir_paths[number] + name
+            start = end
+
+    def __add__(self, other):
+        other = sorted(other)
+        merged = heapq.merge(self, other)
+        if any(file_path != self.file_path(relative_path) for relative_path, file_path in other):
+            return list(merged)
+        files = FileList(self.root)
+        for relative_path, file_path in merged:
+            files.append(relative_path)
+        return files
+
+    def __repr__(self):
+        return f"<FileList of {len(self)} files in {self.root}>"
+
+
+class FileIndex(_Paths, Mapping):
+    """Sorted, read-only {path: blob_sha} mapping that also keeps each file's size and mtime.
+
+    Built once from entries in path order with from_sorted() (or build(),
+    which sorts them first), then read by position: path(), sha(),
+    entry(). find() is a binary search and positions() matches many paths
+    in a single pass. A SHA of None (stored as NO_SHA) means unknown, and
+    sizes and mtimes of -1 that the file isn't a local one.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.sizes = array('q')
+        self.mtimes = array('q')
+        self.shas = bytearray()
+        self._last = None
+
+    def append(self, path, size=-1, mtime_ns=-1, sha=None):
+        """Add an entry after the last one, which must sort before it"""
+        if self._last is not None and path <= self._last:
+            raise ValueError(f"{path!r} doesn't sort after {self._last!r}")
+        self._last = path
+        self._add_path(path)
+        self.sizes.append(size)
+        self.mtimes.append(mtime_ns)
+        self.shas += bytes.fromhex(sha) if sha else NO_SHA
+
+    @classmethod
+    def from_sorted(cls, entries):
+        """Index of (path, size, mtime_ns, sha) entries that come in path order"""
+        index = cls()
+        for path, size, mtime_ns, sha in entries:
+            index.append(path, size, mtime_ns, sha)
+        return index
+
+    @classmethod
+    def build(cls, entries):
+        """Index of (path, size, mtime_ns, sha) entries in any order"""
+        return cls.from_sorted(sorted(entries, key=lambda entry: entry[0]))
+
+    @classmethod
+    def from_tree(cls, tree):
+        """Index of a {path: blob_sha} mapping, with no sizes or mtimes"""
+        if isinstance(tree, FileIndex):
+            return tree
+        return cls.build((path, -1, -1, sha) for path, sha in tree.items())
+
+    def sha(self, index):
+        raw = self.shas[index * 20:index * 20 + 20]
+        return None if raw == NO_SHA else raw.hex()
+
+    def entry(self, index):
+        """(path, size, mtime_ns, sha) at index"""
+        return self.path(index), self.sizes[index], self.mtimes[index], self.sha(index)
+
+    def entries(self):
+        """Every (path, size, mtime_ns, sha) in order"""
+        for index, path in enumerate(self.paths()):
+            yield path, self.sizes[index], self.mtimes[index], self.sha(index)
+
+    def _bisect(self, path):
+        """Position of the first entry that doesn't sort before path"""
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.path(middle) < path:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, path):
+        """Position of path, or None"""
+        index = self._bisect(path)
+        return index if index < len(self) and self.path(index) == path else None
+
+    def under(self, paths):
+        """Positions, in order, of the entries at paths and of those below them"""
+        found = set()
+        for path in paths:
+            index = self.find(path)
+            if index is not None:
+                found.add(index)
+            # What is below path sorts between path/ and path0, '0' coming right after '/'
+            found.update(range(self._bisect(f"{path}/"), self._bisect(f"{path}0")))
+        return sorted(found)
+
+    def positions(self, paths):
+        """Position of each of paths, or None, in one merge with the index.
+
+        Paths that come in sorted order are matched by walking the index
+        once; any that don't are looked up with a binary search.
+        """
+        ours = self.paths()
+        position = 0
+        current = next(ours, None)
+        previous = None
+        for path in paths:
+            if previous is not None and path < previous:
+                yield self.find(path)
+                continue
+            previous = path
+            while current is not None and current < path:
+                position += 1
+                current = next(ours, None)
+            yield position if current == path else None
+
+    def update(self, entries):
+        """Overwrite the size, mtime and SHA of (path, size, mtime_ns, sha) entries in place.
+
+        Returns the entries whose path the index doesn't have, for merged().
+        entries come in path order.
+        """
+        entries = list(entries)
+        paths = [entry[0] for entry in entries]
+        # A few paths are cheaper to look up one by one than to merge with every entry
+        located = self.positions(paths) if len(paths) * 16 > len(self) else map(self.find, paths)
+        missing = []
+        for (path, size, mtime_ns, sha), index in zip(entries, located):
+            if index is None:
+                missing.append((path, size, mtime_ns, sha))
+                continue
+            self.sizes[index] = size
+            self.mtimes[index] = mtime_ns
+            self.shas[index * 20:index * 20 + 20] = bytes.fromhex(sha) if sha else NO_SHA
+        return missing
+
+    def merged(self, added=(), removed=()):
+        """Copy of the index with added, (path, size, mtime_ns, sha) entries it lacks, and without removed.
+
+        The entries in between are copied over in runs, a slice of each
+        array at a time, so a few changes cost little more than a copy.
+        """
+        # (position, 0, entry) inserts entry before position, (position, 1, None) drops it
+        cuts = sorted([(self._bisect(entry[0]), 0, entry) for entry in added] +
+                      [(index, 1, None) for index in map(self.find, set(removed)) if index is not None],
+                      key=lambda cut: (cut[0], cut[1], cut[2] and cut[2][0]))
+        if not cuts:
+            return self
+        index = FileIndex()
+        index.dirs = list(self.dirs)
+        index._dir_numbers = dict(self._dir_numbers)
+        start = 0
+        for position, drop, entry in cuts:
+            index._copy_run(self, start, position)
+            if drop:
+                start = position + 1
+            else:
+                index.append(*entry)
+                start = position
+        index._copy_run(self, start, len(self))
+        return index
+
+    def _copy_run(self, other, start, end):
+        """Append other's entries start to end, which share this index's directory numbers"""
+        if start >= end:
+            return
+        self.dir_ids += other.dir_ids[start:end]
+        first = other.name_ends[start - 1] if start else 0
+        offset = len(self.names) - first
+        self.names += other.names[first:other.name_ends[end - 1]]
+        self.name_ends.extend([name_end + offset for name_end in other.name_ends[start:end]])
+        self.sizes += other.sizes[start:end]
+        self.mtimes += other.mtimes[start:end]
+        self.shas += other.shas[start * 20:end * 20]
+        self._last = other.path(end - 1)
+
+    def blobs(self, shas):
+        """Those of shas some entry has"""
+        wanted = {bytes.fromhex(sha) for sha in shas if sha}
+        if not wanted:
+            return set()
+        if len(wanted) <= BLOB_SEARCHES:
+            found = set()
+            for raw in wanted:
+                offset = self.shas.find(raw)
+                # A match across two SHAs doesn't count
+                while offset >= 0 and offset % 20:
+                    offset = self.shas.find(raw, offset + 1)
+                if offset >= 0:
+                    found.add(raw.hex())
+            return found
+        # One pass over the SHAs, 20 bytes at a time
+        data = bytes(self.shas)
+        return {raw.hex() for raw in wanted.intersection(data[offset:offset + 20]
+                                                         for offset in range(0, len(data), 20))}
+
+    def __getitem__(self, path):
+        index = self.find(path)
+        if index is None:
+            raise KeyError(path)
+        return self.sha(index)
+
+    def __contains__(self, path):
+        return self.find(path) is not None
+
+    def __iter__(self):
+        return self.paths()
+
+    def items(self):
+        for index, path in enumerate(self.paths()):
+            yield path, self.sha(index)
+
+    def values(self):
+        for index in range(len(self)):
+            yield self.sha(index)
+
+    @property
+    def nbytes(self):
+        return super().nbytes + len(self.shas) + self.sizes.itemsize * (len(self.sizes) + len(self.mtimes))
+
+    def __repr__(self):
+        return f"<FileIndex of {len(self)} files>"
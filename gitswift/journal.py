@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+
+from .manifest import MANIFEST_DIR, state_path
+
+
+def file_stamp(file_path):
+    """[size, mtime_ns] identifying the version of a file that was uploaded"""
+    st = os.stat(file_path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+class Journal:
+    """Write-ahead log of the blobs one push has uploaded so far.
+
+    Every blob is appended as a JSON line the moment GitHub has it, so a
+    push that dies halfway (network drop, sleep, crash, Cancel) can be
+    resumed: the next run reuses every blob whose file still has the same
+    size and mtime and only uploads the rest. Once the commit is made it is
+    recorded as well and the journal is removed. A journal ending in a
+    commit, or with a torn last line, is still read safely.
+
+        {"op": "begin", "files": 120}
+        {"op": "blob", "path": "src/app.py", "stamp": [size, mtime_ns], "sha": "..."}
+        {"op": "commit", "sha": "..."}
+
+    An LFS pointer blob has "lfs" appended to its stamp, so it is never
+    mistaken for a blob of the file's content or the other way round.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # {relative_path: (stamp, sha)} from earlier runs
+        self.blobs = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, user, repo, branch, project_path=None, directory=MANIFEST_DIR):
+        """Load the journal of an unfinished push from project_path to (user, repo, branch), if there is one"""
+        journal = cls(state_path(directory, user, repo, branch, '.journal', project_path))
+        try:
+            with open(journal.path, 'rb') as f:
+                lines = f.readlines()
+        except OSError:
+            return journal
+
+        valid = 0
+        for line in lines:
+            try:
+                # Every record ends in a newline, one without it is unfinished
+                record = json.loads(line) if line.endswith(b'\n') else None
+            except ValueError:
+                record = None
+            if record is None:
+                # A crash mid-write can only tear the last line. Cut it off
+                # so new records don't get appended to the fragment.
+                journal.truncate(valid)
+                break
+            valid += len(line)
+            if record.get('op') == 'blob':
+                journal.blobs[record['path']] = (record['stamp'], record['sha'])
+            elif record.get('op') == 'commit':
+                # That push went through, its blobs are part of the branch now
+                journal.blobs = {}
+        return journal
+
+    def truncate(self, size):
+        try:
+            os.truncate(self.path, size)
+        except OSError as e:
+            print(f"Error repairing journal {self.path}: {e}")
+
+    def lookup(self, relative_path, stamp):
+        """SHA of a blob already uploaded for this version of the file, or None"""
+        entry = self.blobs.get(relative_path)
+        if entry and entry[0] == stamp:
+            return entry[1]
+        return None
+
+    def _write(self, record, sync=False):
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(record) + '\n')
+            # Flushed per record so a killed process loses nothing; fsync at the milestones
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def begin(self, count):
+        """Note that count more blobs are about to be uploaded"""
+        self._write({'op': 'begin', 'files': count}, sync=True)
+
+    def record_blob(self, relative_path, stamp, sha):
+        self.blobs[relative_path] = (stamp, sha)
+        self._write({'op': 'blob', 'path': relative_path, 'stamp': stamp, 'sha': sha})
+
+    def record_commit(self, commit_sha):
+        self._write({'op': 'commit', 'sha': commit_sha}, sync=True)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def discard(self):
+        """Forget every recorded blob and delete the journal"""
+        self.close()
+        self.blobs = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing journal {self.path}: {e}")
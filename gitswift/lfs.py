@@ -0,0 +1,238 @@
+import hashlib
+import os
+import re
+import threading
+
+from github import GithubException
+
+from .client import DEFAULT_WORKERS
+from .hashing import CHUNK_SIZE, feed, git_blob_sha, hash_file
+from .http import new_session
+from .scan import _parse_line
+
+# GitHub refuses blobs over 100 MiB, so anything that size or bigger has to go through LFS
+LFS_THRESHOLD = 100 * 1024 * 1024
+
+# Like git, a file is binary when its first 8000 bytes contain a NUL
+BINARY_SNIFF_SIZE = 8000
+
+LFS_MEDIA_TYPE = 'application/vnd.git-lfs+json'
+
+# What git lfs track writes to .gitattributes
+LFS_ATTRIBUTES = 'filter=lfs diff=lfs merge=lfs -text'
+
+
+def lfs_pointer(oid, size):
+    """Contents of the pointer file git-lfs keeps in the tree in place of a large file"""
+    return f"version https://git-lfs.github.com/spec/v1\noid sha256:{oid}\nsize {size}\n".encode('ascii')
+
+
+def lfs_object_id(file_path, chunk_size=CHUNK_SIZE):
+    """(sha256 hex, size) that identify a file in LFS storage, read chunk by chunk"""
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        feed(sha, f, size, chunk_size)
+    return sha.hexdigest(), size
+
+
+def track_pattern(relative_path):
+    """.gitattributes pattern for exactly one path, escaped the way git lfs track does"""
+    escaped = re.sub(r'([*?\[\\])', r'\\\1', relative_path)
+    return '/' + escaped.replace(' ', '[[:space:]]')
+
+
+class LfsAttributes:
+    """The filter=lfs patterns of a .gitattributes file"""
+
+    def __init__(self, text=''):
+        self.text = text
+        self.patterns = set()
+        self.regexes = []
+        for line in text.splitlines():
+            fields = line.split()
+            if len(fields) < 2 or fields[0].startswith('#') or 'filter=lfs' not in fields[1:]:
+                continue
+            self.patterns.add(fields[0])
+            rule = _parse_line(fields[0])
+            if rule:
+                self.regexes.append(re.compile(rule[0] + r'\Z', re.DOTALL))
+
+    def tracks(self, relative_path):
+        return (track_pattern(relative_path) in self.patterns
+                or any(regex.match(relative_path) for regex in self.regexes))
+
+    def track(self, relative_paths):
+        """Text with a line added for every path not tracked yet"""
+        lines = [f"{track_pattern(path)} {LFS_ATTRIBUTES}\n" for path in relative_paths if not self.tracks(path)]
+        if not lines:
+            return self.text
+        text = self.text
+        if text and not text.endswith('\n'):
+            text += '\n'
+        return text + ''.join(lines)
+
+
+class ReportingReader:
+    """Read-only file wrapper calling on_read with the size of every read"""
+
+    def __init__(self, file, on_read):
+        self.file = file
+        self.on_read = on_read
+
+    def __len__(self):
+        # Lets requests send a Content-Length
+        return os.fstat(self.file.fileno()).st_size
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.on_read(len(data))
+        return data
+
+
+def is_binary(file_path):
+    with open(file_path, 'rb') as f:
+        return b'\0' in f.read(BINARY_SNIFF_SIZE)
+
+
+class LfsStore:
+    """Route large or binary files through the Git LFS batch API.
+
+    A file goes to LFS when it has threshold bytes or more, or, with a
+    binary_threshold, when it is binary and at least that big (None turns
+    either rule off). Its content is PUT to LFS storage straight from disk
+    and the tree gets the small pointer file instead, so hash_file() hashes
+    such files as their pointer for diffing against the remote tree.
+
+    url is the LFS server, by default the one GitHub runs next to the
+    repository's clone URL.
+    """
+
+    def __init__(self, repo, branch=None, threshold=LFS_THRESHOLD, binary_threshold=None, url=None,
+                 pool_size=DEFAULT_WORKERS, timeout=300):
+        self.repo = repo
+        self.branch = branch or repo.default_branch
+        self.threshold = threshold
+        self.binary_threshold = binary_threshold
+        self.url = url
+        self.pool_size = pool_size
+        self.timeout = timeout
+        # {file_path: ([size, mtime_ns], oid)} so no file is read twice for its sha256
+        self._objects = {}
+        # {file_path: ([size, mtime_ns], binary)} so no file is sniffed twice
+        self._binary = {}
+        self._lock = threading.Lock()
+        self._session = None
+        self._transfer_session = None
+
+    def wants(self, file_path, size=None):
+        """Whether file_path is stored in LFS; size, when known, saves looking it up"""
+        if size is None:
+            size = os.path.getsize(file_path)
+        if self.threshold is not None and size >= self.threshold:
+            return True
+        return self.binary_threshold is not None and size >= self.binary_threshold and self.is_binary(file_path)
+
+    def is_binary(self, file_path):
+        """is_binary(), sniffed once per version of the file"""
+        st = os.stat(file_path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        with self._lock:
+            cached = self._binary.get(file_path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        binary = is_binary(file_path)
+        with self._lock:
+            self._binary[file_path] = (stamp, binary)
+        return binary
+
+    def object_id(self, file_path):
+        """(oid, size) of a file, computed once per version of the file"""
+        st = os.stat(file_path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        with self._lock:
+            cached = self._objects.get(file_path)
+        if cached and cached[0] == stamp:
+            return cached[1], st.st_size
+        oid, size = lfs_object_id(file_path)
+        with self._lock:
+            self._objects[file_path] = (stamp, oid)
+        return oid, size
+
+    def pointer(self, file_path):
+        return lfs_pointer(*self.object_id(file_path))
+
+    def hash_file(self, file_path):
+        """Git blob SHA the file has in the tree: its pointer's for LFS files"""
+        if self.wants(file_path):
+            return git_blob_sha(self.pointer(file_path))
+        return hash_file(file_path)
+
+    def _new_session(self):
+        session = new_session(self.pool_size)
+        session.headers['User-Agent'] = 'GitSwift'
+        return session
+
+    def _sessions(self):
+        """(session for the batch API, session for the transfers it hands out)"""
+        with self._lock:
+            if self._session is None:
+                self._session = self._new_session()
+                self._session.headers['Accept'] = LFS_MEDIA_TYPE
+                auth = self.repo.requester.auth
+                if auth is not None and getattr(auth, 'token', None):
+                    # LFS servers take the token as a Basic auth password
+                    self._session.auth = ('x-access-token', auth.token)
+                # Transfers carry their own auth headers, which session auth would replace
+                self._transfer_session = self._new_session()
+                if self.url is None:
+                    self.url = f"{self.repo.clone_url}/info/lfs"
+            return self._session, self._transfer_session
+
+    def _check(self, response):
+        # Storage backends answer transfers with any 2xx
+        if not 200 <= response.status_code < 300:
+            try:
+                data = response.json()
+            except ValueError:
+                data = {'message': response.text}
+            # Same exception as the rest of the upload path
+            raise GithubException(response.status_code, data, dict(response.headers))
+        return response
+
+    def upload(self, file_path, on_read=None):
+        """Put a file into LFS storage unless it's there already, returning its pointer.
+
+        on_read, if given, is called with the size of every chunk sent.
+        """
+        oid, size = self.object_id(file_path)
+        session, transfer = self._sessions()
+        response = self._check(session.post(
+            f"{self.url}/objects/batch",
+            json={
+                'operation': 'upload',
+                'transfers': ['basic'],
+                'ref': {'name': f"refs/heads/{self.branch}"},
+                'objects': [{'oid': oid, 'size': size}],
+                'hash_algo': 'sha256',
+            },
+            headers={'Content-Type': LFS_MEDIA_TYPE},
+            timeout=self.timeout))
+        obj = response.json()['objects'][0]
+        if 'error' in obj:
+            raise GithubException(obj['error'].get('code', 422), obj['error'], None)
+
+        actions = obj.get('actions') or {}
+        # No upload action means the server already has this object
+        if 'upload' in actions:
+            action = actions['upload']
+            with open(file_path, 'rb') as f:
+                # requests sends a file object with a Content-Length, reading it as it goes
+                body = ReportingReader(f, on_read) if on_read is not None else f
+                self._check(transfer.put(action['href'], data=body, timeout=self.timeout, headers={
+                    'Content-Type': 'application/octet-stream', **action.get('header', {})}))
+            if 'verify' in actions:
+                action = actions['verify']
+                self._check(transfer.post(action['href'], json={'oid': oid, 'size': size}, timeout=self.timeout,
+                                          headers={'Content-Type': LFS_MEDIA_TYPE, **action.get('header', {})}))
+        return lfs_pointer(oid, size)
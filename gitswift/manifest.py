@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from urllib.parse import quote
+
+from .hashing import HASH_WORKERS, hash_file, hash_files
+from .index import FileIndex
+
+# Kept next to the saved tokens in ~/.github_tokens.json
+MANIFEST_DIR = Path.home() / '.github_manifests'
+
+
+def project_key(project_path):
+    """Absolute, normalised path of a project directory, the way manifests record it"""
+    return os.path.normcase(os.path.realpath(project_path))
+
+
+def state_path(directory, user, repo, branch, suffix, project_path=None):
+    """File in directory holding per-branch state for (user, repo, branch).
+
+    With project_path, the state is kept apart per project directory, so
+    pushing two directories to one branch never mixes up their records.
+    """
+    name = quote(f'{user}/{repo}/{branch}', safe='')
+    if project_path is not None:
+        name += '-' + hashlib.sha1(project_key(project_path).encode('utf-8')).hexdigest()[:12]
+    return Path(directory) / f"{name}{suffix}"
+
+
+class Manifest:
+    """On-disk record of the tree the last successful push left on one branch.
+
+    For every path it keeps size, mtime_ns and blob SHA, in entries, a
+    FileIndex. A local file whose size and mtime still match is not read
+    or hashed again, and when the branch head is still the recorded
+    commit the remote tree doesn't need to be fetched at all. Paths that
+    only exist remotely have a size and mtime of -1, which tells them apart
+    from the files that came from the project. project is the directory
+    those files came from.
+    """
+
+    def __init__(self, path, project=None):
+        self.path = Path(path)
+        self.project = project
+        self.commit = None
+        self.entries = FileIndex()
+        # {relative_path: [size, mtime_ns, sha]} of local files that differ from
+        # their entry, noted during this run and recorded on the next push
+        self.seen = {}
+
+    @classmethod
+    def load(cls, user, repo, branch, project_path, directory=MANIFEST_DIR):
+        """Load the manifest of pushes from project_path to (user, repo, branch), or start an empty one"""
+        project = project_key(project_path)
+        manifest = cls(state_path(directory, user, repo, branch, '.json', project), project)
+        if manifest.path.exists():
+            try:
+                with open(manifest.path, 'r') as f:
+                    data = json.load(f)
+                manifest.commit = data['commit']
+                if data.get('project') == project:
+                    manifest.entries = FileIndex.build((path, *entry) for path, entry in data['entries'].items())
+                else:
+                    # Written for another directory: still the tree at commit, but none of
+                    # its files are ours, so they are neither trusted unhashed nor deleted
+                    manifest.entries = FileIndex.build((path, -1, -1, entry[2])
+                                                       for path, entry in data['entries'].items())
+            except Exception as e:
+                # A broken manifest only costs a full comparison
+                print(f"Error loading manifest {manifest.path}: {e}")
+                manifest.commit = None
+                manifest.entries = FileIndex()
+        return manifest
+
+    def tree(self):
+        """{path: blob_sha} of the recorded commit, as a FileIndex"""
+        return self.entries
+
+    def stamp(self, relative_path):
+        """[size, mtime_ns, sha] of a file hashed this run, kept to be recorded by the next push"""
+        stamp = self.seen.get(relative_path)
+        if stamp is None:
+            # Unchanged since the last push, so hashing it noted nothing
+            path, size, mtime_ns, sha = self.entries.entry(self.entries.find(relative_path))
+            stamp = self.seen[relative_path] = [size, mtime_ns, sha]
+        return stamp
+
+    def changed(self, files):
+        """(relative_path, file_path, size) of the files whose size or mtime no longer match their entry.
+
+        Files without an entry count as changed. files come in path order.
+        """
+        entries = self.entries
+        positions = entries.positions(relative_path for relative_path, file_path in files)
+        for (relative_path, file_path), position in zip(files, positions):
+            st = os.stat(file_path)
+            if position is None or (entries.sizes[position], entries.mtimes[position]) != (st.st_size,
+                                                                                           st.st_mtime_ns):
+                yield relative_path, file_path, st.st_size
+
+    def hash_files(self, files, hasher=hash_file, workers=HASH_WORKERS, cancelled=None, positions=None):
+        """Blob SHAs of (relative_path, file_path) pairs, in order.
+
+        A file whose size and mtime still match its entry gets the recorded
+        SHA without being read. The others are hashed with hasher, by
+        workers threads at once, and noted in seen. Files in path order are matched with the entries
+        in a single merge, unless positions already gives the position of
+        each in entries (or None).
+        """
+        entries = self.entries
+        shas = []
+        # {index in files: (size, mtime_ns)} of the files to hash
+        changed = {}
+        if positions is None:
+            positions = entries.positions(relative_path for relative_path, file_path in files)
+        for index, ((relative_path, file_path), position) in enumerate(zip(files, positions)):
+            st = os.stat(file_path)
+            if position is not None and (entries.sizes[position], entries.mtimes[position]) == (st.st_size,
+                                                                                                 st.st_mtime_ns):
+                shas.append(entries.sha(position))
+            else:
+                shas.append(None)
+                changed[index] = (st.st_size, st.st_mtime_ns)
+        hashed = hash_files([files[index][1] for index in changed], hasher, workers, cancelled)
+        for (index, (size, mtime_ns)), sha in zip(changed.items(), hashed):
+            shas[index] = sha
+            self.seen[files[index][0]] = [size, mtime_ns, sha]
+        return shas
+
+    def record_push(self, commit_sha, remote, deleted=()):
+        """Save the state after a successful push of every file seen to commit_sha.
+
+        remote is the {path: blob_sha} tree at the branch head the push
+        started from (a FileIndex, or any mapping) and deleted the paths it
+        removed. The files seen are recorded as well. Files not seen this
+        time keep their recorded size and mtime as long as the blob is the
+        same, so pushing a few paths doesn't cost the next full scan any
+        hashing. When remote is the manifest's own index, only the changed
+        entries are written, and a push that changed nothing isn't saved.
+        """
+        if remote is self.entries:
+            if commit_sha == self.commit and not self.seen and not deleted:
+                return
+            entries = self.entries
+        else:
+            entries = FileIndex.from_sorted(self._carried(FileIndex.from_tree(remote)))
+        added = entries.update((path, *stamp) for path, stamp in sorted(self.seen.items()))
+        self.commit = commit_sha
+        self.entries = entries.merged(added, deleted)
+        self.seen = {}
+        self.save()
+
+    def _carried(self, remote):
+        """remote's entries, keeping the recorded size and mtime of those whose blob is unchanged"""
+        old = self.entries
+        for index, (path, position) in enumerate(zip(remote, old.positions(remote))):
+            sha = remote.sha(index)
+            if position is not None and old.sha(position) == sha:
+                yield path, old.sizes[position], old.mtimes[position], sha
+            else:
+                yield path, -1, -1, sha
+
+    def record_upload(self, files, stamps, shas):
+        """Save the state after upload_all() pushed files, (relative_path, file_path) pairs.
+
+        stamps holds each file's (size, mtime_ns) from before the upload and
+        shas is {relative_path: sha}. The rest of the branch (the README of
+        a new repository) isn't known, so the next push fetches the tree.
+        """
+        self.commit = None
+        self.entries = FileIndex.build((relative_path, size, mtime_ns, shas[relative_path])
+                                       for (relative_path, file_path), (size, mtime_ns) in zip(files, stamps))
+        self.seen = {}
+        self.save()
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so a crash never leaves half a manifest
+            temp_path = self.path.with_suffix('.tmp')
+            with open(temp_path, 'w') as f:
+                # Entry by entry, so a big index never exists as a dict
+                f.write(f'{{"commit": {json.dumps(self.commit)}, "project": {json.dumps(self.project)}, '
+                        f'"entries": {{')
+                for index, (path, size, mtime_ns, sha) in enumerate(self.entries.entries()):
+                    f.write(f'{", " if index else ""}{json.dumps(path)}: [{size}, {mtime_ns}, {json.dumps(sha)}]')
+                f.write('}}')
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"Error saving manifest {self.path}: {e}")
@@ -0,0 +1,113 @@
+import json
+import os
+
+from .client import DEFAULT_WORKERS
+
+PLAN_VERSION = 1
+
+# Requests a commit costs: read the ref and its commit, create the tree and the commit, move the ref
+COMMIT_REQUESTS = 5
+
+# Requests an LFS file costs on top of its pointer blob: batch, transfer and verify
+LFS_REQUESTS = 3
+
+# Seconds per request assumed when planning made no request to time
+DEFAULT_REQUEST_SECONDS = 0.25
+
+# Upload bandwidth assumed for the time estimate, in bytes per second
+UPLOAD_RATE = 2 * 1024 * 1024
+
+
+class StalePlan(ValueError):
+    """The branch or the project changed since the plan was made"""
+
+
+class Plan:
+    """What push() would do, worked out without writing anything.
+
+    files holds one dict per file going into the commit:
+
+        {"path": "src/app.py", "status": "modified", "size": 2048, "mtime_ns": ...,
+         "sha": "...", "upload": true, "lfs": false}
+
+    sha is the blob SHA the file gets in the tree when it is known, upload
+    is false for files re-pointed at a blob the repository already has and
+    "generated" marks a .gitattributes that applying the plan will write.
+    deleted and renamed are as in ChangeSet. The plan is saved as JSON and
+    RepoSync.apply() pushes exactly that, after checking that neither the
+    branch nor the files have changed in between.
+    """
+
+    def __init__(self, repository, branch, head, directory, files, deleted=(), renamed=(),
+                 workers=DEFAULT_WORKERS, request_seconds=DEFAULT_REQUEST_SECONDS):
+        self.repository = repository
+        self.branch = branch
+        self.head = head
+        self.directory = directory
+        self.files = files
+        self.deleted = list(deleted)
+        self.renamed = [tuple(pair) for pair in renamed]
+        self.workers = workers
+        self.request_seconds = request_seconds
+
+    @property
+    def added(self):
+        return [entry['path'] for entry in self.files if entry['status'] == 'added']
+
+    @property
+    def modified(self):
+        return [entry['path'] for entry in self.files if entry['status'] == 'modified']
+
+    def estimate(self):
+        """{files, bytes, requests, seconds} the push is expected to cost"""
+        uploads = [entry for entry in self.files if entry['upload']]
+        lfs = sum(1 for entry in uploads if entry['lfs'])
+        commit = COMMIT_REQUESTS if self.files or self.deleted else 0
+        size = sum(entry['size'] for entry in uploads)
+        # Blobs travel base64-encoded, LFS objects as they are
+        wire_bytes = sum(entry['size'] if entry['lfs'] else entry['size'] * 4 / 3 for entry in uploads)
+        parallel = len(uploads) + lfs * LFS_REQUESTS
+        return {
+            'files': len(uploads),
+            'bytes': size,
+            'requests': parallel + commit,
+            'seconds': (parallel / max(1, self.workers) + commit) * self.request_seconds + wire_bytes / UPLOAD_RATE,
+        }
+
+    def to_dict(self):
+        return {
+            'version': PLAN_VERSION,
+            'repository': self.repository,
+            'branch': self.branch,
+            'head': self.head,
+            'directory': self.directory,
+            'files': self.files,
+            'deleted': self.deleted,
+            'renamed': self.renamed,
+            'workers': self.workers,
+            'request_seconds': self.request_seconds,
+            'estimate': self.estimate(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Plan from to_dict() output, raising ValueError if it isn't one"""
+        if not isinstance(data, dict) or data.get('version') != PLAN_VERSION:
+            raise ValueError("Not a GitSwift plan, or one made by another version")
+        try:
+            return cls(data['repository'], data['branch'], data['head'], data['directory'], data['files'],
+                       data['deleted'], data['renamed'], data.get('workers', DEFAULT_WORKERS),
+                       data.get('request_seconds', DEFAULT_REQUEST_SECONDS))
+        except KeyError as e:
+            raise ValueError(f"The plan has no {e.args[0]}")
+
+    def save(self, path):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
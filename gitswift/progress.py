@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Throughput is averaged over this many seconds, so the ETA follows the current speed
+RATE_WINDOW = 5.0
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return '--:--'
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+
+def describe(state):
+    """One line summary of a progress event"""
+    if state['event'] == 'done':
+        average = state['bytes_sent'] / state['elapsed'] if state['elapsed'] else 0.0
+        return (f"Sent {state['files_done']} files, {format_bytes(state['bytes_sent'])} "
+                f"in {format_duration(state['elapsed'])} ({format_bytes(average)}/s)")
+    return (f"{state['files_done']}/{state['files_total']} files, "
+            f"{format_bytes(state['bytes_sent'])} of {format_bytes(state['bytes_total'])}, "
+            f"{format_bytes(state['rate'])}/s, ETA {format_duration(state['eta'])}")
+
+
+class Progress:
+    """Files and bytes of one upload, updated from the upload threads.
+
+    start() takes the files about to be sent, so the totals are known up
+    front. Workers call file_started() and file_done() around each file and
+    advance() as the bytes of a streamed file go out. Every change is
+    passed to listener as an event dict:
+
+        {"event": "start", "files_total": 120, "bytes_total": 5242880, ...}
+        {"event": "file", "path": "src/app.py", "bytes": 2048, "seconds": 0.31, ...}
+        {"event": "progress", "files_done": 12, "bytes_sent": 524288, "in_flight": 4,
+         "rate": 104857.6, "eta": 45.0, ...}
+        {"event": "done", ...}
+
+    "progress" events are sent at most every interval seconds. All events
+    carry the counters and "elapsed" seconds since start().
+    """
+
+    def __init__(self, listener=None, interval=0.25):
+        self.listener = listener or (lambda event: None)
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.start_time = None
+        self.files_total = 0
+        self.bytes_total = 0
+        self.files_done = 0
+        self.bytes_sent = 0
+        # {relative_path: [size, bytes sent, start time]} of files being uploaded
+        self.in_flight = {}
+        # (time, bytes_sent) samples over the last RATE_WINDOW seconds
+        self.samples = deque()
+        self.last_event = 0
+
+    def start(self, files):
+        """Begin an upload of (relative_path, file_path) pairs"""
+        sizes = [os.path.getsize(file_path) for relative_path, file_path in files]
+        with self.lock:
+            self.start_time = time.monotonic()
+            self.files_total = len(sizes)
+            self.bytes_total = sum(sizes)
+            self.files_done = 0
+            self.bytes_sent = 0
+            self.in_flight = {}
+            self.samples = deque([(self.start_time, 0)])
+            event = self._event('start')
+        self.listener(event)
+
+    def file_started(self, relative_path, file_path):
+        with self.lock:
+            self.in_flight[relative_path] = [os.path.getsize(file_path), 0, time.monotonic()]
+
+    def advance(self, relative_path, count):
+        """Note that count more bytes of a file have been sent"""
+        with self.lock:
+            entry = self.in_flight.get(relative_path)
+            if entry is None:
+                return
+            # A retried file is read again, but only counts once
+            count = min(count, entry[0] - entry[1])
+            entry[1] += count
+            self.bytes_sent += count
+            event = self._throttled()
+        if event:
+            self.listener(event)
+
+    def file_done(self, relative_path):
+        with self.lock:
+            size, sent, started = self.in_flight.pop(relative_path)
+            self.bytes_sent += size - sent
+            self.files_done += 1
+            event = self._event('file', path=relative_path, bytes=size, seconds=time.monotonic() - started)
+            progress = self._throttled()
+        self.listener(event)
+        if progress:
+            self.listener(progress)
+
+    def file_failed(self, relative_path):
+        with self.lock:
+            self.in_flight.pop(relative_path, None)
+
+    def finish(self):
+        with self.lock:
+            event = self._event('done')
+        self.listener(event)
+
+    def _throttled(self):
+        now = time.monotonic()
+        if now - self.last_event < self.interval:
+            return None
+        self.last_event = now
+        return self._event('progress')
+
+    def _event(self, name, **fields):
+        now = time.monotonic()
+        self.samples.append((now, self.bytes_sent))
+        while len(self.samples) > 2 and now - self.samples[1][0] >= RATE_WINDOW:
+            self.samples.popleft()
+        first_time, first_bytes = self.samples[0]
+        rate = (self.bytes_sent - first_bytes) / (now - first_time) if now > first_time else 0.0
+        remaining = self.bytes_total - self.bytes_sent
+        return {
+            'event': name,
+            **fields,
+            'elapsed': now - self.start_time if self.start_time is not None else 0.0,
+            'files_done': self.files_done,
+            'files_total': self.files_total,
+            'bytes_sent': self.bytes_sent,
+            'bytes_total': self.bytes_total,
+            'in_flight': len(self.in_flight),
+            'rate': rate,
+            'eta': remaining / rate if rate > 0 else (0.0 if remaining == 0 else None),
+        }
+
+
+class EventLog:
+    """Progress listener appending every event to a file as a JSON line"""
+
+    def __init__(self, path):
+        self.file = open(path, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        with self.lock:
+            self.file.write(json.dumps({'time': time.time(), **event}) + '\n')
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,186 @@
+import random
+import threading
+import time
+
+import requests
+from github import GithubException
+
+from .errors import check_cancelled
+from .http import caller_retries
+
+# How often one request is retried after a transient failure or a rate-limit rejection
+MAX_RETRIES = 8
+
+# Retry n waits a random delay of up to BACKOFF_BASE * 2 ** n seconds, never more than BACKOFF_CAP
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+# GitHub asks for at least a minute's pause after a secondary rate limit that names no Retry-After
+SECONDARY_LIMIT_PAUSE = 60.0
+
+# Server errors GitHub answers busy moments with, worth trying again
+TRANSIENT_STATUSES = (500, 502, 503, 504)
+
+
+def _raw_headers(result):
+    return getattr(result, 'raw_headers', None)
+
+
+def backoff(attempt):
+    """Seconds to wait before retry number attempt (from 0), with full jitter"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class RateLimiter:
+    """Pace requests shared between upload workers using GitHub's rate-limit headers.
+
+    Every worker calls wait() before a request and update() with the
+    response headers afterwards. A Retry-After header pauses all workers,
+    and once X-RateLimit-Remaining drops to the reserve the remaining
+    requests are spread evenly until the window resets.
+
+    call() does all of that around one request and retries it after server
+    errors, dropped connections and rate-limit rejections, with jittered
+    exponential backoff. Given a concurrency, it also caps the requests in
+    flight the way TCP does (AIMD): the cap is halved whenever GitHub pushes
+    back and grows by one after each cap's worth of successes, up to
+    concurrency, so the workers settle at what the server sustains.
+    """
+
+    def __init__(self, reserve=50, concurrency=None):
+        self.reserve = reserve
+        self.lock = threading.Lock()
+        self.remaining = None
+        self.reset_at = 0
+        self.paused_until = 0
+        self.next_slot = 0
+        self.concurrency = concurrency
+        self.limit = concurrency
+        self.in_flight = 0
+        self.successes = 0
+        # Bumped by every decrease, so one wave of failures only halves the limit once
+        self.epoch = 0
+        self.slot_free = threading.Condition(self.lock)
+        # Requests sent again, for reporting
+        self.retries = 0
+
+    def wait(self, cancelled=None):
+        """Block until another request may be sent"""
+        with self.lock:
+            now = time.time()
+            start = max(now, self.paused_until)
+            if self.remaining is not None and self.remaining <= self.reserve and self.reset_at > now:
+                interval = (self.reset_at - now) / max(self.remaining, 1)
+                start = max(start, self.next_slot)
+                self.next_slot = start + interval
+            delay = start - now
+        if delay > 0:
+            _sleep(delay, cancelled)
+
+    def update(self, headers):
+        """Record the rate-limit headers of a response"""
+        if not headers:
+            return
+        now = time.time()
+        with self.lock:
+            if 'x-ratelimit-remaining' in headers:
+                self.remaining = int(float(headers['x-ratelimit-remaining']))
+            if 'x-ratelimit-reset' in headers:
+                self.reset_at = float(headers['x-ratelimit-reset'])
+            if 'retry-after' in headers:
+                self.paused_until = max(self.paused_until, now + float(headers['retry-after']))
+            elif self.remaining == 0 and self.reset_at > now:
+                self.paused_until = max(self.paused_until, self.reset_at)
+
+    def is_rate_limited(self, error):
+        """Record a failed request and tell whether it was a rate-limit rejection worth retrying"""
+        if not isinstance(error, GithubException) or error.status not in (403, 429):
+            return False
+        headers = error.headers or {}
+        self.update(headers)
+        if 'retry-after' in headers or headers.get('x-ratelimit-remaining') == '0':
+            return True
+        message = error.data.get('message', '') if isinstance(error.data, dict) else str(error.data)
+        if 'secondary rate limit' in message.lower():
+            with self.lock:
+                self.paused_until = max(self.paused_until, time.time() + SECONDARY_LIMIT_PAUSE)
+            return True
+        return False
+
+    def is_retryable(self, error):
+        """Whether a failed request is worth sending again: rate limits, 5xx and network trouble"""
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        if isinstance(error, GithubException):
+            if error.status in TRANSIENT_STATUSES:
+                # A 503 may say when to come back
+                self.update(error.headers)
+                return True
+            return self.is_rate_limited(error)
+        return False
+
+    def acquire(self):
+        """Take one of the limit slots, returning the epoch it was taken in"""
+        with self.slot_free:
+            while self.limit is not None and self.in_flight >= self.limit:
+                self.slot_free.wait()
+            self.in_flight += 1
+            return self.epoch
+
+    def release(self, epoch, succeeded=True, pushed_back=False):
+        """Give a slot back, growing the limit after a success or halving it when pushed back"""
+        with self.slot_free:
+            self.in_flight -= 1
+            if self.limit is not None:
+                if pushed_back:
+                    # Requests sent before the last decrease don't decrease it again
+                    if epoch == self.epoch:
+                        self.limit = max(1, self.limit // 2)
+                        self.successes = 0
+                        self.epoch += 1
+                elif succeeded and self.limit < self.concurrency:
+                    self.successes += 1
+                    if self.successes >= self.limit:
+                        self.limit += 1
+                        self.successes = 0
+            self.slot_free.notify_all()
+
+    def call(self, send, cancelled=None, headers=_raw_headers, retries=MAX_RETRIES):
+        """Run send() as a paced request, retrying it after transient failures.
+
+        headers picks the response headers out of send()'s result (a PyGithub
+        object's raw_headers by default). Returns what send() returned, or
+        raises its last error.
+        """
+        for attempt in range(retries + 1):
+            self.wait(cancelled)
+            epoch = self.acquire()
+            try:
+                # Retried here, so PyGithub's own retries must not hide the pushback
+                with caller_retries():
+                    result = send()
+            except BaseException as e:
+                pushed_back = isinstance(e, Exception) and self.is_retryable(e)
+                self.release(epoch, succeeded=False, pushed_back=pushed_back)
+                if not pushed_back or attempt == retries:
+                    raise
+            else:
+                self.release(epoch)
+                self.update(headers(result))
+                return result
+            with self.lock:
+                self.retries += 1
+                # Retry-After and rate-limit pauses are left to wait()
+                delay = 0 if self.paused_until > time.time() else backoff(attempt)
+            _sleep(delay, cancelled)
+
+
+def _sleep(seconds, cancelled, step=0.5):
+    """time.sleep() that wakes up to check cancelled every step seconds"""
+    end = time.monotonic() + seconds
+    while True:
+        check_cancelled(cancelled)
+        left = end - time.monotonic()
+        if left <= 0:
+            return
+        time.sleep(min(step, left))
@@ -0,0 +1,268 @@
+import os
+import re
+
+from .index import FileList
+
+# Per-directory ignore files, later ones take precedence within a directory
+IGNORE_FILES = ('.gitignore', '.gitswiftignore')
+
+# Character classes git's wildmatch allows inside brackets, such as [[:space:]]
+POSIX_CLASSES = {
+    'alnum': 'a-zA-Z0-9',
+    'alpha': 'a-zA-Z',
+    'blank': ' \\t',
+    'digit': '0-9',
+    'lower': 'a-z',
+    'space': '\\s',
+    'upper': 'A-Z',
+    'xdigit': '0-9a-fA-F',
+}
+
+
+def _translate_class(body):
+    """Regular expression source for the inside of a bracket expression"""
+    out = []
+    i, n = 0, len(body)
+    if body and body[0] in '!^':
+        out.append('^')
+        i = 1
+    while i < n:
+        c = body[i]
+        if body.startswith('[:', i) and body.find(':]', i + 2) != -1:
+            end = body.find(':]', i + 2)
+            out.append(POSIX_CLASSES.get(body[i + 2:end], ''))
+            i = end + 2
+            continue
+        if c == '\\' and i + 1 < n:
+            i += 1
+            c = body[i]
+        out.append(c if c == '-' else re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def _translate(pattern):
+    """Regular expression source for one gitignore glob"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i) and (i == 0 or pattern[i - 1] == '/'):
+                if i + 2 == n:
+                    # Trailing '/**' matches everything inside
+                    out.append('.*')
+                    i += 2
+                    continue
+                if pattern[i + 2] == '/':
+                    # '**/' matches zero or more directories
+                    out.append('(?:.*/)?')
+                    i += 3
+                    continue
+            out.append('[^/]*')
+            while i + 1 < n and pattern[i + 1] == '*':
+                i += 1
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            # Find the closing bracket, stepping over escapes and [:class:] names
+            while j < n and pattern[j] != ']':
+                if pattern.startswith('[:', j) and pattern.find(':]', j + 2) != -1:
+                    j = pattern.find(':]', j + 2) + 2
+                else:
+                    j += 2 if pattern[j] == '\\' else 1
+            if j >= n:
+                out.append(re.escape(c))
+            else:
+                body = _translate_class(pattern[i + 1:j])
+                # Only unknown [:class:] names leave nothing to match
+                out.append(f"[{body}]" if body.lstrip('^') else '(?!)')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def _parse_line(line):
+    """Turn one ignore-file line into (regex source, negate, dir_only), or None"""
+    line = line.rstrip('\r\n')
+    if not line or line.startswith('#'):
+        return None
+    # Trailing spaces are dropped unless escaped with a backslash
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    line = stripped
+
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith(('\\!', '\\#')):
+        line = line[1:]
+
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    # A slash anywhere but the end ties the pattern to the ignore file's directory
+    anchored = '/' in line
+    regex = _translate(line.lstrip('/'))
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    return regex, negate, dir_only
+
+
+class IgnoreRules:
+    """Compiled patterns of one ignore file.
+
+    base is the directory holding the file, relative to the scan root and
+    ending in '/' (or '' for the root). match() gives True for ignored,
+    False for re-included by a '!' pattern and None when no pattern applies.
+    """
+
+    def __init__(self, lines, base=''):
+        self.base = base
+        self.rules = [rule for rule in map(_parse_line, lines) if rule]
+        self.has_negations = any(negate for regex, negate, dir_only in self.rules)
+        if self.has_negations:
+            # Last matching pattern wins, so check from the bottom up
+            self.compiled = [(re.compile(regex + r'\Z', re.DOTALL), negate, dir_only)
+                             for regex, negate, dir_only in reversed(self.rules)]
+        else:
+            # Without negations any match means ignored: one alternation per kind
+            self.dir_regex = self._join(regex for regex, negate, dir_only in self.rules)
+            self.file_regex = self._join(regex for regex, negate, dir_only in self.rules if not dir_only)
+
+    @staticmethod
+    def _join(sources):
+        sources = list(sources)
+        if not sources:
+            return None
+        return re.compile('(?:' + '|'.join(sources) + r')\Z', re.DOTALL)
+
+    @classmethod
+    def from_file(cls, file_path, base=''):
+        """Read an ignore file, returning None when it is missing or has no patterns"""
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                rules = cls(f.readlines(), base)
+        except OSError:
+            return None
+        return rules if rules.rules else None
+
+    def match(self, relative_path, is_dir):
+        path = relative_path[len(self.base):]
+        if not self.has_negations:
+            regex = self.dir_regex if is_dir else self.file_regex
+            return True if regex is not None and regex.match(path) else None
+        for regex, negate, dir_only in self.compiled:
+            if (is_dir or not dir_only) and regex.match(path):
+                return not negate
+        return None
+
+
+def is_ignored(chain, relative_path, is_dir):
+    """Check a path against a chain of IgnoreRules, deepest directory first"""
+    for rules in reversed(chain):
+        result = rules.match(relative_path, is_dir)
+        if result is not None:
+            return result
+    return False
+
+
+def path_ignored(directory_path, relative_path, use_ignore_files=True):
+    """Whether collect_files() would leave out the file at relative_path.
+
+    Only reads the ignore files of the directories on the way to it, so a
+    few changed paths can be checked without walking the whole tree.
+    """
+    parts = relative_path.split('/')
+    if '.git' in parts[:-1]:
+        return True
+    if not use_ignore_files:
+        return False
+    exclude = IgnoreRules.from_file(os.path.join(directory_path, '.git', 'info', 'exclude'))
+    chain = (exclude,) if exclude else ()
+    path = directory_path
+    prefix = ''
+    for depth, name in enumerate(parts):
+        for ignore_file in IGNORE_FILES:
+            rules = IgnoreRules.from_file(os.path.join(path, ignore_file), prefix)
+            if rules:
+                chain = chain + (rules,)
+        is_dir = depth < len(parts) - 1
+        if is_ignored(chain, prefix + name, is_dir):
+            return True
+        path = os.path.join(path, name)
+        prefix += name + '/'
+    return False
+
+
+def _sort_key(entry):
+    # A directory's files sort right after its name plus '/', so listing each directory
+    # in this order and descending into subdirectories as they come gives sorted paths
+    return entry.name + '/' if entry.is_dir() else entry.name
+
+
+def collect_files(directory_path, use_ignore_files=True):
+    """Return (relative_path, file_path) pairs for every file below directory_path.
+
+    The pairs come as a FileList, sorted by relative path. .git is always
+    skipped. Unless use_ignore_files is False, .gitignore and
+    .gitswiftignore files at any depth and .git/info/exclude are honoured,
+    and ignored directories are pruned before they are read.
+    """
+    chain = ()
+    if use_ignore_files:
+        exclude = IgnoreRules.from_file(os.path.join(directory_path, '.git', 'info', 'exclude'))
+        if exclude:
+            chain = (exclude,)
+
+    files = FileList(directory_path)
+    # (remaining entries, prefix, ignore rules) of every directory being listed
+    stack = []
+
+    def enter(path, prefix, chain):
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            return
+
+        if use_ignore_files:
+            names = {entry.name for entry in entries}
+            for name in IGNORE_FILES:
+                if name in names:
+                    rules = IgnoreRules.from_file(os.path.join(path, name), prefix)
+                    if rules:
+                        chain = chain + (rules,)
+        entries.sort(key=_sort_key)
+        stack.append((iter(entries), prefix, chain))
+
+    enter(directory_path, '', chain)
+    while stack:
+        entries, prefix, chain = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        # Git trees always use forward slashes
+        relative_path = prefix + entry.name
+        if entry.is_dir():
+            # Like os.walk, symlinked directories are not followed
+            if entry.name == '.git' or entry.is_symlink() or is_ignored(chain, relative_path, True):
+                continue
+            enter(entry.path, relative_path + '/', chain)
+        elif entry.is_file() and not is_ignored(chain, relative_path, False):
+            files.append(relative_path)
+    return files
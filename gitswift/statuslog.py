@@ -0,0 +1,87 @@
+import logging
+import logging.handlers
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+# Kept next to the saved tokens in ~/.github_tokens.json
+LOG_DIR = Path.home() / '.github_logs'
+LOG_FILE = LOG_DIR / 'gitswift.log'
+
+# Lines kept for display; older ones are only in the log file
+MAX_LINES = 2000
+
+# The log file is rotated at this size, keeping LOG_BACKUPS old files
+MAX_LOG_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+
+
+def file_logger(path=LOG_FILE):
+    """Logger writing bare messages to a rotating log file at path"""
+    logger = logging.getLogger(f"gitswift.status.{path}")
+    if not logger.handlers:
+        logger.setLevel(logging.INFO)
+        # Only this file, not whatever the root logger prints
+        logger.propagate = False
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(path, maxBytes=MAX_LOG_BYTES, backupCount=LOG_BACKUPS,
+                                                           encoding='utf-8')
+        except OSError as e:
+            print(f"Error opening log file {path}: {e}")
+            handler = logging.NullHandler()
+        logger.addHandler(handler)
+    return logger
+
+
+class StatusLog:
+    """Bounded log of status messages, handed out in batches.
+
+    add() only timestamps and queues a message, so it's cheap enough to
+    call once per file. A display calls take() every so often and shows
+    everything that arrived since in one go; the same batch is appended to
+    the rotating log file with a single write. Only the last capacity lines
+    are kept for display, so if the display falls behind the oldest queued
+    lines are dropped from it (never from the file) and take() says how
+    many.
+    """
+
+    def __init__(self, capacity=MAX_LINES, path=LOG_FILE):
+        self.lines = deque(maxlen=capacity)
+        self.pending = deque(maxlen=capacity)
+        self.dropped = 0
+        # Dated lines not written to the log file yet
+        self.unwritten = []
+        self.lock = threading.Lock()
+        self.path = path
+        self.logger = file_logger(path) if path is not None else None
+
+    def add(self, message):
+        now = datetime.now()
+        line = f"{now.strftime('%H:%M:%S')}: {message}"
+        with self.lock:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+            self.pending.append(line)
+            self.lines.append(line)
+            if self.logger is not None:
+                self.unwritten.append(f"{now.strftime('%Y-%m-%d')} {line}")
+
+    def take(self):
+        """Lines added since the last call, preceded by a note about any that were dropped"""
+        self.flush()
+        with self.lock:
+            lines = list(self.pending)
+            self.pending.clear()
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            lines.insert(0, f"... {dropped} earlier line(s) not shown, see {self.path} ...")
+        return lines
+
+    def flush(self):
+        """Append the lines added since the last flush to the log file"""
+        with self.lock:
+            unwritten, self.unwritten = self.unwritten, []
+        if unwritten:
+            self.logger.info('\n'.join(unwritten))
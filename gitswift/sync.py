@@ -0,0 +1,438 @@
+import bisect
+import os
+
+from github import GithubException, UnknownObjectException
+
+from .bulk import BulkUploader
+from .client import DEFAULT_BASE_URL, DEFAULT_WORKERS, connect
+from .diff import deleted_files, diff_files, fetch_remote_tree, remote_head
+from .errors import check_cancelled
+from .hashing import git_blob_sha, hash_file
+from .http import STATS
+from .journal import Journal
+from .lfs import LFS_THRESHOLD, LfsAttributes, LfsStore
+from .manifest import Manifest
+from .plan import DEFAULT_REQUEST_SECONDS, Plan, StalePlan
+from .scan import collect_files, path_ignored
+from .tracing import span, traced
+
+
+def _ignore(message):
+    pass
+
+
+def _find(files, relative_path):
+    """file_path of relative_path in files, in path order, or None"""
+    index = bisect.bisect_left(files, (relative_path,))
+    return files[index][1] if index < len(files) and files[index][0] == relative_path else None
+
+
+def validate_repo_name(name):
+    """Return (True, cleaned_name) or (False, error message)"""
+    # Remove any whitespace
+    name = name.strip()
+
+    # Check if name is empty
+    if not name:
+        return False, "Repository name cannot be empty"
+
+    # Check for valid characters (letters, numbers, hyphens, underscores)
+    if not all(c.isalnum() or c in '-_' for c in name):
+        return False, "Repository name can only contain letters, numbers, hyphens, and underscores"
+
+    # Check length
+    if len(name) > 100:
+        return False, "Repository name cannot be longer than 100 characters"
+
+    return True, name
+
+
+class Account:
+    """An authenticated GitHub user and the repositories it owns"""
+
+    def __init__(self, token, pool_size=DEFAULT_WORKERS, base_url=DEFAULT_BASE_URL, http2=False, cache=True):
+        self.github = connect(token, pool_size=pool_size, base_url=base_url, http2=http2, cache=cache)
+        self.user = self.github.get_user()
+        # The user is loaded lazily, so this is where a bad token fails
+        self.login = self.user.login
+
+    def find_repository(self, repo_name):
+        """Return the named repository, or None if the user has none by that name"""
+        try:
+            return self.user.get_repo(repo_name)
+        except UnknownObjectException:
+            return None
+
+    def create_repository(self, repo_name, description='', private=False):
+        """Create a repository with an initial commit to build on"""
+        return self.user.create_repo(name=repo_name, description=description, private=private, auto_init=True)
+
+
+class ChangeSet:
+    """Difference between a local project and the head of a branch.
+
+    added and modified hold (relative_path, file_path) pairs, deleted the
+    paths to remove, remote is the {path: blob_sha} tree at head. reused is
+    {relative_path: blob_sha} for changed files whose content the
+    repository already has, which are committed without being uploaded,
+    and renamed lists the (old_path, new_path) moves among them.
+    """
+
+    def __init__(self, added, modified, remote, head, deleted=(), reused=None, renamed=()):
+        self.added = added
+        self.modified = modified
+        self.remote = remote
+        self.head = head
+        self.deleted = list(deleted)
+        self.reused = reused or {}
+        self.renamed = list(renamed)
+
+    @property
+    def files(self):
+        """Every file that goes into the commit"""
+        return self.modified + self.added
+
+
+class RepoSync:
+    """Synchronise a local project directory with one branch of a repository.
+
+    push() and upload_all() run a whole sync. Uploaded blobs go into a
+    Journal, so a sync that is interrupted picks up where it stopped the
+    next time it runs. Files of lfs_threshold bytes or more, and binary
+    files of lfs_binary_threshold bytes or more, are stored with Git LFS
+    (None turns either off). Uploads are reported to progress, a Progress,
+    if one is given. limiter and executor let several syncs share one
+    RateLimiter and one pool of upload threads. The stages are separate
+    methods so they can be
+    driven and profiled one at a time:
+
+        sync = RepoSync(repo, 'path/to/project')
+        changes = sync.diff(sync.scan())
+        shas = sync.upload(changes.files)
+        commit = sync.commit(changes.files, shas, "Update")
+    """
+
+    def __init__(self, repo, directory_path, branch=None, log=_ignore, cancelled=None, workers=DEFAULT_WORKERS,
+                 use_manifest=True, lfs_threshold=LFS_THRESHOLD, lfs_binary_threshold=None, lfs_url=None,
+                 progress=None, limiter=None, executor=None):
+        self.repo = repo
+        self.directory_path = directory_path
+        self.branch = branch or repo.default_branch
+        self.log = log
+        self.cancelled = cancelled
+        self.journal = Journal.load(repo.owner.login, repo.name, self.branch, directory_path)
+        self.lfs = None
+        if lfs_threshold is not None or lfs_binary_threshold is not None:
+            self.lfs = LfsStore(repo, self.branch, threshold=lfs_threshold, binary_threshold=lfs_binary_threshold,
+                                url=lfs_url, pool_size=workers)
+        self.uploader = BulkUploader(repo, self.branch, log=log, cancelled=cancelled, workers=workers,
+                                     journal=self.journal, lfs=self.lfs, progress=progress, limiter=limiter,
+                                     executor=executor)
+        # The manifest remembers the last push, so an unchanged branch needs no tree
+        # request and files with unchanged size and mtime aren't hashed again
+        self.manifest = (Manifest.load(repo.owner.login, repo.name, self.branch, directory_path) if use_manifest
+                         else None)
+
+    @traced('scan')
+    def scan(self):
+        """List the project's (relative_path, file_path) pairs"""
+        return collect_files(self.directory_path)
+
+    def track_lfs(self, files):
+        """Make the project's .gitattributes route its LFS files through LFS, like git lfs track.
+
+        Without the filter=lfs lines, clones would check out the pointer
+        files instead of the content. Returns files, with .gitattributes
+        added if it had to be created.
+        """
+        update = self.lfs_attributes(files)
+        if update is None:
+            return files
+        file_path, new_text = update
+        with open(file_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(new_text)
+        return files if _find(files, '.gitattributes') is not None else files + [('.gitattributes', file_path)]
+
+    def lfs_attributes(self, files):
+        """(file_path, text) of the .gitattributes track_lfs() would write for files, or None"""
+        if self.lfs is None:
+            return None
+        if self.manifest is not None:
+            # Files unchanged since the last push were offered to LFS then, so only the others are sniffed
+            candidates = self.manifest.changed(files)
+        else:
+            candidates = ((relative_path, file_path, None) for relative_path, file_path in files)
+        lfs_paths = [relative_path for relative_path, file_path, size in candidates if self.lfs.wants(file_path, size)]
+        if not lfs_paths:
+            return None
+
+        listed = _find(files, '.gitattributes')
+        local = listed or os.path.join(self.directory_path, '.gitattributes')
+        if listed is None and not os.path.isfile(local):
+            # When only some files are pushed, the project may still have one
+            local = None
+        if local is not None:
+            with open(local, 'r', encoding='utf-8', errors='replace', newline='') as f:
+                text = f.read()
+        else:
+            # Build on the branch's .gitattributes rather than replacing it
+            try:
+                text = self.repo.get_contents('.gitattributes', ref=self.branch).decoded_content.decode('utf-8')
+            except UnknownObjectException:
+                text = ''
+
+        attributes = LfsAttributes(text)
+        new_text = attributes.track(lfs_paths)
+        if new_text == text:
+            return None
+        for relative_path in lfs_paths:
+            if not attributes.tracks(relative_path):
+                self.log(f"Tracking with Git LFS: {relative_path}")
+        return local or os.path.join(self.directory_path, '.gitattributes'), new_text
+
+    @traced('diff')
+    def diff(self, files, paths=None):
+        """Compare scanned files with the branch head, returning a ChangeSet.
+
+        Files the last push took from the project that are gone now are
+        deleted; paths limits that check to those paths. Deletions need the
+        manifest, which remembers what the last push sent.
+        """
+        limiter = self.uploader.limiter
+        with span('remote head'):
+            head = limiter.call(lambda: remote_head(self.repo, self.branch), self.cancelled)
+        if self.manifest is not None and self.manifest.commit == head:
+            # Nothing was pushed since our last run, so the manifest is the remote tree
+            remote = self.manifest.tree()
+        else:
+            # Fetch the remote tree once and compare blob SHAs locally
+            with span('remote tree'):
+                remote = limiter.call(lambda: fetch_remote_tree(self.repo, self.branch, head=head), self.cancelled)
+        added, modified = diff_files(files, remote, cancelled=self.cancelled, manifest=self.manifest,
+                                     hasher=self.lfs.hash_file if self.lfs is not None else hash_file)
+        if self.manifest is None:
+            return ChangeSet(added, modified, remote, head)
+
+        deleted = deleted_files(self.manifest.entries, remote, self.directory_path, paths)
+        # A moved or copied file is only pointed at the blob the repository
+        # already has, so big files aren't uploaded again
+        changed = {relative_path: self.manifest.stamp(relative_path)[2]
+                   for relative_path, file_path in added + modified}
+        blobs = remote.blobs(changed.values())
+        gone = {remote[relative_path]: relative_path for relative_path in deleted}
+        reused = {}
+        renamed = []
+        for relative_path, sha in changed.items():
+            if sha in blobs:
+                reused[relative_path] = sha
+                if sha in gone and relative_path not in remote:
+                    renamed.append((gone.pop(sha), relative_path))
+        return ChangeSet(added, modified, remote, head, deleted, reused, renamed)
+
+    def upload(self, files):
+        """Upload files as blobs, returning {relative_path: sha}"""
+        return self.uploader.create_blobs(files)
+
+    def commit(self, files, shas, message, deleted=()):
+        """Commit uploaded blobs as one new commit at the branch head, removing the paths in deleted"""
+        check_cancelled(self.cancelled)
+        return self.uploader.commit_files(files, shas, message, deleted)
+
+    def upload_and_commit(self, files, message, deleted=(), shas=None):
+        """Upload files, reusing blobs of an interrupted run, and commit them.
+
+        Files that already have a blob in shas, {relative_path: sha}, aren't
+        sent; the uploaded blobs are added to it. The paths in deleted are
+        removed in the same commit.
+        """
+        shas = {} if shas is None else shas
+        pending = [(relative_path, file_path) for relative_path, file_path in files if relative_path not in shas]
+        if pending:
+            shas.update(self.upload(pending))
+        try:
+            return self.commit(files, shas, message, deleted)
+        except GithubException as e:
+            reused = set(self.uploader.reused) if pending else set()
+            if e.status != 422 or not reused:
+                raise
+            # GitHub garbage collects blobs no commit points to, so an old
+            # journal can name blobs that are gone. Send those again.
+            self.log("Blobs from the interrupted upload have expired, uploading them again...")
+            self.journal.discard()
+            shas.update(self.upload([(relative_path, file_path) for relative_path, file_path in files
+                                     if relative_path in reused]))
+            return self.commit(files, shas, message, deleted)
+
+    @traced('push')
+    def push(self, files=None, paths=None):
+        """Upload whatever differs from the branch as a single commit.
+
+        Added and modified files are uploaded, files deleted locally are
+        removed and moved files are re-pointed, all in one new tree. files
+        limits the comparison to those (relative_path, file_path) pairs, in
+        path order, instead of the whole scanned project and paths the
+        deletions to those paths. Returns (changes, commit), commit being
+        None when the branch was already up to date.
+        """
+        return self.push_changes(self.diff(self.track_lfs(self.scan() if files is None else files), paths))
+
+    def push_changes(self, changes):
+        """Commit a ChangeSet made by diff(), returning (changes, commit) like push()"""
+        moved = dict(changes.renamed)
+        for old_path, new_path in changes.renamed:
+            self.log(f"Renamed: {old_path} -> {new_path}")
+        for relative_path, file_path in changes.modified:
+            self.log(f"Updated: {relative_path}")
+        for relative_path, file_path in changes.added:
+            if relative_path not in moved.values():
+                self.log(f"Added new file: {relative_path}")
+        for relative_path in changes.deleted:
+            if relative_path not in moved:
+                self.log(f"Deleted: {relative_path}")
+
+        commit = None
+        if changes.files or changes.deleted:
+            message = f"Update {len(changes.files)} file(s)"
+            if changes.deleted:
+                message = (f"{message}, delete {len(changes.deleted)}" if changes.files
+                           else f"Delete {len(changes.deleted)} file(s)")
+            commit = self.upload_and_commit(changes.files, message, changes.deleted, dict(changes.reused))
+        if self.manifest is not None:
+            self.manifest.record_push(commit.sha if commit else changes.head, changes.remote, changes.deleted)
+        return changes, commit
+
+    def push_paths(self, relative_paths):
+        """Push only the given paths, for instance the files a watcher saw change.
+
+        Ignored paths are skipped and paths that are gone (files or whole
+        directories) are deleted, so no directory is walked. The rest are
+        compared with the manifest when it still describes the branch head,
+        otherwise with the remote tree, and what differs goes up as one
+        commit. A directory that appeared, moved in from elsewhere, is only
+        found by a full push(). Returns (changes, commit) like push().
+        """
+        relative_paths = sorted(set(relative_paths))
+        files = []
+        for relative_path in relative_paths:
+            file_path = os.path.join(self.directory_path, *relative_path.split('/'))
+            if os.path.isdir(file_path):
+                return self.push()
+            if os.path.isfile(file_path) and not path_ignored(self.directory_path, relative_path):
+                files.append((relative_path, file_path))
+        return self.push(files, relative_paths)
+
+    @traced('plan')
+    def plan(self, files=None):
+        """Work out what push() would do, without writing anything, and return it as a Plan.
+
+        The project is scanned, hashed and compared with the branch as
+        usual, but no blob is uploaded, no .gitattributes is written and
+        the manifest isn't saved. apply() pushes the result.
+        """
+        before = STATS.totals()
+        files = self.scan() if files is None else files
+        attributes = self.lfs_attributes(files)
+        if attributes is not None:
+            # Planned from the text track_lfs() would write, not from the file on disk
+            files = [(relative_path, file_path) for relative_path, file_path in files
+                     if relative_path != '.gitattributes']
+        changes = self.diff(files)
+
+        entries = []
+        for status, pairs in (('modified', changes.modified), ('added', changes.added)):
+            for relative_path, file_path in pairs:
+                if self.manifest is not None:
+                    size, mtime_ns, sha = self.manifest.stamp(relative_path)
+                else:
+                    st = os.stat(file_path)
+                    size, mtime_ns, sha = st.st_size, st.st_mtime_ns, None
+                entries.append({'path': relative_path, 'status': status, 'size': size, 'mtime_ns': mtime_ns,
+                                'sha': sha, 'upload': relative_path not in changes.reused,
+                                'lfs': self.lfs is not None and self.lfs.wants(file_path, size)})
+        deleted = changes.deleted
+        if attributes is not None:
+            data = attributes[1].encode('utf-8')
+            entries.append({'path': '.gitattributes',
+                            'status': 'modified' if '.gitattributes' in changes.remote else 'added',
+                            'size': len(data), 'mtime_ns': None, 'sha': git_blob_sha(data), 'upload': True,
+                            'lfs': False, 'generated': True})
+            deleted = [relative_path for relative_path in deleted if relative_path != '.gitattributes']
+
+        totals = STATS.since(before)
+        request_seconds = (totals['seconds'] / totals['requests'] if totals['requests']
+                           else DEFAULT_REQUEST_SECONDS)
+        return Plan(self.repo.full_name, self.branch, changes.head, os.path.abspath(self.directory_path), entries,
+                    deleted, changes.renamed, workers=self.uploader.workers, request_seconds=request_seconds)
+
+    @traced('apply')
+    def apply(self, plan):
+        """Push exactly what plan, from plan(), lists, returning (changes, commit) like push().
+
+        Nothing is scanned, hashed or compared again. Raises StalePlan,
+        before writing anything, if the branch has moved or a planned file
+        has changed since the plan was made.
+        """
+        if plan.repository != self.repo.full_name or plan.branch != self.branch:
+            raise ValueError(f"The plan is for {plan.repository} ({plan.branch}), not {self.repo.full_name} "
+                             f"({self.branch})")
+        head = self.uploader.limiter.call(lambda: remote_head(self.repo, self.branch), self.cancelled)
+        if head != plan.head:
+            raise StalePlan(f"{self.branch} has moved since the plan was made, make a new plan")
+
+        added = []
+        modified = []
+        stamps = {}
+        for entry in plan.files:
+            file_path = os.path.join(self.directory_path, *entry['path'].split('/'))
+            if not entry.get('generated'):
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    st = None
+                if st is None or (st.st_size, st.st_mtime_ns) != (entry['size'], entry['mtime_ns']):
+                    raise StalePlan(f"{entry['path']} has changed since the plan was made, make a new plan")
+            (added if entry['status'] == 'added' else modified).append((entry['path'], file_path))
+            stamps[entry['path']] = [entry['size'], entry['mtime_ns'], entry['sha']]
+        for relative_path in plan.deleted:
+            if os.path.lexists(os.path.join(self.directory_path, *relative_path.split('/'))):
+                raise StalePlan(f"{relative_path} is back since the plan was made, make a new plan")
+
+        generated = [entry for entry in plan.files if entry.get('generated')]
+        if generated:
+            others = [(relative_path, file_path) for relative_path, file_path in added + modified
+                      if relative_path != '.gitattributes']
+            file_path, text = self.lfs_attributes(others) or (None, None)
+            if text is None or git_blob_sha(text.encode('utf-8')) != generated[0]['sha']:
+                raise StalePlan(".gitattributes has changed since the plan was made, make a new plan")
+            self.track_lfs(others)
+            st = os.stat(file_path)
+            stamps['.gitattributes'] = [st.st_size, st.st_mtime_ns, generated[0]['sha']]
+
+        remote = {}
+        if self.manifest is not None:
+            # Only needed to record the push; planning just fetched it, so this is a cheap 304
+            remote = (self.manifest.tree() if self.manifest.commit == head else
+                      self.uploader.limiter.call(lambda: fetch_remote_tree(self.repo, self.branch, head=head),
+                                                 self.cancelled))
+            self.manifest.seen.update((relative_path, stamp) for relative_path, stamp in stamps.items()
+                                      if stamp[2] is not None)
+        reused = {entry['path']: entry['sha'] for entry in plan.files if not entry['upload']}
+        return self.push_changes(ChangeSet(added, modified, remote, head, plan.deleted, reused, plan.renamed))
+
+    @traced('upload all')
+    def upload_all(self):
+        """Upload every file of the project as a single commit, returning (files, commit)"""
+        files = self.track_lfs(self.scan())
+        self.log(f"Uploading {len(files)} files...")
+        if not files:
+            return files, None
+        # Stat before uploading, so a file changed mid-upload is hashed again next time
+        stamps = ([(st.st_size, st.st_mtime_ns) for st in (os.stat(file_path) for relative_path, file_path in files)]
+                  if self.manifest is not None else [])
+        shas = {}
+        commit = self.upload_and_commit(files, f"Add {os.path.basename(os.path.normpath(self.directory_path))}",
+                                        shas=shas)
+        if self.manifest is not None:
+            # Recording what was sent lets the next push() spot files deleted since
+            self.manifest.record_upload(files, stamps, shas)
+        return files, commit
@@ -0,0 +1,31 @@
+import json
+from pathlib import Path
+
+# Shared by the GUI and the command line
+TOKENS_FILE = Path.home() / '.github_tokens.json'
+
+
+def load_tokens(tokens_file=TOKENS_FILE):
+    """Return the saved {name: token} mapping, raising if the file can't be read"""
+    tokens_file = Path(tokens_file)
+    if not tokens_file.exists():
+        return {}
+    with open(tokens_file, 'r') as f:
+        return json.load(f)
+
+
+def save_tokens(tokens, tokens_file=TOKENS_FILE):
+    with open(tokens_file, 'w') as f:
+        json.dump(tokens, f)
+
+
+def resolve_token(value, tokens):
+    """Turn a saved token name or a raw token into a token.
+
+    With no value the most recently saved token is used, or None when
+    nothing has been saved.
+    """
+    if value:
+        return tokens.get(value, value)
+    saved = [token for token in tokens.values() if token.strip()]
+    return saved[-1] if saved else None
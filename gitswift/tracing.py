@@ -0,0 +1,177 @@
+"""Spans timing every phase of a sync, saved as a Chrome trace
+
+Once enabled, TRACER records a span for each phase (scan, hashing, the
+remote tree, blob uploads, the commit, ...) and for every HTTP request,
+on whichever thread it ran. GITSWIFT_TRACE=FILE enables it and saves the
+trace to FILE when the process exits; the CLI's --trace FILE does the
+same. The file uses the Chrome trace event format, which
+chrome://tracing, Perfetto (ui.perfetto.dev) and speedscope open.
+
+profiling() runs a block under cProfile when GITSWIFT_PROFILE=FILE (or
+the CLI's --profile FILE) names a file to save the stats to, for pstats,
+snakeviz and the like. Worker threads are named gitswift-*, so stacks
+from py-spy dump or py-spy record --threads say which pool they are in.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+TRACE_ENV = 'GITSWIFT_TRACE'
+PROFILE_ENV = 'GITSWIFT_PROFILE'
+
+# Spans kept at most, so a long watch doesn't grow without bound
+MAX_SPANS = 200000
+
+Span = namedtuple('Span', 'name category start seconds thread args')
+
+
+class Tracer:
+    """Spans recorded from any thread, ignored until enable() is called"""
+
+    def __init__(self, keep=MAX_SPANS):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.spans = deque(maxlen=keep)
+        # {thread ident: name} of every thread that recorded a span
+        self.threads = {}
+        # perf_counter() the trace's timestamps count from
+        self.origin = time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+
+    def record(self, name, start, seconds, category='sync', **args):
+        """Add a span that started at perf_counter() time start and lasted seconds"""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        with self.lock:
+            self.threads[thread.ident] = thread.name
+            self.spans.append(Span(name, category, start, seconds, thread.ident, args))
+
+    @contextmanager
+    def span(self, name, category='sync', **args):
+        """Time the block as one span.
+
+        Yields the span's args, so the block can add what it found out
+        (a file count, say). A block left by an exception records its type.
+        """
+        if not self.enabled:
+            yield args
+            return
+        start = time.perf_counter()
+        try:
+            yield args
+        except BaseException as e:
+            args['error'] = type(e).__name__
+            raise
+        finally:
+            self.record(name, start, time.perf_counter() - start, category, **args)
+
+    def totals(self, category='sync'):
+        """{name: [count, seconds]} of the spans in category, longest first"""
+        with self.lock:
+            spans = [span for span in self.spans if span.category == category]
+        totals = {}
+        for span in spans:
+            total = totals.setdefault(span.name, [0, 0.0])
+            total[0] += 1
+            total[1] += span.seconds
+        return dict(sorted(totals.items(), key=lambda item: -item[1][1]))
+
+    def to_chrome(self):
+        """The spans as a Chrome trace: complete ('X') events in microseconds, plus thread names"""
+        pid = os.getpid()
+        with self.lock:
+            spans = list(self.spans)
+            threads = dict(self.threads)
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': ident, 'args': {'name': name}}
+                  for ident, name in threads.items()]
+        events += [{'name': span.name, 'cat': span.category, 'ph': 'X', 'pid': pid, 'tid': span.thread,
+                    'ts': round((span.start - self.origin) * 1e6, 3), 'dur': round(span.seconds * 1e6, 3),
+                    'args': span.args}
+                   for span in spans]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome(), f)
+        os.replace(temp_path, path)
+
+
+def describe(totals):
+    """One line summary of a totals() dict"""
+    return ', '.join(f"{name} {seconds:.2f} s" + (f" ({count}x)" if count > 1 else '')
+                     for name, (count, seconds) in totals.items())
+
+
+TRACER = Tracer()
+span = TRACER.span
+
+
+def traced(name, category='sync'):
+    """Decorator timing every call of a function as a span"""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(name, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def trace_to(path):
+    """Record spans from now on and save them to path when the process exits"""
+    TRACER.enable()
+    atexit.register(TRACER.save, path)
+
+
+# Paths profiling() has written in this process, which later blocks add to
+_profiled = set()
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def profiling(path=None):
+    """Run the block under cProfile, saving the stats to path or $GITSWIFT_PROFILE.
+
+    Does nothing when neither names a file. Only the calling thread is
+    profiled, so time spent in upload threads shows up as waiting for
+    them; the trace has their spans. The stats of every block profiled in
+    one process are added up in the file.
+    """
+    path = path or os.environ.get(PROFILE_ENV)
+    if not path:
+        yield
+        return
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is running on this thread already
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        with _profile_lock:
+            stats = pstats.Stats(profiler)
+            if path in _profiled:
+                stats.add(path)
+            stats.dump_stats(path)
+            _profiled.add(path)
+
+
+if os.environ.get(TRACE_ENV):
+    trace_to(os.environ[TRACE_ENV])
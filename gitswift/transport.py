@@ -0,0 +1,102 @@
+import base64
+import os
+
+from github import GithubException
+
+from .client import DEFAULT_WORKERS
+from .hashing import CHUNK_SIZE
+from .http import new_session
+
+BLOB_PREFIX = b'{"encoding": "base64", "content": "'
+BLOB_SUFFIX = b'"}'
+
+
+class BlobBody:
+    """File-like JSON body of a create-blob request.
+
+    The file is base64-encoded one chunk at a time as the HTTP layer reads
+    the body, so only a chunk or two is ever held in memory. The encoded
+    length is known up front, so the request goes out with a plain
+    Content-Length instead of chunked transfer encoding. on_read, if given,
+    is called with the size of every chunk of the file that is read.
+    """
+
+    def __init__(self, file_path, chunk_size=CHUNK_SIZE, on_read=None):
+        self.file = open(file_path, 'rb')
+        self.on_read = on_read
+        self.size = os.fstat(self.file.fileno()).st_size
+        # Whole 3-byte groups encode without padding, so the pieces join up
+        self.chunk_size = max(3, chunk_size - chunk_size % 3)
+        self.buffer = memoryview(BLOB_PREFIX)
+        self.offset = 0
+        self.done = False
+
+    def __len__(self):
+        return len(BLOB_PREFIX) + 4 * ((self.size + 2) // 3) + len(BLOB_SUFFIX)
+
+    def __iter__(self):
+        return iter(lambda: self.read(self.chunk_size), b'')
+
+    def read(self, size=-1):
+        if self.offset >= len(self.buffer) and not self.done:
+            chunk = self.file.read(self.chunk_size)
+            if chunk:
+                self.buffer = memoryview(base64.b64encode(chunk))
+                if self.on_read is not None:
+                    self.on_read(len(chunk))
+            else:
+                self.buffer = memoryview(BLOB_SUFFIX)
+                self.done = True
+                self.file.close()
+            self.offset = 0
+        if size is None or size < 0:
+            size = len(self.buffer) - self.offset
+        data = self.buffer[self.offset:self.offset + size].tobytes()
+        self.offset += len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class BlobStreamer:
+    """Create blobs for a repository with streamed request bodies.
+
+    PyGithub builds the whole base64 JSON document in memory, which costs
+    several copies of the file. This sends the same request through a
+    session on the shared connection pool, reusing the repository client's
+    credentials.
+    """
+
+    def __init__(self, repo, pool_size=DEFAULT_WORKERS, chunk_size=CHUNK_SIZE, timeout=300):
+        self.url = f"{repo.url}/git/blobs"
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.session = new_session(pool_size)
+
+        headers = {
+            'Accept': 'application/vnd.github+json',
+            'Content-Type': 'application/json',
+            'User-Agent': 'GitSwift',
+        }
+        if repo.requester.auth is not None:
+            repo.requester.auth.authentication(headers)
+        self.session.headers.update(headers)
+
+    def create_blob(self, file_path, on_read=None):
+        """Upload file_path as a blob, returning (sha, response headers)"""
+        body = BlobBody(file_path, self.chunk_size, on_read)
+        try:
+            response = self.session.post(self.url, data=body, timeout=self.timeout)
+        finally:
+            body.close()
+
+        headers = {name.lower(): value for name, value in response.headers.items()}
+        try:
+            data = response.json()
+        except ValueError:
+            data = {'message': response.text}
+        if response.status_code != 201:
+            # Same exception PyGithub raises, so callers handle both paths alike
+            raise GithubException(response.status_code, data, headers)
+        return data['sha'], headers
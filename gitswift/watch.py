@@ -0,0 +1,182 @@
+"""Push a project automatically as its files change
+
+Changes are picked up from the operating system (inotify, FSEvents,
+ReadDirectoryChangesW) through the optional watchdog package, or by
+polling file sizes and mtimes when it isn't installed. Bursts of edits are
+collected until the project has been quiet for a moment and then pushed
+as one commit of just the changed paths.
+"""
+
+import os
+import threading
+import time
+
+from .errors import check_cancelled
+from .scan import collect_files, path_ignored
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+# Seconds without changes before a burst of edits is pushed
+DEBOUNCE = 2.0
+
+# A burst that never pauses (a file written to all the time) is pushed after this many seconds
+MAX_DELAY = 30.0
+
+# Seconds between scans of the polling fallback
+POLL_INTERVAL = 1.0
+
+
+def relative_to(directory_path, path):
+    """Git-style path of path below directory_path, or None for paths outside it or in .git"""
+    relative_path = os.path.relpath(path, directory_path).replace(os.sep, '/')
+    if relative_path == '.' or relative_path.startswith('../') or relative_path.split('/')[0] == '.git':
+        return None
+    return relative_path
+
+
+class ChangeQueue:
+    """Changed paths, handed out once no new change came for debounce seconds
+    or the first of them is max_delay seconds old"""
+
+    def __init__(self, debounce=DEBOUNCE, max_delay=MAX_DELAY):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.paths = set()
+        self.first_change = 0.0
+        self.last_change = 0.0
+        self.condition = threading.Condition()
+
+    def add(self, relative_path):
+        with self.condition:
+            now = time.monotonic()
+            if not self.paths:
+                self.first_change = now
+            self.paths.add(relative_path)
+            self.last_change = now
+            self.condition.notify()
+
+    def wait(self, cancelled=None, poll=0.2):
+        """Block until a burst of changes is over and return its paths"""
+        while True:
+            check_cancelled(cancelled)
+            with self.condition:
+                now = time.monotonic()
+                due = min(self.last_change + self.debounce, self.first_change + self.max_delay)
+                if self.paths and now >= due:
+                    paths, self.paths = self.paths, set()
+                    return paths
+                self.condition.wait(min(poll, due - now) if self.paths else poll)
+
+
+class PollingWatcher:
+    """Watch by comparing the size and mtime of every file each interval seconds"""
+
+    kind = 'polling'
+
+    def __init__(self, directory_path, on_change, interval=POLL_INTERVAL):
+        self.directory_path = directory_path
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def snapshot(self):
+        stamps = {}
+        for relative_path, file_path in collect_files(self.directory_path):
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            stamps[relative_path] = (st.st_size, st.st_mtime_ns)
+        return stamps
+
+    def start(self):
+        self._stop.clear()
+        before = self.snapshot()
+
+        def run():
+            nonlocal before
+            while not self._stop.wait(self.interval):
+                after = self.snapshot()
+                for relative_path in before.keys() | after.keys():
+                    if before.get(relative_path) != after.get(relative_path):
+                        self.on_change(relative_path)
+                before = after
+
+        self._thread = threading.Thread(target=run, name='gitswift-poll', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class NativeWatcher:
+    """Watch through the operating system's change notifications, using watchdog"""
+
+    kind = 'native'
+
+    def __init__(self, directory_path, on_change):
+        self.directory_path = directory_path
+        self.on_change = on_change
+        self._observer = None
+
+    def start(self):
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type in ('opened', 'closed_no_write'):
+                    return
+                # A directory deleted or moved as a whole may not report its files
+                if event.is_directory and event.event_type not in ('deleted', 'moved'):
+                    return
+                for path in (event.src_path, getattr(event, 'dest_path', '')):
+                    relative_path = relative_to(watcher.directory_path, os.fsdecode(path)) if path else None
+                    # Build output and the like would otherwise keep postponing the push
+                    if relative_path is not None and not path_ignored(watcher.directory_path, relative_path):
+                        watcher.on_change(relative_path)
+
+        self._observer = Observer()
+        self._observer.schedule(Handler(), self.directory_path, recursive=True)
+        self._observer.start()
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+
+
+def make_watcher(directory_path, on_change, polling=False):
+    """Native watcher when watchdog is installed and polling isn't asked for, else a PollingWatcher"""
+    if Observer is None or polling:
+        return PollingWatcher(directory_path, on_change)
+    return NativeWatcher(directory_path, on_change)
+
+
+def watch(sync, cancelled=None, debounce=DEBOUNCE, polling=False, on_push=None):
+    """Keep pushing changes to sync.directory_path until cancelled raises Cancelled.
+
+    Starts with a full push() so the branch and the manifest are current,
+    after which each burst of edits only costs the blobs of the changed
+    files and a commit. on_push, if given, is called with the (changes,
+    commit) of every push that made a commit.
+    """
+    queue = ChangeQueue(debounce)
+    watcher = make_watcher(sync.directory_path, queue.add, polling)
+    # Watch before the first push so edits made during it aren't missed
+    watcher.start()
+    try:
+        changes, commit = sync.push()
+        sync.log(f"Watching {sync.directory_path} for changes ({watcher.kind})...")
+        while True:
+            if commit is not None and on_push is not None:
+                on_push(changes, commit)
+            changes, commit = sync.push_paths(queue.wait(cancelled))
+    finally:
+        watcher.stop()
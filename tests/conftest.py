@@ -0,0 +1,60 @@
+import atexit
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
+
+# Manifests, journals and the HTTP cache of test repositories stay out of the real home directory
+STATE_DIR = tempfile.mkdtemp(prefix='gitswift-tests-')
+os.environ['HOME'] = os.environ['USERPROFILE'] = STATE_DIR
+atexit.register(shutil.rmtree, STATE_DIR, True)
+
+_repo_numbers = itertools.count()
+
+
+@pytest.fixture(scope='session')
+def fake_server():
+    """(fake GitHub state, its URL) of the server shared by the tests below"""
+    from fake_github import serve
+
+    server, github, url = serve()
+    yield github, url
+    server.shutdown()
+
+
+@pytest.fixture
+def github(fake_server):
+    return fake_server[0]
+
+
+@pytest.fixture
+def base_url(fake_server):
+    return fake_server[1]
+
+
+@pytest.fixture
+def repo(base_url):
+    from gitswift import connect
+
+    return connect('test-token', base_url=base_url).get_user().create_repo(name=f"app-{next(_repo_numbers)}",
+                                                                            auto_init=True)
+
+
+@pytest.fixture
+def make_project(tmp_path):
+    """make_project(name, file names) writes a project below tmp_path, each file holding its name"""
+
+    def make(name, names):
+        directory = tmp_path / name
+        for file_name in names:
+            (directory / file_name).parent.mkdir(parents=True, exist_ok=True)
+            (directory / file_name).write_text(file_name)
+        return str(directory)
+
+    return make
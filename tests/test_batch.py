@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+from gitswift import load_batch
+
+
+def write_batch(tmp_path, entries):
+    path = tmp_path / 'batch.json'
+    path.write_text(json.dumps(entries))
+    return str(path)
+
+
+@pytest.mark.parametrize('branches', [(None, None), (None, 'main'), ('main', None), ('dev', 'dev')])
+def test_same_repository_and_branch_twice_is_rejected(tmp_path, branches):
+    entries = [{'directory': directory, 'repo': 'Site', 'branch': branch}
+               for directory, branch in zip(('one', 'two'), branches)]
+    with pytest.raises(ValueError, match="Entry 2"):
+        load_batch(write_batch(tmp_path, [{key: value for key, value in entry.items() if value}
+                                          for entry in entries]))
+
+
+def test_same_repository_on_named_branches_is_allowed(tmp_path):
+    entries = load_batch(write_batch(tmp_path, [{'directory': 'one', 'repo': 'site', 'branch': 'main'},
+                                                {'directory': 'two', 'repo': 'Site', 'branch': 'docs'}]))
+    assert [(entry.repo, entry.branch) for entry in entries] == [('site', 'main'), ('Site', 'docs')]
@@ -0,0 +1,24 @@
+"""The shared connection pool: ETag revalidation and PyGithub's retries"""
+
+from gitswift import RepoSync, connect, remote_head
+
+
+def test_unchanged_answers_are_replayed_from_the_cache(repo, github, base_url):
+    connect('cache-token', base_url=base_url).get_repo(repo.full_name)
+    before = github.not_modified
+    again = connect('cache-token', base_url=base_url).get_repo(repo.full_name)
+    # The server only said 304 Not Modified, the body came from the cache
+    assert github.not_modified == before + 1
+    assert (again.full_name, again.default_branch) == (repo.full_name, repo.default_branch)
+
+    # Another token's answers aren't shared, and a client without the cache doesn't revalidate
+    connect('other-token', base_url=base_url).get_repo(repo.full_name)
+    connect('cache-token', base_url=base_url, cache=False).get_repo(repo.full_name)
+    assert github.not_modified == before + 1
+
+
+def test_changed_answers_are_not_replayed(repo, base_url, make_project):
+    client = connect('cache-token', base_url=base_url)
+    head = remote_head(client.get_repo(repo.full_name))
+    changes, commit = RepoSync(repo, make_project('project', ['a.txt'])).push()
+    assert remote_head(client.get_repo(repo.full_name)) == commit.sha != head
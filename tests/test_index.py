@@ -0,0 +1,58 @@
+import random
+
+from gitswift import FileIndex
+
+
+def sha_of(number):
+    return f"{number + 1:040x}"
+
+
+def make_index(count=500):
+    return FileIndex.build((f"d{i % 7}/f{i}", i, i, sha_of(i)) for i in range(count))
+
+
+def test_merged_matches_a_rebuild():
+    index = make_index()
+    paths = list(index)
+    shuffle = random.Random(1)
+    for _ in range(100):
+        added = {f"d{shuffle.randrange(9)}/g{shuffle.randrange(50)}": (1, 2, sha_of(7)) for _ in range(4)}
+        added = [(path, *stamp) for path, stamp in sorted(added.items())]
+        removed = shuffle.sample(paths, 3) + ['missing']
+        expected = sorted([entry for entry in index.entries() if entry[0] not in removed] + added)
+        merged = index.merged(added, removed)
+        assert list(merged.entries()) == expected
+        assert all(merged.find(entry[0]) == position for position, entry in enumerate(expected))
+    assert index.merged() is index
+
+
+def test_update_in_place_returns_missing_entries():
+    index = make_index()
+    missing = index.update([('d0/f0', 5, 6, sha_of(999)), ('d0/new', 1, 1, sha_of(1))])
+    assert missing == [('d0/new', 1, 1, sha_of(1))]
+    assert index.entry(index.find('d0/f0')) == ('d0/f0', 5, 6, sha_of(999))
+
+
+def test_blobs_only_match_whole_shas():
+    index = FileIndex.build([('a', -1, -1, '11' * 10 + '22' * 10), ('b', -1, -1, '22' * 10 + '33' * 10)])
+    # Bytes that span the boundary between two SHAs aren't a SHA of the index
+    assert index.blobs(['22' * 20, '11' * 10 + '22' * 10, None]) == {'11' * 10 + '22' * 10}
+
+
+def test_blobs_searching_and_scanning_agree():
+    index = make_index()
+    present = [sha_of(i) for i in range(0, 500, 5)]
+    absent = [sha_of(1000 + i) for i in range(10)]
+    # Few SHAs are searched for one by one, many found in one pass
+    assert index.blobs(present[:3] + absent[:3]) == set(present[:3])
+    assert index.blobs(present + absent) == set(present)
+
+
+def test_under_matches_a_prefix_filter():
+    index = FileIndex.build([(path, 1, 1, sha_of(0)) for path in
+                             ('a', 'a-b', 'a.txt', 'a/b', 'a/b/c', 'a/c', 'a0', 'ab/c', 'b/a', 'b/a/x')])
+    paths = ['a', 'b/a', 'missing']
+    expected = [position for position, path in enumerate(index)
+                if any(path == p or path.startswith(f"{p}/") for p in paths)]
+    assert index.under(paths) == expected
+    assert [index.path(position) for position in index.under(['a/b'])] == ['a/b', 'a/b/c']
@@ -0,0 +1,50 @@
+"""Resuming an interrupted upload from the journal"""
+
+import pytest
+
+from gitswift import Cancelled, RepoSync, fetch_remote_tree
+from gitswift.journal import Journal
+
+
+def test_an_interrupted_upload_resumes(repo, make_project):
+    names = [f"{i}.txt" for i in range(30)]
+    project = make_project('project', names)
+    messages = []
+    uploaded = []
+
+    def log(message):
+        messages.append(message)
+        if message.startswith('Uploaded'):
+            uploaded.append(message)
+
+    with pytest.raises(Cancelled):
+        RepoSync(repo, project, log=log, cancelled=lambda: len(uploaded) >= 10, workers=2).upload_all()
+    sent = len(uploaded)
+    assert 10 <= sent < len(names)
+
+    sync = RepoSync(repo, project, log=log, workers=4)
+    assert len(sync.journal.blobs) == sent
+    uploaded.clear()
+    sync.push()
+    # Only what the first run hadn't sent is uploaded, and the finished push drops the journal
+    assert f"Resuming: {sent} file(s) were already uploaded" in messages
+    assert len(uploaded) == len(names) - sent
+    assert not sync.journal.path.exists()
+    assert set(names) <= set(fetch_remote_tree(repo, repo.default_branch))
+
+
+def test_a_torn_last_record_is_dropped(tmp_path):
+    def load():
+        return Journal.load('octocat', 'repo', 'main', str(tmp_path), directory=tmp_path / 'state')
+
+    journal = load()
+    journal.record_blob('a', [1, 2], 'a' * 40)
+    journal.close()
+    with open(journal.path, 'a') as f:
+        f.write('{"op": "blob", "path": "b"')
+    journal = load()
+    assert list(journal.blobs) == ['a']
+    # Records written after the torn one aren't glued to it
+    journal.record_blob('c', [1, 2], 'c' * 40)
+    journal.close()
+    assert sorted(load().blobs) == ['a', 'c']
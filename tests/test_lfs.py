@@ -0,0 +1,52 @@
+"""Pushing large and binary files through Git LFS"""
+
+import hashlib
+import os
+
+from gitswift import RepoSync, fetch_remote_tree
+from gitswift.lfs import lfs_pointer
+
+THRESHOLDS = {'lfs_threshold': 4096, 'lfs_binary_threshold': 512}
+
+
+def test_large_and_binary_files_go_to_lfs(repo, github, tmp_path):
+    project = tmp_path / 'project'
+    (project / 'assets').mkdir(parents=True)
+    contents = {
+        'big file.bin': os.urandom(8192),
+        'assets/logo.png': b'\x89PNG\0' + os.urandom(1024),
+        'notes.txt': b'x' * 1024,
+        'a.py': b'print(1)\n',
+    }
+    for relative_path, data in contents.items():
+        (project / relative_path).write_bytes(data)
+
+    sync = RepoSync(repo, str(project), **THRESHOLDS)
+    files = sync.track_lfs(sync.scan())
+    # The new .gitattributes takes its place in path order
+    assert [relative_path for relative_path, file_path in files] == sorted(list(contents) + ['.gitattributes'])
+    assert (project / '.gitattributes').read_text().splitlines() == [
+        '/assets/logo.png filter=lfs diff=lfs merge=lfs -text',
+        '/big[[:space:]]file.bin filter=lfs diff=lfs merge=lfs -text',
+    ]
+
+    requests = len(github.requests)
+    changes, commit = sync.push()
+    remote = fetch_remote_tree(repo, repo.default_branch)
+    blobs = github.repos[repo.name].blobs
+    for relative_path in ('big file.bin', 'assets/logo.png'):
+        data = contents[relative_path]
+        oid = hashlib.sha256(data).hexdigest()
+        # The content went to LFS storage, PUT and then verified, and the tree holds its pointer
+        assert github.lfs_objects[oid] == len(data)
+        assert blobs[remote[relative_path]] == lfs_pointer(oid, len(data))
+        assert ('PUT', f"/lfs/objects/{oid}") in github.requests[requests:]
+    assert github.requests[requests:].count(('POST', '/lfs/verify')) == 2
+    assert blobs[remote['notes.txt']] == contents['notes.txt']
+    assert '.gitattributes' in remote
+
+    # Nothing changed, so LFS isn't asked again
+    requests = len(github.requests)
+    changes, commit = RepoSync(repo, str(project), **THRESHOLDS).push()
+    assert commit is None
+    assert not [path for method, path in github.requests[requests:] if 'lfs' in path]
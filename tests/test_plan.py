@@ -0,0 +1,59 @@
+"""Planning a push, saving the plan and applying exactly that later"""
+
+import os
+
+import pytest
+
+from gitswift import Plan, RepoSync, StalePlan, fetch_remote_tree
+
+
+def writes(requests):
+    return [(method, path) for method, path in requests if method != 'GET']
+
+
+def test_apply_pushes_what_was_planned(repo, github, make_project, tmp_path):
+    project = make_project('project', ['a.txt', 'b.txt', 'c.txt'])
+    RepoSync(repo, project).upload_all()
+    with open(os.path.join(project, 'a.txt'), 'w') as f:
+        f.write('changed')
+    with open(os.path.join(project, 'new.txt'), 'w') as f:
+        f.write('new')
+    os.remove(os.path.join(project, 'c.txt'))
+
+    requests = len(github.requests)
+    RepoSync(repo, project).plan().save(tmp_path / 'plan.json')
+    # Planning writes nothing to the repository
+    assert writes(github.requests[requests:]) == []
+
+    plan = Plan.load(tmp_path / 'plan.json')
+    assert (plan.added, plan.modified, plan.deleted) == (['new.txt'], ['a.txt'], ['c.txt'])
+    changes, commit = RepoSync(repo, project).apply(plan)
+    remote = fetch_remote_tree(repo, repo.default_branch)
+    assert {'a.txt', 'b.txt', 'new.txt'} <= set(remote) and 'c.txt' not in remote
+    assert github.repos[repo.name].blobs[remote['a.txt']] == b'changed'
+    changes, commit = RepoSync(repo, project).push()
+    assert commit is None
+
+
+def test_stale_plans_are_refused_before_writing(repo, github, make_project):
+    project = make_project('project', ['a.txt', 'b.txt'])
+    RepoSync(repo, project).upload_all()
+    with open(os.path.join(project, 'a.txt'), 'w') as f:
+        f.write('changed')
+    plan = RepoSync(repo, project).plan()
+
+    # A planned file changed again
+    with open(os.path.join(project, 'a.txt'), 'w') as f:
+        f.write('changed twice')
+    requests = len(github.requests)
+    with pytest.raises(StalePlan, match='a.txt has changed'):
+        RepoSync(repo, project).apply(plan)
+    assert writes(github.requests[requests:]) == []
+
+    # The branch moved
+    plan = RepoSync(repo, project).plan()
+    RepoSync(repo, make_project('other', ['other.txt'])).push()
+    requests = len(github.requests)
+    with pytest.raises(StalePlan, match='has moved'):
+        RepoSync(repo, project).apply(plan)
+    assert writes(github.requests[requests:]) == []
@@ -0,0 +1,88 @@
+"""Retries with backoff and the AIMD concurrency limit, in RateLimiter and against a failing server"""
+
+import itertools
+import time
+
+import pytest
+from github import GithubException
+
+from fake_github import serve
+from gitswift import RateLimiter, RepoSync, connect, fetch_remote_tree
+from gitswift import ratelimit
+
+_repo_numbers = itertools.count()
+
+
+@pytest.fixture(autouse=True)
+def quick_backoff(monkeypatch):
+    monkeypatch.setattr(ratelimit, 'BACKOFF_BASE', 0.01)
+    monkeypatch.setattr(ratelimit, 'SECONDARY_LIMIT_PAUSE', 0.2)
+
+
+@pytest.fixture(scope='module')
+def flaky_server():
+    """A fake GitHub answering one request in five with 502 Bad Gateway"""
+    server, github, url = serve(error_rate=0.2, seed=1)
+    yield github, url
+    server.shutdown()
+
+
+def failing(*errors):
+    """send() for RateLimiter.call that raises errors one after the other, then returns 'done'"""
+    errors = iter(errors)
+
+    def send():
+        error = next(errors, None)
+        if error is not None:
+            raise error
+        return 'done'
+
+    return send
+
+
+def test_server_errors_are_retried_and_halve_the_limit():
+    limiter = RateLimiter(concurrency=8)
+    assert limiter.call(failing(GithubException(502, {'message': 'Server Error'}, {}),
+                                GithubException(502, {'message': 'Server Error'}, {}))) == 'done'
+    assert (limiter.retries, limiter.limit) == (2, 2)
+    # One more allowed in flight after each limit's worth of successes
+    for _ in range(2 + 3):
+        limiter.call(failing())
+    assert limiter.limit == 4
+
+
+def test_secondary_rate_limit_pauses_before_retrying():
+    limiter = RateLimiter(concurrency=4)
+    start = time.time()
+    limiter.call(failing(GithubException(403, {'message': 'You have exceeded a secondary rate limit.'}, {})))
+    assert time.time() - start >= ratelimit.SECONDARY_LIMIT_PAUSE
+    assert (limiter.retries, limiter.limit) == (1, 2)
+
+    # Without a retry-after or a secondary limit, a 403 is final
+    with pytest.raises(GithubException):
+        limiter.call(failing(GithubException(403, {'message': 'Resource not accessible'}, {})))
+
+
+def test_push_survives_server_errors(flaky_server, tmp_path):
+    github, url = flaky_server
+    name = f"flaky-{next(_repo_numbers)}"
+    github.create_repo(name)
+    repo = connect('test-token', base_url=url).get_repo(f"{github.login}/{name}")
+    names = [f"{i}.txt" for i in range(40)]
+    for file_name in names:
+        (tmp_path / file_name).write_text(file_name)
+
+    errors = github.errors
+    sync = RepoSync(repo, str(tmp_path), workers=8)
+    changes, commit = sync.push()
+    assert github.errors > errors and sync.uploader.limiter.retries > 0
+    assert set(names) <= set(fetch_remote_tree(repo, repo.default_branch))
+
+
+def test_client_calls_use_pygithubs_retries(flaky_server):
+    github, url = flaky_server
+    client = connect('test-token', base_url=url)
+    errors = github.errors
+    # Outside RateLimiter.call, PyGithub's own retry policy rides out the 502s
+    assert all(client.get_user().login == github.login for _ in range(20))
+    assert github.errors > errors
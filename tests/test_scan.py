@@ -0,0 +1,79 @@
+"""collect_files() against git's own reading of the ignore files
+
+Builds a project with nested, negated and directory-only patterns and
+checks that collect_files() lists exactly what
+git ls-files --others --exclude-standard does, in the same order.
+"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from gitswift import collect_files
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason="git is not installed")
+
+IGNORE_FILES = {
+    '.gitignore': "*.log\n!keep.log\nbuild/\n!build/keep.txt\n/top_only.txt\ndocs/**/*.tmp\n# comment\n\\#hash.txt\n",
+    'sub/.gitignore': "*.dat\n!important.dat\ncache/\n/anchored.txt\n",
+    'sub/deeper/.gitignore': "!again.dat\n",
+}
+
+FILES = [
+    'README.md',
+    'a.log',
+    'keep.log',
+    'logs/b.log',
+    'logs/keep.log',
+    'build/x.txt',
+    'build/keep.txt',
+    'src/build/y.txt',
+    'src/build.txt',
+    'top_only.txt',
+    'src/top_only.txt',
+    'docs/c.tmp',
+    'docs/a/b/c.tmp',
+    'docs/a/b/c.txt',
+    '#hash.txt',
+    'sub/x.dat',
+    'sub/important.dat',
+    'sub/cache/z.txt',
+    'sub/build',
+    'sub/anchored.txt',
+    'sub/deeper/anchored.txt',
+    'sub/deeper/y.dat',
+    'sub/deeper/again.dat',
+    'name with spaces.txt',
+    'a-b.txt',
+    'a/b.txt',
+    'a.txt',
+    'secret.txt',
+    'src/secret.txt',
+]
+
+
+def git(directory, *args):
+    """Output of a git command in directory, ignoring the user's and the system's git config"""
+    env = dict(os.environ, GIT_CONFIG_NOSYSTEM='1', GIT_CONFIG_GLOBAL=os.devnull, HOME=directory)
+    return subprocess.run(['git', *args], cwd=directory, env=env, check=True, capture_output=True).stdout
+
+
+def test_collect_files_matches_git(tmp_path):
+    directory = str(tmp_path)
+    git(directory, 'init', '-q')
+    with open(os.path.join(directory, '.git', 'info', 'exclude'), 'a') as f:
+        f.write("/secret.txt\n")
+    for relative_path, text in IGNORE_FILES.items():
+        (tmp_path / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relative_path).write_text(text)
+    for relative_path in FILES:
+        (tmp_path / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relative_path).write_text(relative_path)
+
+    output = git(directory, 'ls-files', '--others', '--exclude-standard', '-z')
+    expected = [path for path in output.decode('utf-8').split('\0') if path]
+    assert [relative_path for relative_path, file_path in collect_files(directory)] == expected
+    # Sanity check that the fixture exercises ignoring at all
+    assert 'a.log' not in expected and 'keep.log' in expected and 'sub/deeper/again.dat' in expected
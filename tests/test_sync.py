@@ -0,0 +1,38 @@
+"""Pushes against the fake GitHub server from benchmarks/fake_github.py"""
+
+import os
+
+from gitswift import RepoSync, fetch_remote_tree
+
+
+def test_pushing_another_directory_deletes_nothing(repo, make_project):
+    first = make_project('first', [f"{i}.txt" for i in range(4)])
+    second = make_project('second', ['other.txt'])
+    RepoSync(repo, first).push()
+
+    changes, commit = RepoSync(repo, second).push()
+    assert changes.deleted == []
+    assert {'0.txt', '1.txt', '2.txt', '3.txt', 'other.txt'} <= set(fetch_remote_tree(repo, repo.default_branch))
+
+    # Each directory still deletes what it pushed itself
+    os.remove(os.path.join(first, '0.txt'))
+    changes, commit = RepoSync(repo, first).push()
+    assert changes.deleted == ['0.txt']
+    assert '0.txt' not in fetch_remote_tree(repo, repo.default_branch)
+
+
+def test_manifest_follows_the_remote_tree(repo, tmp_path, make_project):
+    project = make_project('project', [f"{i}.txt" for i in range(6)])
+    sync = RepoSync(repo, project)
+    sync.upload_all()
+    for step in range(4):
+        (tmp_path / 'project' / f"{step}.txt").write_text(f"changed {step}")
+        (tmp_path / 'project' / f"new{step}.txt").write_text(f"new {step}")
+        os.remove(os.path.join(project, f"{5 - step}.txt"))
+        sync = RepoSync(repo, project)
+        sync.push()
+        assert dict(sync.manifest.entries.items()) == dict(fetch_remote_tree(repo, repo.default_branch).items())
+    # Nothing changed, so nothing is hashed or written
+    saved = os.stat(sync.manifest.path).st_mtime_ns
+    changes, commit = RepoSync(repo, project).push()
+    assert commit is None and os.stat(sync.manifest.path).st_mtime_ns == saved